@@ -0,0 +1,3 @@
+'''
+Benchmarks of utils with a generator of synthetic reports trees. See __main__ for the command line.
+'''
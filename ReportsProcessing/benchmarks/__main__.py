@@ -0,0 +1,176 @@
+'''
+Benchmarks of utils on a generated reports tree.
+
+    python -m benchmarks generate <root> [--countries 200 --regions 100 --days 2000]
+    python -m benchmarks run <root> [--output baseline.json] [--compare baseline.json]
+    python -m benchmarks compare <baseline.json> <results.json>
+
+Commands should be run from the ReportsProcessing folder. Every benchmark is run in a new process
+with REPORTS_DATA_ROOT pointing to the generated tree, and wall time and peak RSS are recorded to JSON.
+'''
+
+import argparse as _argparse
+import datetime as _datetime
+import json as _json
+import os as _os
+import platform as _platform
+import subprocess as _subprocess
+import sys as _sys
+
+from . import _generator, _suite
+
+_TREE_INFO = 'benchmark_tree.json'
+
+
+def _generate(args):
+    info = _generator.generate_reports_tree(args.root, args.countries,
+                                            args.regions, args.days,
+                                            args.countries_with_regions,
+                                            args.counties, args.seed)
+
+    with open(_os.path.join(args.root, _TREE_INFO), 'w') as info_file:
+        _json.dump(info, info_file, indent=2)
+
+    print(f"Generated reports tree in '{args.root}': {info}")
+
+
+def _run_one(args):
+    _os.environ['REPORTS_DATA_ROOT'] = _os.path.abspath(args.root)
+    print(_json.dumps(_suite.run_benchmark(args.name, args.root, args.repeat)))
+
+
+def _run(args):
+    root = _os.path.abspath(args.root)
+    names = [
+        name for name in _suite.get_benchmarks()
+        if not args.filter or any(pattern in name for pattern in args.filter)
+    ]
+
+    tree_info = None
+    if _os.path.exists(_os.path.join(root, _TREE_INFO)):
+        with open(_os.path.join(root, _TREE_INFO)) as info_file:
+            tree_info = _json.load(info_file)
+
+    env = dict(_os.environ, REPORTS_DATA_ROOT=root)
+    results = dict()
+
+    for name in names:
+        process = _subprocess.run(
+            [_sys.executable, '-m', 'benchmarks', '_run_one', root, name,
+             '--repeat', str(args.repeat)],
+            cwd=_os.path.dirname(_os.path.dirname(_os.path.abspath(__file__))),
+            env=env,
+            stdout=_subprocess.PIPE,
+            universal_newlines=True)
+
+        if process.returncode != 0:
+            results[name] = dict(status='failed',
+                                 reason=f'exit code {process.returncode}')
+        else:
+            results[name] = _json.loads(process.stdout.strip().splitlines()[-1])
+
+        print(_format_result(name, results[name]), flush=True)
+
+    report = dict(meta=dict(date=_datetime.datetime.now().isoformat(timespec='seconds'),
+                            python=_platform.python_version(),
+                            platform=_platform.platform(),
+                            cpu_count=_os.cpu_count(),
+                            repeat=args.repeat,
+                            tree=tree_info),
+                  results=results)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            _json.dump(report, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            return _compare_reports(_json.load(baseline_file), report,
+                                    args.threshold)
+
+    return 0
+
+
+def _format_result(name: str, result: dict) -> str:
+    if result['status'] != 'ok':
+        return f"{name:<52} {result['status']}: {result.get('reason', '')}"
+
+    rss = result['peak_rss_mb']
+    rss = f'{rss:9.1f} MB' if rss is not None else '        n/a'
+    return f"{name:<52} {result['wall_s']:10.4f} s {rss}"
+
+
+def _compare_reports(baseline: dict, current: dict, threshold: float) -> int:
+    ''' Prints changes of wall time and peak RSS, and returns 1 if any of them has grown more than the threshold. '''
+
+    regressions = 0
+    print(f"\n{'benchmark':<52} {'time':>10} {'peak RSS':>10}")
+
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or base['status'] != 'ok' or result['status'] != 'ok':
+            continue
+
+        time_ratio = result['wall_s'] / base['wall_s'] if base['wall_s'] else 1
+        rss_ratio = result['peak_rss_mb'] / base['peak_rss_mb'] if base.get(
+            'peak_rss_mb') and result.get('peak_rss_mb') else 1
+        regression = time_ratio > 1 + threshold or rss_ratio > 1 + threshold
+        regressions += regression
+
+        print(f"{name:<52} {time_ratio:9.2f}x {rss_ratio:9.2f}x"
+              f"{'  REGRESSION' if regression else ''}")
+
+    if baseline['meta'].get('tree') != current['meta'].get('tree'):
+        print('\nWarning: results were measured on different reports trees')
+
+    return 1 if regressions else 0
+
+
+def _compare(args):
+    with open(args.baseline) as baseline_file, open(args.results) as results_file:
+        return _compare_reports(_json.load(baseline_file),
+                                _json.load(results_file), args.threshold)
+
+
+def _main() -> int:
+    parser = _argparse.ArgumentParser(prog='python -m benchmarks',
+                                      description='Benchmarks of utils on a generated reports tree')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Generate a synthetic reports tree')
+    generate.add_argument('root', help='The folder to generate the tree in')
+    generate.add_argument('--countries', type=int, default=200, help='The number of countries')
+    generate.add_argument('--regions', type=int, default=100, help='The number of regions of every country with regions')
+    generate.add_argument('--days', type=int, default=2000, help='The number of days in reports')
+    generate.add_argument('--countries-with-regions', type=int, default=2, help='The number of countries with regions')
+    generate.add_argument('--counties', type=int, default=0, help='The number of counties of every region')
+    generate.add_argument('--seed', type=int, default=0, help='The seed of random numbers generator')
+    generate.set_defaults(func=_generate)
+
+    run = commands.add_parser('run', help='Run benchmarks on a generated reports tree')
+    run.add_argument('root', help='The generated reports tree')
+    run.add_argument('--output', help='The JSON file to write results to')
+    run.add_argument('--compare', help='The JSON file with baseline results to compare with')
+    run.add_argument('--threshold', type=float, default=0.2, help='The allowed growth of time and peak RSS, default is 0.2 (20%%)')
+    run.add_argument('--repeat', type=int, default=5, help='The number of measured runs of every benchmark')
+    run.add_argument('--filter', nargs='*', help='Run only benchmarks which names contain any of these strings')
+    run.set_defaults(func=_run)
+
+    compare = commands.add_parser('compare', help='Compare results with baseline results')
+    compare.add_argument('baseline', help='The JSON file with baseline results')
+    compare.add_argument('results', help='The JSON file with results')
+    compare.add_argument('--threshold', type=float, default=0.2, help='The allowed growth of time and peak RSS, default is 0.2 (20%%)')
+    compare.set_defaults(func=_compare)
+
+    run_one = commands.add_parser('_run_one')
+    run_one.add_argument('root')
+    run_one.add_argument('name')
+    run_one.add_argument('--repeat', type=int, default=5)
+    run_one.set_defaults(func=_run_one)
+
+    args = parser.parse_args()
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    _sys.exit(_main())
@@ -0,0 +1,161 @@
+import os as _os
+import typing as _types
+import numpy as _np
+import pandas as _pd
+
+_START_DATE = _pd.Timestamp('2020-01-22')
+_CONTINENTS = ['Africa', 'Asia', 'Europe', 'North America', 'Oceania', 'South America']
+_TOTAL_COLUMNS = ['Confirmed', 'Active', 'Recovered', 'Deaths']
+_CHANGE_COLUMNS = [f'{column}_Change' for column in _TOTAL_COLUMNS]
+
+
+def get_country_name(idx: int) -> str:
+    return f'Country {idx:03d}'
+
+
+def get_region_name(idx: int) -> str:
+    return f'Region {idx:03d}'
+
+
+def get_county_name(idx: int) -> str:
+    return f'County {idx:03d}'
+
+
+def _generate_changes(rng: _np.random.Generator, days: int,
+                      scale: float) -> _np.ndarray:
+    ''' Returns daily changes of confirmed, active, recovered and deaths cases with a few waves of the epidemic. '''
+
+    t = _np.arange(days)
+    waves = sum(
+        _np.exp(-((t - rng.uniform(0, days)) / rng.uniform(20, 120))**2)
+        for _ in range(3))
+    confirmed = rng.poisson(scale * waves + 1)
+    recovered = rng.binomial(_np.roll(confirmed, 14), 0.95)
+    recovered[:14] = 0
+    deaths = rng.binomial(_np.roll(confirmed, 21), 0.02)
+    deaths[:21] = 0
+
+    return _np.stack([confirmed, confirmed - recovered - deaths, recovered, deaths],
+                     axis=1)
+
+
+def _write_report(filepath: str, rng: _np.random.Generator, days: int,
+                  offset: int, scale: float) -> _np.ndarray:
+    ''' Writes a country or region report in the format of ReportsGenerator and returns daily changes. '''
+
+    changes = _generate_changes(rng, days, scale)
+    totals = _np.cumsum(changes, axis=0)
+
+    rt = _np.char.mod('%011.8f', rng.uniform(0.5, 1.6, days)).astype(object)
+    rt[:7] = ''
+    ttr = rng.integers(7, 40, days).astype(object)
+    ttr[:14] = ''
+
+    df = _pd.DataFrame(
+        {'Date': _pd.date_range(_START_DATE + _pd.Timedelta(days=offset),
+                                periods=days).strftime('%d-%m-%Y')})
+    for pos, column in enumerate(_TOTAL_COLUMNS):
+        df[column] = totals[:, pos]
+    for pos, column in enumerate(_CHANGE_COLUMNS):
+        df[column] = changes[:, pos]
+    df['Rt'] = rt
+    df['Time_To_Resolve'] = ttr
+
+    _os.makedirs(_os.path.dirname(filepath), exist_ok=True)
+    df.to_csv(filepath, index=False)
+
+    return changes
+
+
+def _write_stats(filepath: str, names: _types.List[str],
+                 rng: _np.random.Generator, population: _types.Tuple[int, int]):
+    _os.makedirs(_os.path.dirname(filepath), exist_ok=True)
+    _pd.DataFrame({
+        'Name': names,
+        'Continent': [_CONTINENTS[idx % len(_CONTINENTS)] for idx in range(len(names))],
+        'Population': rng.integers(*population, len(names))
+    }).to_csv(filepath, index=False)
+
+
+def generate_reports_tree(root: str,
+                          countries: int = 200,
+                          regions: int = 100,
+                          days: int = 2000,
+                          countries_with_regions: int = 2,
+                          counties: int = 0,
+                          seed: int = 0) -> dict:
+    '''
+    Generates a synthetic reports tree in the same layout as ReportsGenerator writes it, and utils reads it:
+    'reports/countries/<country>/<country>.csv', 'reports/countries/<country>/regions/<region>.csv',
+    'reports/dayByDay/<yyyy-mm-dd>.csv', 'stats/countries.csv', 'stats/<country>/regions.csv'
+    and 'stats/<country>/<region>/counties.csv'.
+
+    Reports of different entities start on different days (up to a week later), like in real data.
+
+    Args:
+        root(str): The folder to generate the tree in. It's used as REPORTS_DATA_ROOT.
+        countries(int): The number of countries.
+        regions(int): The number of regions of every country with regions.
+        days(int): The number of days in reports.
+        countries_with_regions(int): The number of countries with regions reports.
+        counties(int): The number of counties of every region in statistical information.
+        seed(int): The seed of random numbers generator.
+
+    Returns:
+        Dictionary with the configuration of the generated tree.
+    '''
+
+    rng = _np.random.default_rng(seed)
+    countries_root = _os.path.join(root, 'reports', 'countries')
+    stats_root = _os.path.join(root, 'stats')
+
+    country_names = [get_country_name(idx) for idx in range(countries)]
+    region_names = [get_region_name(idx) for idx in range(regions)]
+    _write_stats(_os.path.join(stats_root, 'countries.csv'), country_names,
+                 rng, (10**5, 10**9))
+
+    # Changes of all countries by dates for daily reports.
+    daily = _np.zeros((days, countries, len(_TOTAL_COLUMNS)), dtype=_np.int64)
+
+    for idx, country in enumerate(country_names):
+        offset = idx % 7
+        daily[offset:, idx] = _write_report(
+            _os.path.join(countries_root, country, f'{country}.csv'), rng,
+            days - offset, offset, 1000)
+
+        if idx >= countries_with_regions:
+            continue
+
+        for region_idx, region in enumerate(region_names):
+            offset = region_idx % 7
+            _write_report(
+                _os.path.join(countries_root, country, 'regions', f'{region}.csv'),
+                rng, days - offset, offset, 50)
+
+            if counties:
+                _write_stats(
+                    _os.path.join(stats_root, country, region, 'counties.csv'),
+                    [get_county_name(county) for county in range(counties)],
+                    rng, (10**3, 10**6))
+
+        _write_stats(_os.path.join(stats_root, country, 'regions.csv'),
+                     region_names, rng, (10**4, 10**7))
+
+    daily_root = _os.path.join(root, 'reports', 'dayByDay')
+    _os.makedirs(daily_root, exist_ok=True)
+    totals = _np.cumsum(daily, axis=0)
+
+    for day_idx, day in enumerate(_pd.date_range(_START_DATE, periods=days)):
+        df = _pd.DataFrame({'Country': country_names})
+        for pos, column in enumerate(_TOTAL_COLUMNS):
+            df[column] = totals[day_idx, :, pos]
+        for pos, column in enumerate(_CHANGE_COLUMNS):
+            df[column] = daily[day_idx, :, pos]
+        df.to_csv(_os.path.join(daily_root, f'{day:%Y-%m-%d}.csv'), index=False)
+
+    return dict(countries=countries,
+                regions=regions,
+                days=days,
+                countries_with_regions=countries_with_regions,
+                counties=counties,
+                seed=seed)
@@ -0,0 +1,274 @@
+import gc as _gc
+import importlib as _importlib
+import os as _os
+import shutil as _shutil
+import subprocess as _subprocess
+import sys as _sys
+import time as _time
+import typing as _types
+import pandas as _pd
+
+from . import _generator
+
+try:
+    import resource as _resource
+except ImportError:
+    _resource = None
+
+
+class _Benchmark(_types.NamedTuple):
+    '''
+    A benchmark of utils. setup is called once with utils module and returns a function to measure.
+    cache is 'cold' if the reports cache is removed before every run, 'warm' if runs use the reports cache
+    built by the first run, or None if the benchmark doesn't read reports.
+    '''
+
+    name: str
+    setup: _types.Callable[[_types.Any], _types.Callable[[], _types.Any]]
+    cache: _types.Optional[str] = 'warm'
+    requires: _types.Tuple[str, ...] = ()
+
+
+_benchmarks = dict()
+
+
+def _register(name: str, cache: str = 'warm', requires=()):
+    def decorator(setup):
+        _benchmarks[name] = _Benchmark(name, setup, cache, tuple(requires))
+        return setup
+
+    return decorator
+
+
+def _register_storage(name: str):
+    ''' Registers storage benchmarks with cold and warm reports cache. '''
+
+    def decorator(setup):
+        for cache in ('cold', 'warm'):
+            _benchmarks[f'{name}[{cache}]'] = _Benchmark(
+                f'{name}[{cache}]', setup, cache)
+        return setup
+
+    return decorator
+
+
+def _new_storage(utils):
+    ''' Returns a storage without reports in memory, so runs read them from files. '''
+
+    from utils import _storage
+    return _storage._Storage(utils._paths, catalog=utils._get_reports_catalog())
+
+
+def _get_country_with_regions(utils) -> str:
+    # Regions are generated for the first countries.
+    return _generator.get_country_name(0)
+
+
+@_register('import_utils', cache=None)
+def _import_utils(utils):
+    # Modules imported by the benchmark itself would be imported already, so utils is imported in a new interpreter.
+    # The time includes the interpreter start.
+    return lambda: _subprocess.run([_sys.executable, '-c', 'import utils'],
+                                   check=True)
+
+
+@_register_storage('storage.get_countries_report')
+def _get_countries_report(utils):
+    return lambda: _new_storage(utils).get_countries_report()
+
+
+@_register_storage('storage.get_countries_report_by_column')
+def _get_countries_report_by_column(utils):
+    return lambda: _new_storage(utils).get_countries_report_by_column(
+        'Confirmed_Change')
+
+
+@_register_storage('storage.get_regions_report')
+def _get_regions_report(utils):
+    country = _get_country_with_regions(utils)
+    return lambda: _new_storage(utils).get_regions_report(country)
+
+
+@_register_storage('storage.get_regions_report_by_column')
+def _get_regions_report_by_column(utils):
+    country = _get_country_with_regions(utils)
+    return lambda: _new_storage(utils).get_regions_report_by_column(
+        country, 'Confirmed_Change')
+
+
+@_register_storage('storage.iter_countries_report')
+def _iter_countries_report(utils):
+    return lambda: sum(len(df) for _, df in _new_storage(utils).iter_countries_report())
+
+
+@_register_storage('storage.iter_regions_report')
+def _iter_regions_report(utils):
+    country = _get_country_with_regions(utils)
+    return lambda: sum(
+        len(df) for _, df in _new_storage(utils).iter_regions_report(country))
+
+
+@_register_storage('storage.get_aggregates')
+def _get_aggregates(utils):
+    return lambda: _new_storage(utils).get_aggregates('SMA_7')
+
+
+@_register_storage('storage.top_k')
+def _top_k(utils):
+    return lambda: _new_storage(utils).top_k('Confirmed_Change', utils.last_day)
+
+
+@_register_storage('storage.get_rollups')
+def _get_rollups(utils):
+    return lambda: _new_storage(utils).get_rollups()
+
+
+@_register('data.per_capita')
+def _per_capita(utils):
+    df = utils.storage.get_countries_report_by_column('Confirmed')
+    return lambda: df.apply(lambda values: utils.data.per_capita(values, values.name))
+
+
+@_register('data.per_capita_by_name')
+def _per_capita_by_name(utils):
+    df = utils.storage.get_countries_report()
+    return lambda: utils.data.per_capita_by_name(df)
+
+
+@_register('data.per_week')
+def _per_week(utils):
+    df = utils.storage.get_countries_report_by_column('Confirmed_Change')
+    return lambda: utils.data.per_week(df)
+
+
+@_register('data.normalize')
+def _normalize(utils):
+    df = utils.storage.get_countries_report_by_column('Confirmed_Change')
+    return lambda: df.apply(utils.data.normalize)
+
+
+@_register('data.set_baseline')
+def _set_baseline(utils):
+    df = utils.storage.get_countries_report_by_column('Confirmed')
+    baseline = ((_generator.get_country_name(0), utils.last_day), 100)
+    return lambda: utils.data.set_baseline(df, baseline)
+
+
+@_register('data.augment')
+def _augment(utils):
+    df = utils.storage.get_countries_report()
+    return lambda: utils.data.augment(df, ['Confirmed', 'Confirmed_Change'])
+
+
+@_register('plot.report')
+def _plot_report(utils):
+    country = _get_country_with_regions(utils)
+    df = utils.storage.get_country_report(country)
+    fig = utils.plot._create_report_figure((24, 24))
+
+    def run():
+        fig.clear()
+        utils.plot.report(fig, df, country)
+        fig.canvas.draw()
+
+    return run
+
+
+@_register('maps.render_frame', requires=('shapely', ))
+def _maps_render_frame(utils):
+    from matplotlib import colors
+    from shapely import geometry
+    from utils import _maps
+
+    # Shapes are circles on a grid, one per country.
+    countries = utils.storage.get_countries()
+    columns = max(1, int(len(countries)**0.5))
+    shape_df = _pd.DataFrame({
+        'ADMIN': countries,
+        'geometry': [
+            geometry.Point(idx % columns, idx // columns).buffer(0.45, 64)
+            for idx in range(len(countries))
+        ]
+    })
+
+    renderer = _maps._MapRenderer(shape_df)
+    renderer.set_variant(
+        utils.storage.get_countries_report(), 'Confirmed_Change',
+        colors.LinearSegmentedColormap.from_list('', ['green', 'red']),
+        colors.LogNorm(1, 10**4))
+    day = utils.last_day
+
+    def run():
+        renderer.render(day, str(day.date()))
+        return renderer.get_image()
+
+    return run
+
+
+def get_benchmarks() -> _types.List[str]:
+    ''' Returns names of all benchmarks. '''
+    return list(_benchmarks)
+
+
+def _get_peak_rss_mb() -> _types.Optional[float]:
+    if _resource is None:
+        return None
+
+    # Benchmarks which start processes are measured by the largest of them.
+    peak = max(_resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss,
+               _resource.getrusage(_resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, and macOS reports bytes.
+    return peak / (1024 * 1024 if _sys.platform == 'darwin' else 1024)
+
+
+def run_benchmark(name: str, root: str, repeat: int = 5) -> dict:
+    '''
+    Runs the benchmark in the current process. It should be a new process for every benchmark,
+    so peak RSS is measured for this benchmark only.
+
+    Args:
+        name(str): The name of the benchmark.
+        root(str): The generated reports tree, it should be in REPORTS_DATA_ROOT already.
+        repeat(int): The number of measured runs.
+
+    Returns:
+        Dictionary with 'status' ('ok' or 'skipped'), and for measured benchmarks 'wall_s' (the median time of runs),
+        'min_s', 'max_s', 'repeat' and 'peak_rss_mb' (the peak resident set size of the process).
+    '''
+
+    benchmark = _benchmarks[name]
+
+    for module in benchmark.requires:
+        try:
+            _importlib.import_module(module)
+        except ImportError:
+            return dict(status='skipped', reason=f"'{module}' is not installed")
+
+    cache_root = _os.path.join(root, 'reports', '.cache')
+    if benchmark.cache == 'cold':
+        _shutil.rmtree(cache_root, ignore_errors=True)
+
+    import utils
+    run = benchmark.setup(utils)
+
+    if benchmark.cache == 'warm':
+        # The first run builds the reports cache, and it's not measured.
+        run()
+
+    times = list()
+    for _ in range(repeat):
+        if benchmark.cache == 'cold':
+            _shutil.rmtree(cache_root, ignore_errors=True)
+
+        _gc.collect()
+        start = _time.perf_counter()
+        run()
+        times.append(_time.perf_counter() - start)
+
+    times.sort()
+    return dict(status='ok',
+                wall_s=times[len(times) // 2],
+                min_s=times[0],
+                max_s=times[-1],
+                repeat=repeat,
+                peak_rss_mb=_get_peak_rss_mb())
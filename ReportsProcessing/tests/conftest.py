@@ -0,0 +1,76 @@
+import os as _os
+import shutil as _shutil
+import sys as _sys
+import pandas as _pd
+import pytest as _pytest
+
+# Tests are run from the ReportsProcessing folder or the repository root, utils and benchmarks are imported from the folder.
+_sys.path.insert(0, _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__))))
+
+from benchmarks import _generator  # noqa: E402
+from utils import _cache, _path  # noqa: E402
+
+COUNTRIES = 12
+REGIONS = 6
+DAYS = 120
+
+
+@_pytest.fixture(scope='session')
+def reports_tree(tmp_path_factory) -> str:
+    ''' Generates a small synthetic reports tree once, tests get copies of it. '''
+
+    root = str(tmp_path_factory.mktemp('reports_tree'))
+    _generator.generate_reports_tree(root,
+                                     countries=COUNTRIES,
+                                     regions=REGIONS,
+                                     days=DAYS,
+                                     countries_with_regions=2)
+    return root
+
+
+@_pytest.fixture
+def data_root(reports_tree, tmp_path, monkeypatch) -> str:
+    ''' Returns a copy of the reports tree, which is used as REPORTS_DATA_ROOT by the test, so it can change reports. '''
+
+    root = str(tmp_path / 'data')
+    _shutil.copytree(reports_tree, root)
+    monkeypatch.setenv('REPORTS_DATA_ROOT', root)
+    return root
+
+
+@_pytest.fixture
+def paths(data_root):
+    ''' Returns the path helper of the test reports tree. '''
+
+    return _path.__PathHelper()
+
+
+def rewrite_report(filepath: str, drop_rows: int):
+    '''
+    Rewrites the report in place without its last rows, so the folder modification time stays the same.
+    The modification time of the file is moved forward, since the rewrite could happen within the timestamp resolution.
+    '''
+
+    with open(filepath, 'rb') as report_file:
+        lines = report_file.read().splitlines(keepends=True)
+
+    stat = _os.stat(filepath)
+    with open(filepath, 'wb') as report_file:
+        report_file.writelines(lines[:len(lines) - drop_rows])
+    _os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def read_reports(paths, storage, country_name: str = None) -> _pd.DataFrame:
+    ''' Reads countries or the country regions reports as is, with missing values, like the panel keeps them. '''
+
+    if country_name:
+        names = storage.get_country_regions(country_name)
+        filepaths = [paths.get_region_report_path(country_name, name) for name in names]
+    else:
+        names = storage.get_countries()
+        filepaths = [paths.get_country_report_path(name) for name in names]
+
+    return _pd.concat([
+        _cache._read_report_csv(filepath).assign(Name=name)
+        for name, filepath in zip(names, filepaths)
+    ], ignore_index=True)
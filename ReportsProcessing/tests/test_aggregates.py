@@ -0,0 +1,42 @@
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _storage
+
+from conftest import read_reports
+
+
+def _assert_aggregates_equal(actual_df: _pd.DataFrame, expected_df: _pd.DataFrame):
+    def sort(df: _pd.DataFrame) -> _pd.DataFrame:
+        return df.sort_values(['Name', 'Date'], kind='stable').reset_index(drop=True)
+
+    _pd.testing.assert_frame_equal(sort(actual_df), sort(expected_df[actual_df.columns]))
+
+
+@_pytest.mark.parametrize('country_name', [None, 'Country 001'])
+@_pytest.mark.parametrize('window', [3, 7])
+def test_moving_averages_are_equal_to_rolling_means(paths, country_name, window):
+    storage = _storage._Storage(paths)
+    reports_df = read_reports(paths, storage, country_name)
+    metrics = [column for column in reports_df.columns if column not in ('Date', 'Name')]
+
+    expected_df = reports_df.copy()
+    expected_df[metrics] = reports_df.groupby('Name')[metrics].rolling(window).mean().droplevel(0)
+
+    _assert_aggregates_equal(storage.get_aggregates(f'SMA_{window}', country_name), expected_df)
+
+
+@_pytest.mark.parametrize('country_name', [None, 'Country 001'])
+@_pytest.mark.parametrize('transform, options', [('W-MON', dict(label='left', closed='left')), ('M', dict())])
+def test_resampled_sums_are_equal_to_resample(paths, country_name, transform, options):
+    storage = _storage._Storage(paths)
+    reports_df = read_reports(paths, storage, country_name)
+
+    expected_df = _pd.concat([
+        report_df.drop(columns='Name').set_index('Date').resample(transform, **options).sum()
+        .reset_index().assign(Name=name)
+        for name, report_df in reports_df.groupby('Name')
+    ])
+
+    _assert_aggregates_equal(storage.get_aggregates(transform, country_name), expected_df)
+
@@ -0,0 +1,97 @@
+import os as _os
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _cache, _storage
+
+from conftest import rewrite_report
+
+
+def _change_line(filepath: str, line_number: int):
+    ''' Replaces the value of 'Confirmed' in the line of the report file with a larger one. '''
+
+    with open(filepath, 'r') as report_file:
+        lines = report_file.read().splitlines(keepends=True)
+
+    values = lines[line_number].split(',')
+    values[1] = str(int(values[1]) + 1000)
+    lines[line_number] = ','.join(values)
+
+    stat = _os.stat(filepath)
+    with open(filepath, 'w') as report_file:
+        report_file.writelines(lines)
+    _os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def _append_lines(filepath: str, source_path: str, count: int):
+    ''' Appends the last lines of another report, so the report is extended like a new day was added. '''
+
+    with open(source_path, 'rb') as source_file:
+        lines = source_file.read().splitlines(keepends=True)
+
+    with open(filepath, 'ab') as report_file:
+        report_file.writelines(lines[-count:])
+
+
+def test_cache_is_updated_after_rewrite_in_place(paths):
+    filepath = paths.get_country_report_path('Country 003')
+    cache = _cache._ReportsCache(paths)
+    cache.read(filepath)
+
+    rewrite_report(filepath, 5)
+    _pd.testing.assert_frame_equal(cache.read(filepath), _cache._read_report_csv(filepath))
+
+    _change_line(filepath, 50)
+    _pd.testing.assert_frame_equal(cache.read(filepath), _cache._read_report_csv(filepath))
+
+    _append_lines(filepath, paths.get_country_report_path('Country 004'), 3)
+    _pd.testing.assert_frame_equal(cache.read(filepath), _cache._read_report_csv(filepath))
+
+    # Columns and dates are selected from the updated cache.
+    start_date = _pd.Timestamp('2020-04-01')
+    _pd.testing.assert_frame_equal(
+        cache.read(filepath, ['Rt'], start_date),
+        _cache._read_report_csv(filepath, columns=['Rt'], start_date=start_date))
+
+
+def test_panel_is_updated_after_rewrite_in_place(paths):
+    storage = _storage._Storage(paths)
+    countries_df = storage.get_countries_report()
+    assert storage.get_changed_since() is not None
+
+    filepath = paths.get_country_report_path('Country 005')
+    rewrite_report(filepath, 5)
+    _change_line(filepath, 100)
+
+    report_df = _cache._read_report_csv(filepath).fillna(0)
+    changed_date = report_df['Date'].iloc[99]
+
+    updated_df = storage.get_countries_report()
+    _pd.testing.assert_frame_equal(
+        updated_df[updated_df['Name'] == 'Country 005'].drop(columns='Name'),
+        report_df)
+    _pd.testing.assert_frame_equal(
+        updated_df[updated_df['Name'] != 'Country 005'],
+        countries_df[countries_df['Name'] != 'Country 005'])
+    assert storage.get_changed_since() == changed_date
+
+    _pd.testing.assert_frame_equal(
+        updated_df, _storage._Storage(paths, use_cache=False).get_countries_report())
+
+
+def test_failed_writes_dont_leave_files(tmp_path):
+    filepath = str(tmp_path / 'cache.bin')
+    _cache._write_atomically(filepath, 'wb', lambda cache_file: cache_file.write(b'first'))
+
+    def write(cache_file):
+        cache_file.write(b'second')
+        raise OSError('No space left on device')
+
+    # Errors are ignored for caches, and raised when they are not ignored.
+    _cache._write_atomically(filepath, 'wb', write)
+    with _pytest.raises(OSError):
+        _cache._write_atomically(filepath, 'wb', write, ignore_errors=False)
+
+    assert _os.listdir(tmp_path) == ['cache.bin']
+    with open(filepath, 'rb') as cache_file:
+        assert cache_file.read() == b'first'
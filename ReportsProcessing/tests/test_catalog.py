@@ -0,0 +1,32 @@
+from utils import _catalog
+
+from conftest import COUNTRIES, DAYS, REGIONS, rewrite_report
+
+
+def test_catalog_lists_reports(paths):
+    catalog = _catalog._Catalog(paths)
+
+    assert len(catalog.get_countries()) == COUNTRIES
+    assert catalog.get_country_regions('Country 000') == [
+        f'Region {idx:03d}' for idx in range(REGIONS)
+    ]
+    assert catalog.get_country_regions('Country 005') == []
+    assert len(catalog.get_daily_dates()) == DAYS
+
+
+def test_report_info_is_updated_after_rewrite_in_place(paths):
+    catalog = _catalog._Catalog(paths)
+    info = catalog.get_report_info('Country 005')
+    region_info = catalog.get_report_info('Country 001', 'Region 002')
+
+    rewrite_report(paths.get_country_report_path('Country 005'), 5)
+    rewrite_report(paths.get_region_report_path('Country 001', 'Region 002'), 1)
+
+    new_info = catalog.get_report_info('Country 005')
+    assert new_info['rows'] == info['rows'] - 5
+    assert new_info['last_date'] < info['last_date']
+    assert new_info['size'] < info['size']
+    assert catalog.get_report_info('Country 001', 'Region 002')['rows'] == region_info['rows'] - 1
+
+    # The updated information is saved, so a new catalog doesn't scan reports again.
+    assert _catalog._Catalog(paths).get_report_info('Country 005') == new_info
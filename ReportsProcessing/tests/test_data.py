@@ -0,0 +1,64 @@
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _data, _entities, _storage
+
+
+@_pytest.fixture
+def storage(paths):
+    return _storage._Storage(paths)
+
+
+@_pytest.fixture
+def id_storage(paths):
+    storage = _storage._Storage(paths)
+    storage.configure_ids(_entities._EntityRegistry(paths))
+    return storage
+
+
+def test_ids_are_not_converted_per_capita(storage, id_storage):
+    countries_df = id_storage.get_countries_report()
+    per_capita_df = _data._DataHelper(id_storage).per_capita_by_name(countries_df, per=1000)
+
+    _pd.testing.assert_series_equal(per_capita_df['Id'], countries_df['Id'])
+    _pd.testing.assert_frame_equal(
+        per_capita_df.drop(columns='Id'),
+        _data._DataHelper(storage).per_capita_by_name(storage.get_countries_report(), per=1000))
+
+
+def test_ids_are_not_summed_by_date(storage, id_storage):
+    total_df = _data._DataHelper.sum_by_date(id_storage.iter_countries_report())
+
+    assert 'Id' not in total_df.columns
+    _pd.testing.assert_frame_equal(total_df, _data._DataHelper.sum_by_date(storage.iter_countries_report()))
+    _pd.testing.assert_frame_equal(
+        total_df,
+        storage.get_countries_report().drop(columns='Name').groupby('Date').sum())
+
+
+def test_augmented_averages_are_equal_to_aggregates(storage):
+    helper = _data._DataHelper(storage)
+    countries_df = storage.get_countries_report().reset_index(drop=True)
+    columns = ['Confirmed_Change', 'Rt']
+    windows = (3, 7)
+
+    augmented_df = helper.augment(countries_df, columns, windows, per_values=(), normalize=False)
+    for window in windows:
+        expected_df = countries_df.groupby('Name')[columns].rolling(window).mean().droplevel(0)
+        _pd.testing.assert_frame_equal(
+            augmented_df[[f'{column}_SMA_{window}' for column in columns]].set_axis(columns, axis=1),
+            expected_df.loc[countries_df.index])
+
+    # Missing values of reports are zeros in long-form reports and NaN in aggregates, so they are compared without them.
+    _pd.testing.assert_frame_equal(
+        helper.augment(countries_df, columns[:1], windows, per_values=(), normalize=False, aggregated=True),
+        helper.augment(countries_df, columns[:1], windows, per_values=(), normalize=False))
+
+    # Averages of changed rows are the same as of all rows.
+    since = countries_df['Date'].max() - _pd.Timedelta(days=10)
+    previous_df = helper.augment(countries_df[countries_df['Date'] < since], columns, windows,
+                                 per_values=(), normalize=False)
+    _pd.testing.assert_frame_equal(
+        helper.augment(countries_df, columns, windows, per_values=(), normalize=False,
+                       previous=previous_df, since=since),
+        augmented_df)
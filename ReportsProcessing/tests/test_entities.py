@@ -0,0 +1,85 @@
+import numpy as _np
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _entities, _storage
+
+
+def _assert_names_are_mapped_to_entities(registry: _entities._EntityRegistry, scheme: str):
+    ''' Checks that names of every entity in the scheme are mapped back to the entity. '''
+
+    entities_df = registry.entities[registry.entities[scheme].notna()]
+    countries = entities_df['Level'] == 'country'
+    groups = [(None, entities_df[countries])] + list(entities_df[~countries].groupby('Country'))
+    for country, group_df in groups:
+        _np.testing.assert_array_equal(
+            registry.get_ids(group_df[scheme], country, scheme), group_df.index.to_numpy(), err_msg=country)
+
+
+def test_names_are_mapped_to_distinct_ids(paths):
+    registry = _entities._EntityRegistry(paths)
+    storage = _storage._Storage(paths)
+
+    countries = storage.get_countries()
+    report_ids = [registry.get_ids(countries)] + [
+        registry.get_ids(storage.get_country_regions(country), country) for country in countries
+    ]
+    report_ids = _np.concatenate(report_ids)
+    assert len(_np.unique(report_ids)) == len(report_ids)
+    # Names which are not in the registry don't take IDs of its entities.
+    assert not _np.isin(report_ids, registry.entities.index).any()
+
+    for scheme in ('reports', 'natural_earth', 'yandex'):
+        _assert_names_are_mapped_to_entities(registry, scheme)
+
+    yandex_names = _pd.read_csv(paths.get_misc_data_path('Russian_Regions.csv'))['Russian_Yandex']
+    yandex_ids = registry.get_ids(yandex_names, 'Russia', 'yandex')
+    assert len(_np.unique(yandex_ids)) == len(yandex_names)
+    assert _np.isin(yandex_ids, registry.entities.index).all()
+
+
+def test_derived_ids_are_derived_again_on_collision(paths, monkeypatch):
+    # All names get the same ID on the first attempt.
+    monkeypatch.setattr(_entities, '_get_fallback_id',
+                        lambda country, name, attempt=0: _entities._FALLBACK_ID_BASE + attempt)
+    registry = _entities._EntityRegistry(paths)
+
+    assert (registry.entities['Level'] == 'region').sum() > 1
+    for scheme in ('reports', 'natural_earth', 'yandex'):
+        _assert_names_are_mapped_to_entities(registry, scheme)
+
+    assert registry.get_ids(['Country 000'])[0] not in registry.entities.index
+
+
+def test_duplicated_lookup_ids_are_rejected(paths, tmp_path, monkeypatch):
+    _pd.DataFrame({
+        'UID': [4, 4],
+        'iso2': ['AF', 'AL'],
+        'iso3': ['AFG', 'ALB'],
+        'Admin2': ['', ''],
+        'Province_State': ['', ''],
+        'Country_Region': ['Afghanistan', 'Albania']
+    }).to_csv(tmp_path / 'ISO_LookUp.csv', index=False)
+    monkeypatch.setattr(paths, '_misc_root', str(tmp_path))
+
+    with _pytest.raises(ValueError, match='already used'):
+        _entities._EntityRegistry(paths)
+
+
+def test_rankings_have_ids(paths):
+    registry = _entities._EntityRegistry(paths)
+    storage = _storage._Storage(paths)
+    storage.configure_ids(registry)
+
+    ranking_df = storage.top_k_by_date('Confirmed', 5)
+    date = ranking_df['Date'].max()
+    top_df = storage.top_k('Confirmed', date, 5)
+
+    last_df = ranking_df[ranking_df['Date'] == date]
+    assert list(top_df.index) == list(last_df['Name'])
+    assert list(top_df['Confirmed']) == list(last_df['Confirmed'])
+    _np.testing.assert_array_equal(top_df['Id'], last_df['Id'])
+    _np.testing.assert_array_equal(top_df['Id'], registry.get_ids(top_df.index))
+
+    regions_df = storage.top_k('Confirmed', date, 3, 'region', 'Country 001')
+    _np.testing.assert_array_equal(regions_df['Id'], registry.get_ids(regions_df.index, 'Country 001'))
@@ -0,0 +1,23 @@
+import datetime as _datetime
+import pytest as _pytest
+
+import utils
+
+
+def test_formatters_dont_depend_on_process_locale():
+    date = _datetime.date(2020, 4, 1)
+
+    assert utils.get_formatter('en').format_date(date) == '01 April 2020'
+    assert utils.get_formatter('ru_RU.UTF-8').format_date(date) == '01 апреля 2020'
+    assert utils.get_formatter('ru').format_date(date, '%OB %Y') == 'апрель 2020'
+    assert utils.get_formatter('en').format_int(1234567) == '1,234,567'
+    assert utils.get_formatter('ru').format_int(1234567) == '1 234 567'
+
+    with _pytest.raises(ValueError):
+        utils.get_formatter('de')
+
+
+def test_setlocale_ctx_is_deprecated():
+    with _pytest.warns(DeprecationWarning, match='get_formatter'):
+        with utils.setlocale_ctx('C') as name:
+            assert name == 'C'
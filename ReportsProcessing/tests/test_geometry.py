@@ -0,0 +1,58 @@
+import os as _os
+import pytest as _pytest
+
+gpd = _pytest.importorskip('geopandas')
+geometry = _pytest.importorskip('shapely.geometry')
+
+from utils import _geometry  # noqa: E402
+
+
+def _write_source(filepath: str, width: float):
+    gpd.GeoDataFrame({'Name': ['first', 'second']},
+                     geometry=[geometry.box(0, 0, width, 1), geometry.box(width, 0, 2, 1)],
+                     crs='epsg:4326').to_file(filepath)
+
+
+@_pytest.fixture
+def calls(monkeypatch) -> dict:
+    ''' Counts hashes of the source and preparations of shapes. '''
+
+    calls = dict(hash=0, prepare=0)
+
+    def count(name, func):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(_geometry, '_hash_source', count('hash', _geometry._hash_source))
+    monkeypatch.setattr(_geometry, '_prepare', count('prepare', _geometry._prepare))
+    return calls
+
+
+def test_source_is_hashed_only_when_files_change(tmp_path, calls):
+    source_path = str(tmp_path / 'shapes.shp')
+    cache_path = str(tmp_path / 'cache' / 'shapes.npz')
+    _write_source(source_path, 1)
+
+    shape_df = _geometry._prepare_shapes(cache_path, source_path, 'epsg:4326')
+    assert calls == dict(hash=1, prepare=1)
+
+    cached_df = _geometry._prepare_shapes(cache_path, source_path, 'epsg:4326')
+    assert calls == dict(hash=1, prepare=1)
+    assert list(cached_df['Name']) == list(shape_df['Name'])
+    assert cached_df.geometry.equals(shape_df.geometry)
+
+    # Touched files are hashed once, and shapes are kept since the content is the same.
+    stat = _os.stat(source_path)
+    _os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _geometry._prepare_shapes(cache_path, source_path, 'epsg:4326')
+    assert calls == dict(hash=2, prepare=1)
+    _geometry._prepare_shapes(cache_path, source_path, 'epsg:4326')
+    assert calls == dict(hash=2, prepare=1)
+
+    _write_source(source_path, 1.5)
+    changed_df = _geometry._prepare_shapes(cache_path, source_path, 'epsg:4326')
+    assert calls == dict(hash=3, prepare=2)
+    assert changed_df.geometry.area.tolist() == [1.5, 0.5]
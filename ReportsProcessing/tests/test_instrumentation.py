@@ -0,0 +1,120 @@
+import os as _os
+import threading as _threading
+import zipfile as _zipfile
+import pandas as _pd
+
+from utils import _cache, _instrumentation, _storage
+
+from conftest import rewrite_report
+
+
+def test_cold_loads_are_recorded(paths):
+    storage = _storage._Storage(paths)
+    filepath = paths.get_country_report_path('Country 001')
+
+    with _instrumentation._record() as stats:
+        report_df = storage.get_country_report('Country 001')
+
+    _pd.testing.assert_frame_equal(
+        report_df, _cache._read_report_csv(filepath).set_index('Date'))
+
+    read_stats = stats.to_dict()['_Storage.get_country_report']
+    assert read_stats['calls'] == 1
+    assert read_stats['rows'] == len(report_df)
+    # The CSV file is read once, and parsing it from memory isn't counted as another read.
+    assert read_stats['files'] == 1
+    assert read_stats['bytes'] == _os.path.getsize(filepath)
+
+    rewrite_report(filepath, 3)
+    with _instrumentation._record() as stats:
+        report_df = storage.get_country_report('Country 001')
+
+    assert len(report_df) == read_stats['rows'] - 3
+    # The cached file is read to check it and to reuse its rows, and the changed report is read once.
+    read_stats = stats.to_dict()['_Storage.get_country_report']
+    assert read_stats['files'] == 3
+    assert read_stats['bytes'] > _os.path.getsize(filepath)
+
+
+def test_projected_loads_record_read_columns(paths):
+    filepath = paths.get_country_report_path('Country 002')
+    cache = _cache._ReportsCache(paths)
+    cache.read(filepath)
+
+    cache_path = paths.get_cache_path(filepath)
+    with _zipfile.ZipFile(cache_path) as cache_file:
+        sizes = {info.filename[:-len('.npy')]: info.file_size for info in cache_file.infolist()}
+
+    with _instrumentation._record() as stats:
+        cache.read(filepath, ['Confirmed'])
+
+    # The cached file is checked and only the date and requested columns are read from it.
+    read_stats = stats.to_dict()['_ReportsCache.read']
+    assert read_stats['files'] == 1
+    assert read_stats['bytes'] == sum(sizes[key] for key in (_cache._META_KEY, _cache._COLUMNS_KEY, 'Date', 'Confirmed'))
+    assert read_stats['bytes'] < _os.path.getsize(cache_path) / 2
+
+
+def test_bulk_cold_loads_are_recorded(paths):
+    storage = _storage._Storage(paths)
+    # The catalog reads all reports when it's created, so it's created before.
+    countries = storage.get_countries()
+
+    with _instrumentation._record() as stats:
+        countries_df = storage.get_countries_report()
+
+    countries_stats = stats.to_dict()['_Storage.get_countries_report']
+    assert countries_stats['rows'] == len(countries_df)
+    assert countries_stats['files'] == len(countries)
+    assert stats.to_dict()['_read_report_csv']['files'] == 0
+
+
+def test_reads_are_counted_for_methods_of_the_reading_thread(tmp_path):
+    filepaths = [str(tmp_path / 'first.csv'), str(tmp_path / 'second.csv')]
+    for filepath, size in zip(filepaths, (10, 1000)):
+        with open(filepath, 'wb') as data_file:
+            data_file.write(b'0' * size)
+
+    # Both methods are running when every file is read.
+    barrier = _threading.Barrier(2)
+
+    def read(filepath: str):
+        barrier.wait()
+        _instrumentation._record_file(filepath)
+        barrier.wait()
+
+    @_instrumentation._instrumented
+    def read_first(filepath: str):
+        read(filepath)
+
+    @_instrumentation._instrumented
+    def read_second(filepath: str):
+        read(filepath)
+
+    with _instrumentation._record() as stats:
+        threads = [
+            _threading.Thread(target=func, args=(filepath, ))
+            for func, filepath in zip((read_first, read_second), filepaths)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    read_bytes = {
+        name.rsplit('.', 1)[-1]: method_stats['bytes']
+        for name, method_stats in stats.to_dict().items()
+    }
+    assert read_bytes == dict(read_first=10, read_second=1000)
+
+
+def test_thread_pool_reads_are_counted_for_pool_methods(paths):
+    storage = _storage._Storage(paths, workers=3)
+    countries = storage.get_countries()
+
+    with _instrumentation._record() as stats:
+        storage.get_countries_report()
+
+    result = stats.to_dict()
+    assert result['_ReportsCache.read']['files'] == len(countries)
+    assert result['_Storage.get_countries_report']['files'] == 0
@@ -0,0 +1,129 @@
+import os as _os
+import numpy as _np
+import pandas as _pd
+import pytest as _pytest
+from matplotlib import colors as _colors
+
+from utils import _catalog, _dates, _outputs, _plot, _storage
+
+from conftest import rewrite_report
+
+
+def test_inputs_are_hashed_by_content():
+    report_df = _pd.DataFrame({'Date': _pd.date_range('2020-03-01', periods=3), 'Confirmed': [1, 2, 3]})
+    norm = _colors.LogNorm(1, 10**4)
+    key = _outputs._hash_inputs(report_df, norm, dict(title='Title', dpi=20))
+
+    assert key == _outputs._hash_inputs(report_df.copy(), _colors.LogNorm(1, 10**4), dict(dpi=20, title='Title'))
+    assert key != _outputs._hash_inputs(report_df.assign(Confirmed=[1, 2, 4]), norm, dict(title='Title', dpi=20))
+    assert key != _outputs._hash_inputs(report_df, _colors.LogNorm(1, 10**5), dict(title='Title', dpi=20))
+    assert _outputs._hash_inputs(_colors.LinearSegmentedColormap.from_list('', ['green', 'red'])) == \
+        _outputs._hash_inputs(_colors.LinearSegmentedColormap.from_list('other', ['green', 'red']))
+
+
+def test_outputs_cache_keeps_current_outputs(tmp_path):
+    manifest_path = str(tmp_path / 'outputs.json')
+    first_path = str(tmp_path / 'first.png')
+    second_path = str(tmp_path / 'second.png')
+
+    cache = _outputs._OutputsCache(manifest_path)
+    cache.update(first_path, 'first')
+    # Outputs are current only when their files exist.
+    assert not cache.is_current(first_path, 'first')
+    open(first_path, 'wb').close()
+    assert cache.is_current(first_path, 'first')
+    assert not cache.is_current(first_path, 'other')
+    cache.save()
+
+    # Entries of other instances of the same manifest are merged on save.
+    other = _outputs._OutputsCache(manifest_path)
+    other.update(second_path, 'second')
+    open(second_path, 'wb').close()
+    cache.update(first_path, None)
+    other.save()
+    cache.save()
+
+    reloaded = _outputs._OutputsCache(manifest_path)
+    assert not reloaded.is_current(first_path, 'first')
+    assert reloaded.is_current(second_path, 'second')
+
+
+def test_images_are_written_atomically(tmp_path):
+    filepath = str(tmp_path / 'frame.png')
+    image = _np.zeros((4, 6, 3), dtype=_np.uint8)
+    image[:, :3] = 255
+
+    _outputs._write_image(filepath, image)
+    _np.testing.assert_array_equal(_outputs._read_image(filepath), image)
+
+    # Errors of outputs are raised, the image is kept as is, and the temporary file is removed.
+    with _pytest.raises(OSError):
+        _outputs._write_image(filepath, _np.zeros((4, 6, 4), dtype=_np.uint8), 'JPEG')
+    assert _os.listdir(tmp_path) == ['frame.png']
+    _np.testing.assert_array_equal(_outputs._read_image(filepath), image)
+
+
+def test_dashboards_are_drawn_again_only_when_reports_change(paths, tmp_path):
+    storage = _storage._Storage(paths)
+    plot = _plot._PlotHelper(_dates._Dates(_catalog._Catalog(paths)), storage, paths)
+    output_root = str(tmp_path / 'dashboards')
+
+    def report_all() -> dict:
+        plot.report_all('Country 001', output_root, workers=1, figsize=(8, 8), dpi=20, use_cache=True)
+        return {name: _os.stat(_os.path.join(output_root, name)).st_mtime_ns for name in _os.listdir(output_root)}
+
+    first = report_all()
+    assert len(first) == 7
+
+    assert report_all() == first
+
+    rewrite_report(paths.get_region_report_path('Country 001', 'Region 002'), 3)
+    changed = report_all()
+    assert [name for name in first if changed[name] != first[name]] == ['Region 002.png']
+
+
+def test_frames_are_rendered_again_only_when_values_change(paths, tmp_path, monkeypatch):
+    gpd = _pytest.importorskip('geopandas')
+    geometry = _pytest.importorskip('shapely.geometry')
+    from utils import _maps
+
+    rendered = list()
+    render = _maps._MapRenderer.render
+
+    def count(self, day, day_text):
+        rendered.append(day)
+        return render(self, day, day_text)
+
+    monkeypatch.setattr(_maps._MapRenderer, 'render', count)
+
+    storage = _storage._Storage(paths)
+    countries = storage.get_countries()
+    shape_df = gpd.GeoDataFrame({'ADMIN': countries},
+                                geometry=[geometry.Point(idx % 4, idx // 4).buffer(0.45) for idx in range(len(countries))],
+                                crs='epsg:4326')
+    report_df = storage.get_countries_report()
+    days = list(_pd.DatetimeIndex(_np.unique(report_df['Date']))[-5:])
+
+    maps = _maps._MapsHelper(paths)
+    variant = _maps._MapVariant(
+        'Confirmed', 'shapes', 'report', days, dict(figsize=(4, 3), dpi=20),
+        dict(column_name='Confirmed',
+             cmap=_colors.LinearSegmentedColormap.from_list('', ['green', 'red']),
+             norm=_colors.LogNorm(1, 10**6)))
+
+    def render_frames(variant: _maps._MapVariant, report_df: _pd.DataFrame) -> list:
+        rendered.clear()
+        maps.render_frames([variant], dict(shapes=shape_df, report=report_df), str(tmp_path / 'frames'),
+                           workers=1, use_cache=True)
+        return sorted(rendered)
+
+    assert render_frames(variant, report_df) == days
+    assert render_frames(variant, report_df) == []
+
+    changed_df = report_df.copy()
+    changed_df.loc[changed_df['Date'] == days[-1], 'Confirmed'] += 1
+    assert render_frames(variant, changed_df) == days[-1:]
+
+    # All frames are rendered again when the color scale moves.
+    moved = variant._replace(variant_args=dict(variant.variant_args, norm=_colors.LogNorm(1, 10**7)))
+    assert render_frames(moved, changed_df) == days
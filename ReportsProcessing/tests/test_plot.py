@@ -0,0 +1,57 @@
+import os as _os
+import pickle as _pickle
+from concurrent import futures as _futures
+import pytest as _pytest
+
+from utils import _catalog, _dates, _plot, _storage
+
+
+@_pytest.fixture
+def storage(paths):
+    return _storage._Storage(paths)
+
+
+@_pytest.fixture
+def plot(paths, storage):
+    return _plot._PlotHelper(_dates._Dates(_catalog._Catalog(paths)), storage, paths)
+
+
+def test_report_adds_axes_to_figure(plot, storage):
+    fig = plot._create_report_figure((12, 12))
+    template_axes = list(fig.axes)
+    template_axes[0].plot([1, 2, 3])
+
+    plot.report(fig, storage.get_country_report('Country 000'), 'Country 000')
+
+    # Axes of the caller are kept as is, and the report is drawn on new ones.
+    assert len(fig.axes) == 12
+    assert fig.axes[:6] == template_axes
+    assert len(template_axes[0].lines) == 1
+    assert all(ax.has_data() for ax in fig.axes[6:])
+
+
+def test_report_all_draws_every_dashboard(plot, tmp_path):
+    output_root = str(tmp_path / 'dashboards')
+    timings = plot.report_all('Country 001', output_root, workers=1, figsize=(8, 8), dpi=20)
+
+    assert sorted(_os.listdir(output_root)) == sorted(
+        ['Country 001.png'] + [f'Region {idx:03d}.png' for idx in range(6)])
+    assert timings['save'] > 0
+
+
+def test_report_all_sends_only_reports_to_workers(plot, tmp_path, monkeypatch):
+    initargs = list()
+
+    class Executor(_futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            initargs.extend(kwargs['initargs'])
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(_plot._futures, 'ProcessPoolExecutor', Executor)
+
+    output_root = str(tmp_path / 'dashboards')
+    plot.report_all('Country 001', output_root, workers=2, figsize=(8, 8), dpi=20)
+
+    assert len(_os.listdir(output_root)) == 7
+    assert not any(isinstance(arg, (_plot._PlotHelper, _storage._Storage)) for arg in initargs)
+    assert b'_Storage' not in _pickle.dumps(initargs)
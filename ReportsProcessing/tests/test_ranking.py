@@ -0,0 +1,42 @@
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _storage
+
+from conftest import read_reports
+
+
+def _get_expected_top(report_df: _pd.DataFrame, column_name: str, date: _pd.Timestamp, k: int) -> _pd.Series:
+    ''' Returns the top of the date with pandas: entities with equal values keep the order of the report. '''
+
+    date_df = report_df[report_df['Date'] == date].dropna(subset=[column_name])
+    return date_df.sort_values(column_name, ascending=False, kind='stable').head(k).set_index('Name')[column_name]
+
+
+@_pytest.mark.parametrize('column_name, transform', [('Confirmed_Change', None), ('Rt', None), ('Deaths', 'SMA_7')])
+@_pytest.mark.parametrize('country_name', [None, 'Country 001'])
+def test_rankings_are_equal_to_sorted_values(paths, column_name, transform, country_name):
+    storage = _storage._Storage(paths)
+    level = 'region' if country_name else 'country'
+
+    if transform:
+        report_df = storage.get_aggregates(transform, country_name)
+    else:
+        # Missing values aren't ranked, so reports are read with them.
+        report_df = read_reports(paths, storage, country_name)
+
+    dates = sorted(report_df['Date'].unique())
+    for date in dates[::7] + dates[-1:]:
+        for k in (1, 5, 20):
+            _pd.testing.assert_series_equal(
+                storage.top_k(column_name, date, k, level, country_name, transform),
+                _get_expected_top(report_df, column_name, date, k),
+                check_index_type=False)
+
+    ranking_df = storage.top_k_by_date(column_name, 5, level, country_name, transform)
+    expected_df = _pd.concat([
+        _get_expected_top(report_df, column_name, date, 5).reset_index().assign(
+            Date=date, Rank=lambda df: df.index + 1)
+        for date in dates
+    ], ignore_index=True)
+    _pd.testing.assert_frame_equal(ranking_df, expected_df[ranking_df.columns], check_dtype=False)
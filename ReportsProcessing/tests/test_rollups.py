@@ -0,0 +1,45 @@
+import pandas as _pd
+
+from utils import _rollups, _storage
+
+from conftest import rewrite_report
+
+
+def _sum_by(report_df: _pd.DataFrame, names: _pd.Series, metrics: list) -> _pd.DataFrame:
+    ''' Sums reports by date and the group of the entity with pandas. '''
+
+    return report_df.assign(Name=report_df['Name'].map(names)).dropna(subset=['Name']).groupby(
+        ['Name', 'Date'])[metrics].sum().reset_index()
+
+
+def _assert_rollups_equal(actual_df: _pd.DataFrame, expected_df: _pd.DataFrame):
+    _pd.testing.assert_frame_equal(
+        actual_df.sort_values(['Name', 'Date']).reset_index(drop=True),
+        expected_df[actual_df.columns].sort_values(['Name', 'Date']).reset_index(drop=True))
+
+
+def test_rollups_are_equal_to_grouped_sums(paths):
+    storage = _storage._Storage(paths)
+    countries_df = storage.get_countries_report()
+    metrics = [column for column in countries_df.columns if column not in ('Date', 'Name', *_rollups._NON_ADDITIVE_METRICS)]
+    rollups = storage.get_rollups()
+
+    _assert_rollups_equal(rollups['world'],
+                          countries_df.groupby('Date')[metrics].sum().reset_index().assign(Name='World'))
+    _assert_rollups_equal(rollups['continent'], _sum_by(countries_df, storage.get_continents(), metrics))
+
+    regions_df = storage.get_regions_report('Country 001')
+    _assert_rollups_equal(storage.get_rollups('Country 001')['country'],
+                          regions_df.groupby('Date')[metrics].sum().reset_index().assign(Name='Country 001'))
+
+
+def test_rollups_are_updated_after_rewrite_in_place(paths):
+    storage = _storage._Storage(paths)
+    storage.get_rollups()
+
+    rewrite_report(paths.get_country_report_path('Country 003'), 10)
+
+    countries_df = _storage._Storage(paths).get_countries_report()
+    metrics = [column for column in countries_df.columns if column not in ('Date', 'Name', *_rollups._NON_ADDITIVE_METRICS)]
+    _assert_rollups_equal(_storage._Storage(paths).get_rollups()['world'],
+                          countries_df.groupby('Date')[metrics].sum().reset_index().assign(Name='World'))
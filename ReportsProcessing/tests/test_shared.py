@@ -0,0 +1,86 @@
+import gc as _gc
+import typing as _types
+from concurrent import futures as _futures
+from multiprocessing import shared_memory as _shared_memory
+import numpy as _np
+import pandas as _pd
+import pytest as _pytest
+
+import utils
+from utils import _shared, _storage
+
+
+def _attach_in_worker(data: dict) -> dict:
+    attached = utils.attach_data(data)
+    return {
+        key: value.copy() if isinstance(value, _pd.DataFrame) else value
+        for key, value in attached.items()
+    }
+
+
+def _sum_in_worker(data: dict) -> _types.Tuple[int, int]:
+    total = int(utils.attach_data(data)['countries']['Confirmed'].sum())
+    utils.detach_data(data)
+    return total, len(_shared._attached_blocks) + len(_shared._detached_blocks)
+
+
+@_pytest.fixture
+def data(paths) -> dict:
+    storage = _storage._Storage(paths)
+    compact = _storage._Storage(paths, compact=True)
+    wide_df = storage.get_countries_report_by_column('Confirmed')
+
+    return dict(countries=storage.get_countries_report(),
+                compact=compact.get_countries_report(),
+                wide=wide_df,
+                indexed=wide_df.reset_index().set_index(_pd.Index(
+                    _np.arange(len(wide_df)) * 2, name='Row')),
+                mixed=_pd.DataFrame({'Values': [1, 'one']}),
+                options=dict(start_date=_pd.Timestamp('2020-03-01')))
+
+
+def _assert_data_equal(expected: dict, actual: dict):
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        if isinstance(value, _pd.DataFrame):
+            # Columns of attached frames are grouped by dtypes.
+            _pd.testing.assert_frame_equal(actual[key][value.columns], value, obj=key)
+        else:
+            assert actual[key] == value
+
+
+def test_shared_data_is_attached_in_workers(data):
+    with utils.share_data(data) as shared:
+        assert isinstance(shared.data['countries'], _shared._SharedFrame)
+        # Frames which can't be shared, and other objects, are sent as is.
+        assert shared.data['mixed'] is data['mixed']
+        assert shared.data['options'] is data['options']
+
+        with _futures.ProcessPoolExecutor(max_workers=1) as executor:
+            _assert_data_equal(data, executor.submit(_attach_in_worker, shared.data).result())
+
+        attached = utils.attach_data(shared.data)
+        _assert_data_equal(data, attached)
+        assert not attached['countries']['Confirmed'].to_numpy().flags.writeable
+
+        block_name = shared.data['countries'].block
+
+    with _pytest.raises(FileNotFoundError):
+        _shared_memory.SharedMemory(name=block_name)
+
+    # Blocks attached by the publisher are detached with the context, and closed when their frames are released.
+    assert block_name not in _shared._attached_blocks
+    del attached
+    _gc.collect()
+    utils.detach_data(dict())
+    assert not _shared._attached_blocks and not _shared._detached_blocks
+
+
+def test_shared_data_is_detached_in_long_lived_workers(data):
+    with _futures.ProcessPoolExecutor(max_workers=1) as executor:
+        for _ in range(3):
+            with utils.share_data(data) as shared:
+                (total, blocks) = executor.submit(_sum_in_worker, shared.data).result()
+
+            assert total == data['countries']['Confirmed'].sum()
+            assert blocks == 0
@@ -0,0 +1,130 @@
+import os as _os
+import numpy as _np
+import pandas as _pd
+import pytest as _pytest
+
+from utils import _storage
+
+_START_DATE = _pd.Timestamp('2020-03-01')
+_END_DATE = _pd.Timestamp('2020-04-15')
+
+
+def _get_bulk_reports(storage) -> dict:
+    country = storage.get_countries()[0]
+    return dict(
+        countries=storage.get_countries_report(),
+        countries_range=storage.get_countries_report(
+            exclude=['Country 001'], start_date=_START_DATE, end_date=_END_DATE),
+        countries_columns=storage.get_countries_report(
+            include=['Country 003', 'Country 000'], columns=['Confirmed', 'Rt']),
+        countries_wide=storage.get_countries_report_by_column('Confirmed'),
+        countries_wide_range=storage.get_countries_report_by_column(
+            'Rt', start_date=_START_DATE, include=['Country 002', 'Country 005']),
+        countries_long=storage.get_countries_report_by_column('Deaths', wide_form=False),
+        regions=storage.get_regions_report(country),
+        regions_wide=storage.get_regions_report_by_column(
+            country, 'Confirmed_Change', start_date=_START_DATE))
+
+
+def _assert_reports_equal(expected: dict, actual: dict):
+    assert expected.keys() == actual.keys()
+    for key, expected_df in expected.items():
+        _pd.testing.assert_frame_equal(actual[key], expected_df, check_freq=False, obj=key)
+
+
+def test_panel_is_equal_to_reports_concat(paths):
+    expected = _get_bulk_reports(_storage._Storage(paths, use_cache=False))
+
+    _assert_reports_equal(expected, _get_bulk_reports(_storage._Storage(paths)))
+    # The second storage loads panels saved by the first one.
+    _assert_reports_equal(expected, _get_bulk_reports(_storage._Storage(paths)))
+
+
+@_pytest.mark.parametrize('use_processes', [False, True])
+def test_parallel_loader_is_equal_to_sequential(paths, use_processes):
+    expected = _get_bulk_reports(_storage._Storage(paths, use_cache=False))
+
+    storage = _storage._Storage(paths, use_cache=False, workers=3,
+                                use_processes=use_processes)
+    _assert_reports_equal(expected, _get_bulk_reports(storage))
+
+    storage = _storage._Storage(paths, workers=3, use_processes=use_processes)
+    _assert_reports_equal(expected, _get_bulk_reports(storage))
+
+
+def test_iterators_are_equal_to_bulk_reports(paths):
+    storage = _storage._Storage(paths, workers=2)
+    country = storage.get_countries()[0]
+
+    countries_df = _pd.concat(
+        [report_df for _, report_df in storage.iter_countries_report()])
+    _pd.testing.assert_frame_equal(countries_df, storage.get_countries_report())
+
+    regions_df = _pd.concat([
+        report_df for _, report_df in storage.iter_regions_report(
+            country, start_date=_START_DATE, columns=['Deaths'])
+    ])
+    _pd.testing.assert_frame_equal(
+        regions_df,
+        storage.get_regions_report(country, start_date=_START_DATE, columns=['Deaths']))
+
+
+def test_narrow_queries_dont_build_panel(paths):
+    storage = _storage._Storage(paths)
+    expected = _storage._Storage(paths, use_cache=False)
+
+    _pd.testing.assert_frame_equal(
+        storage.get_countries_report(include=['Country 004'], columns=['Deaths'],
+                                     start_date=_START_DATE),
+        expected.get_countries_report(include=['Country 004'], columns=['Deaths'],
+                                      start_date=_START_DATE))
+    _pd.testing.assert_frame_equal(
+        storage.get_countries_report_by_column('Rt', include=['Country 002']),
+        expected.get_countries_report_by_column('Rt', include=['Country 002']))
+
+    assert not _os.path.exists(paths.get_panel_path())
+    cached_reports = _os.listdir(_os.path.join(paths.get_cache_root(), 'countries'))
+    assert sorted(cached_reports) == ['Country 002', 'Country 004']
+
+    # Once the panel is in memory, narrow queries are served from it as well.
+    storage.get_countries_report()
+    assert _os.path.exists(paths.get_panel_path())
+    _pd.testing.assert_frame_equal(
+        storage.get_countries_report(include=['Country 004']),
+        expected.get_countries_report(include=['Country 004']))
+
+
+def test_compact_reports_keep_missing_ratios(paths):
+    storage = _storage._Storage(paths)
+    compact = _storage._Storage(paths, compact=True)
+
+    for parse_dates in (True, False):
+        report_df = storage.get_country_report('Country 001', parse_dates=parse_dates)
+        compact_df = compact.get_country_report('Country 001', parse_dates=parse_dates)
+
+        assert report_df['Rt'].isna().sum() > 0
+        assert report_df['Time_To_Resolve'].isna().sum() > 0
+        assert compact_df['Confirmed'].dtype == _np.int32
+        assert compact_df['Rt'].dtype == _np.float32
+        _pd.testing.assert_frame_equal(compact_df, report_df.astype(compact_df.dtypes))
+
+    region_df = storage.get_region_report('Country 000', 'Region 003', columns=['Deaths', 'Rt'])
+    compact_df = compact.get_region_report('Country 000', 'Region 003', columns=['Deaths', 'Rt'])
+    _pd.testing.assert_frame_equal(compact_df, region_df.astype(compact_df.dtypes))
+
+
+def test_compact_bulk_reports_are_equal_to_default_ones(paths):
+    storage = _storage._Storage(paths)
+    compact = _storage._Storage(paths, compact=True)
+
+    countries_df = storage.get_countries_report()
+    compact_df = compact.get_countries_report()
+    assert isinstance(compact_df['Name'].dtype, _pd.CategoricalDtype)
+    assert compact_df['Rt'].isna().sum() == 0
+    _pd.testing.assert_frame_equal(compact_df.astype({'Name': object}),
+                                   countries_df.astype(compact_df.dtypes).astype({'Name': object}))
+
+    wide_df = compact.get_countries_report_by_column('Time_To_Resolve')
+    assert (wide_df.dtypes == _np.float32).all()
+    _pd.testing.assert_frame_equal(
+        wide_df, storage.get_countries_report_by_column('Time_To_Resolve').astype(_np.float32))
@@ -1,19 +1,116 @@
-import pandas as _pd
+'''
+Helpers to access, process and plot COVID reports data.
+
+The package is loaded lazily: nothing heavy is imported and no reports are touched on 'import utils'.
+Dates (first_day, last_day, first_week, last_week, one_day, one_week) and helpers (storage, data, plot, maps, entities)
+are created on the first access, and matplotlib is imported only when plot or maps are used.
+
+Data is read from the 'data' folder next to the package, or from the folder in REPORTS_DATA_ROOT environment variable.
+
+Calls of storage, data and plot methods can be recorded with 'with utils.instrument() as stats:', or for the whole run
+with REPORTS_INSTRUMENTATION environment variable: '1' prints the summary table at exit, and a path to '.json' file writes it there.
+'''
+
+from __future__ import annotations
 
 import contextlib as _ctxlib
-from . import _dates, _path, _storage, _plot, _data
+import functools as _functools
+import typing as _types
+
+from . import _path
+
+if _types.TYPE_CHECKING:
+    import pandas as _pd
+
+_paths = _path.__PathHelper()
+_reports_catalog = None
+_dates_service = None
+
+
+def _get_reports_catalog():
+    global _reports_catalog
+
+    if _reports_catalog is None:
+        from . import _catalog
+        _reports_catalog = _catalog._Catalog(_paths)
+
+    return _reports_catalog
+
+
+def _get_dates_service():
+    global _dates_service
+
+    if _dates_service is None:
+        from . import _dates
+        _dates_service = _dates._Dates(_get_reports_catalog())
+
+    return _dates_service
+
+
+@_functools.lru_cache(maxsize=None)
+def _get_available_dates() -> dict:
+    (first, last) = _get_dates_service().get_available_dates()
+    return dict(first_day=first,
+                last_day=last,
+                first_week=first - _get_dates_service().to_Timedelta(
+                    first.weekday()),
+                last_week=last - _get_dates_service().to_Timedelta(
+                    last.weekday()))
+
+
+def _create_storage():
+    from . import _storage
+    return _storage._Storage(_paths, catalog=_get_reports_catalog())
 
-_dates_service = _dates._Dates(_path.__PathHelper())
 
-(first_day, last_day) = _dates_service.get_available_dates()
-first_week = first_day - _dates._Dates.to_Timedelta(first_day.weekday())
-last_week = last_day - _dates._Dates.to_Timedelta(last_day.weekday())
-one_day = _dates_service.to_Timedelta(1)
-one_week = _dates_service.to_Timedelta(7)
+def _create_data():
+    from . import _data
+    return _data._DataHelper(__getattr__('storage'))
 
-plot = _plot._PlotHelper(_dates_service)
-storage = _storage._Storage(_path.__PathHelper())
-data = _data._DataHelper(storage)
+
+def _create_plot():
+    from . import _plot
+    return _plot._PlotHelper(_get_dates_service(), __getattr__('storage'),
+                             _paths)
+
+
+def _create_entities():
+    from . import _entities
+    return _entities._EntityRegistry(_paths)
+
+
+def _create_maps():
+    from . import _maps
+    return _maps._MapsHelper(_paths)
+
+
+_lazy_attributes = {
+    'first_day': lambda: _get_available_dates()['first_day'],
+    'last_day': lambda: _get_available_dates()['last_day'],
+    'first_week': lambda: _get_available_dates()['first_week'],
+    'last_week': lambda: _get_available_dates()['last_week'],
+    'one_day': lambda: _get_dates_service().to_Timedelta(1),
+    'one_week': lambda: _get_dates_service().to_Timedelta(7),
+    'storage': _create_storage,
+    'data': _create_data,
+    'plot': _create_plot,
+    'maps': _create_maps,
+    'entities': _create_entities,
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    # Cache the value in module globals, so __getattr__ is not called for it anymore.
+    value = _lazy_attributes[name]()
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
 
 
 def str_to_datetime(val: str) -> _pd.Timestamp:
@@ -27,7 +124,7 @@ def str_to_datetime(val: str) -> _pd.Timestamp:
         Converted to pandas Timestamp date.
     '''
 
-    return _dates_service.to_Timestamp(val)
+    return _get_dates_service().to_Timestamp(val)
 
 
 def days_to_timedelta(days: int) -> _pd.Timedelta:
@@ -41,7 +138,67 @@ def days_to_timedelta(days: int) -> _pd.Timedelta:
         Converted to pandas Timedelta number of days.
     '''
 
-    return _dates_service.to_Timedelta(days)
+    return _get_dates_service().to_Timedelta(days)
+
+
+def instrument():
+    '''
+    Creates context in which calls of storage, data and plot methods are recorded: the number of calls, latencies,
+    files opened, bytes read and rows produced. Files and bytes are counted for methods running in the thread which reads them,
+    so reads made in threads of a pool are not counted for the method which started it. Calls made in worker processes aren't recorded.
+
+    Returns:
+        Context with statistics object, which could be exported with to_table(), to_json(filepath) or to_frame().
+    '''
+
+    from . import _instrumentation
+    return _instrumentation._record()
+
+
+def share_data(data: dict):
+    '''
+    Publishes DataFrames of the data dictionary in shared memory for worker processes. Numeric and date columns
+    are shared as is, and names are shared as codes, so workers attach views instead of getting copies of reports.
+
+    Args:
+        data(dict): Dictionary with DataFrames and other objects. Only plain DataFrames are published, other objects are kept as is.
+
+    Returns:
+        Context, which 'data' attribute is the dictionary to send to workers. Shared memory is released on exit of the context.
+    '''
+
+    from . import _shared
+    return _shared._SharedData(data)
+
+
+def attach_data(data: dict) -> dict:
+    '''
+    Attaches the data published by share_data in a worker process. Attached DataFrames are read-only,
+    and their columns are grouped by dtypes.
+
+    Args:
+        data(dict): The 'data' attribute of share_data context.
+
+    Returns:
+        Dictionary with DataFrames instead of their shared memory descriptors.
+    '''
+
+    from . import _shared
+    return _shared._attach_data(data)
+
+
+def detach_data(data: dict):
+    '''
+    Releases shared memory attached by attach_data, e.g. in a long-lived worker process which gets data of many share_data contexts.
+    Attached DataFrames shouldn't be used after it. Blocks of frames which are still referenced are closed by later calls,
+    after frames are released.
+
+    Args:
+        data(dict): The 'data' attribute of share_data context, which was attached.
+    '''
+
+    from . import _shared
+    _shared._detach_data(data)
 
 
 @_ctxlib.contextmanager
@@ -50,6 +207,8 @@ def setlocale_ctx(locale: str):
     Creates context with specifical locale. Could be useful to convert objects to string
     using regional settings (dates, numbers, etc.).
 
+    Deprecated: it changes the locale of the whole process, so it isn't safe to use with threads. Use get_formatter instead.
+
     Args:
         locale(str): represents a locale to set.
 
@@ -58,10 +217,32 @@ def setlocale_ctx(locale: str):
     '''
 
     import locale as loc
+    import warnings
+
+    warnings.warn(
+        "setlocale_ctx is deprecated, since it changes the process locale. Use utils.get_formatter instead.",
+        DeprecationWarning,
+        stacklevel=3)
 
     saved = loc.setlocale(loc.LC_ALL)
     yield loc.setlocale(loc.LC_ALL, locale)
     loc.setlocale(loc.LC_ALL, saved)
 
 
-del _dates, _path, _storage, _plot, _pd, _ctxlib, _data
\ No newline at end of file
+def get_formatter(locale: str = 'en'):
+    '''
+    Returns the formatter of dates, month names and integers for the locale. Unlike strftime with locale.setlocale,
+    it doesn't change the process locale, so it's safe to use from rendering threads.
+
+    Args:
+        locale(str): 'en' or 'ru', or a locale name like 'ru_RU'. Default is 'en'.
+
+    Returns:
+        Formatter with format_date(date, pattern), format_month(month, genitive) and format_int(number, separator) methods.
+    '''
+
+    from . import _formatting
+    return _formatting._get_formatter(locale)
+
+
+del _path, _ctxlib, _functools, _types
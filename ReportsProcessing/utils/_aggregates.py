@@ -0,0 +1,184 @@
+import typing as _types
+import numpy as _np
+
+from ._panel import _ReportsPanel
+
+_SMA_PREFIX = 'SMA_'
+_WEEKLY = 'W-MON'
+_MONTHLY = 'M'
+
+
+def _parse_transform(transform: str) -> _types.Tuple[str, int]:
+    '''
+    Returns a kind of transform ('SMA', 'W-MON' or 'M') and a window of moving average, which is 0 for resampling.
+    Raises ValueError if transform is not supported.
+    '''
+
+    if transform in (_WEEKLY, _MONTHLY):
+        return transform, 0
+
+    if transform.startswith(_SMA_PREFIX) and transform[len(_SMA_PREFIX):].isdigit():
+        window = int(transform[len(_SMA_PREFIX):])
+        if window > 0:
+            return 'SMA', window
+
+    raise ValueError(
+        f"Unsupported transform '{transform}', expected 'SMA_<window>', '{_WEEKLY}' or '{_MONTHLY}'"
+    )
+
+
+def _compute_moving_average(values: _np.ndarray,
+                            positions: _np.ndarray,
+                            window: int,
+                            rows: _np.ndarray = None) -> _np.ndarray:
+    '''
+    Computes simple moving averages over rows of values, where reports of entities are contiguous blocks of rows in order of dates.
+    Averages of the first window - 1 rows of every report, and of windows with NaN values, are NaN, like in pandas rolling(window).mean().
+
+    Args:
+        values(ndarray): Values as (rows × columns) array.
+        positions(ndarray): Positions of rows in reports of their entities.
+        window(int): The window of moving averages.
+        rows(ndarray): Rows to compute averages for. If not specified, then averages are computed for all rows.
+
+    Returns:
+        Float array of averages of all rows, or of the rows only.
+    '''
+
+    if rows is None:
+        sma = _np.full(values.shape, _np.nan)
+        if len(values) >= window:
+            sma[window - 1:] = _np.lib.stride_tricks.sliding_window_view(
+                values, window, axis=0).mean(axis=-1)
+        sma[positions < window - 1] = _np.nan
+        return sma
+
+    # Only trailing windows of the rows are averaged.
+    window_rows = rows[:, _np.newaxis] - _np.arange(window - 1, -1, -1)
+    sma = values[_np.maximum(window_rows, 0)].mean(axis=1)
+    sma[positions[rows] < window - 1] = _np.nan
+    return sma
+
+
+def _compute_sma(panel: _ReportsPanel, window: int) -> _ReportsPanel:
+    # Entity-major order of present values, so every entity is a contiguous block of its report rows.
+    entities_pos, dates_pos = _np.nonzero(panel.present.T)
+    values = panel.values[dates_pos, entities_pos]
+    starts = _np.flatnonzero(_np.r_[True, entities_pos[1:] != entities_pos[:-1]])
+    positions = _np.arange(len(entities_pos)) - _np.repeat(
+        starts, _np.diff(_np.r_[starts, len(entities_pos)]))
+
+    sma = _compute_moving_average(values, positions, window)
+
+    aggregate = _np.full_like(panel.values, _np.nan)
+    aggregate[dates_pos, entities_pos] = sma
+
+    return _ReportsPanel(panel.dates, panel.entities, panel.metrics,
+                         [_np.dtype(float).str] * len(panel.metrics),
+                         aggregate, panel.present.copy(), fill_nan=False)
+
+
+def _compute_resampled(panel: _ReportsPanel, transform: str) -> _ReportsPanel:
+    if transform == _WEEKLY:
+        days = panel.dates.astype('datetime64[D]')
+        # 1969-12-29 is Monday, so weeks are counted from it.
+        labels = days - (days - _np.datetime64('1969-12-29')).astype(
+            _np.int64) % 7
+    else:
+        months = panel.dates.astype('datetime64[M]')
+        labels = (months + 1).astype('datetime64[D]') - 1
+
+    (dates, starts) = _np.unique(labels, return_index=True)
+
+    values = _np.where(panel.present[:, :, _np.newaxis],
+                       _np.nan_to_num(panel.values), 0)
+    present = panel.present.astype(_np.int64)
+
+    if len(dates):
+        values = _np.add.reduceat(values, starts, axis=0)
+        present = _np.add.reduceat(present, starts, axis=0) > 0
+    else:
+        values = values[:0]
+        present = present[:0] > 0
+
+    # Periods between the first and the last period of the entity report are kept even without days, like in pandas resample.
+    present = (_np.cumsum(present, axis=0) > 0) & (_np.cumsum(
+        present[::-1], axis=0)[::-1] > 0)
+
+    return _ReportsPanel(dates.astype(panel.dates.dtype), panel.entities,
+                         panel.metrics, panel.dtypes, values, present)
+
+
+def _compute_aggregate(panel: _ReportsPanel, transform: str) -> _ReportsPanel:
+    '''
+    Computes the aggregate of all entities and metrics of the panel for the transform in one vectorized pass.
+
+    Args:
+        panel(_ReportsPanel): Reports to aggregate.
+        transform(str): 'SMA_<window>' for simple moving average over rows of every entity report,
+            'W-MON' for weekly sums labeled by Monday (like utils.data.per_week), or 'M' for monthly sums labeled by the last day of month.
+
+    Returns:
+        A panel with the same entities and metrics. Moving averages keep NaN for first rows, sums keep dtypes of the metrics.
+    '''
+
+    (kind, window) = _parse_transform(transform)
+
+    if kind == 'SMA':
+        return _compute_sma(panel, window)
+
+    return _compute_resampled(panel, kind)
+
+
+class _AggregatesCache():
+    '''
+    Helper class to keep materialized aggregates of reports panels: moving averages, weekly and monthly sums.
+    Every aggregate is computed for all entities and metrics at once, when it's requested for the first time
+    after reports have changed. Aggregates are saved next to panels and remember sources of the panel they were computed from.
+    '''
+
+    def __init__(self, path):
+        self.__paths = path
+        self.__entries = dict()
+
+    def get(self, country_name: str, transform: str, panel: _ReportsPanel,
+            sources: _np.ndarray) -> _ReportsPanel:
+        '''
+        Returns the aggregate of the panel.
+
+        Args:
+            country_name(str): The name of the country if the panel keeps its regions reports, or None for countries reports.
+            transform(str): The transform, see _compute_aggregate.
+            panel(_ReportsPanel): The panel to aggregate.
+            sources(ndarray): Sizes and modification times of the source reports of the panel, it's a version of data.
+                If it's None, then the aggregate is computed and isn't cached.
+
+        Returns:
+            The aggregate as a panel. It's shared between calls and shouldn't be modified.
+        '''
+
+        _parse_transform(transform)
+
+        if sources is None:
+            return _compute_aggregate(panel, transform)
+
+        key = (country_name, transform)
+        entry = self.__entries.get(key)
+        if entry is not None and _np.array_equal(entry[0], sources):
+            return entry[1]
+
+        filepath = self.__paths.get_aggregate_path(transform, country_name)
+        (aggregate, aggregate_sources) = _ReportsPanel.load(
+            filepath, fill_nan=not transform.startswith(_SMA_PREFIX))
+
+        if aggregate is None or not _np.array_equal(aggregate_sources,
+                                                    sources):
+            aggregate = _compute_aggregate(panel, transform)
+            aggregate.save(filepath, sources)
+
+        self.__entries[key] = (sources, aggregate)
+        return aggregate
+
+    def clear(self):
+        ''' Removes aggregates from memory. Files are removed with the reports cache. '''
+        self.__entries.clear()
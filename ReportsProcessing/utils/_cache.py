@@ -0,0 +1,418 @@
+import contextlib as _ctxlib
+import io as _io
+import os as _os
+import tempfile as _tempfile
+import typing as _types
+import zlib as _zlib
+from collections import OrderedDict as _OrderedDict
+import numpy as _np
+import pandas as _pd
+
+from ._instrumentation import _instrumented, _record_arrays, _record_file, _record_read
+
+_COLUMNS_TYPES = {
+    'Confirmed': int,
+    'Deaths': int,
+    'Recovered': int,
+    'Confirmed_Change': int,
+    'Deaths_Change': int,
+    'Recovered_Change': int,
+    'Rt': float,
+    'Time_To_Resolve': float
+}
+
+# Cumulative counters and their daily changes fit into int32, and ratios don't need double precision.
+_COMPACT_TYPES = {
+    'Confirmed': _np.int32,
+    'Active': _np.int32,
+    'Recovered': _np.int32,
+    'Deaths': _np.int32,
+    'Confirmed_Change': _np.int32,
+    'Active_Change': _np.int32,
+    'Recovered_Change': _np.int32,
+    'Deaths_Change': _np.int32,
+    'Rt': _np.float32,
+    'Time_To_Resolve': _np.float32
+}
+
+_META_KEY = '__meta__'
+_COLUMNS_KEY = '__columns__'
+_LINES_KEY = '__lines__'
+
+
+def _get_dates_mask(dates: _np.ndarray, start_date: _pd.Timestamp,
+                    end_date: _pd.Timestamp) -> _np.ndarray:
+    ''' Returns a mask of dates in the closed range [start_date, end_date], or None if range is not specified. '''
+
+    if start_date is None and end_date is None:
+        return None
+
+    mask = _np.ones(len(dates), dtype=bool)
+
+    if start_date is not None:
+        mask &= dates >= _np.datetime64(_pd.Timestamp(start_date))
+
+    if end_date is not None:
+        mask &= dates <= _np.datetime64(_pd.Timestamp(end_date))
+
+    return mask
+
+
+def _get_columns(columns: _types.Optional[_types.List[str]],
+                 all_columns: _types.List[str]) -> _types.List[str]:
+    ''' Returns a list of columns to read: 'Date' followed by requested columns, or all columns. '''
+
+    if columns is None:
+        return list(all_columns)
+
+    return ['Date'] + [column for column in columns if column != 'Date']
+
+
+@_instrumented
+def _read_report_csv(filepath: _types.Union[str, _types.IO],
+                     parse_dates=True,
+                     columns: _types.List[str] = None,
+                     start_date: _pd.Timestamp = None,
+                     end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+    '''
+    Reads a report CSV file, or a buffer with its content, without any caching. Only requested columns are parsed.
+    Date range can be used only with parsed dates.
+    '''
+
+    usecols = None if columns is None else _get_columns(columns, [])
+    # Buffers are recorded by their readers, which know how many bytes were read.
+    if isinstance(filepath, (str, _os.PathLike)):
+        _record_file(filepath)
+
+    if not parse_dates:
+        if start_date is not None or end_date is not None:
+            raise ValueError("Date range requires parsed dates")
+
+        df = _pd.read_csv(filepath, dtype=_COLUMNS_TYPES, usecols=usecols)
+        return df if usecols is None else df[usecols]
+
+    df = _pd.read_csv(filepath,
+                      parse_dates=["Date"],
+                      dayfirst=True,
+                      dtype=_COLUMNS_TYPES,
+                      usecols=usecols)
+
+    return _filter_report(df, columns, start_date, end_date)
+
+
+def _filter_report(df: _pd.DataFrame,
+                   columns: _types.List[str] = None,
+                   start_date: _pd.Timestamp = None,
+                   end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+    ''' Selects columns and rows within the dates range from a report with parsed dates. '''
+
+    if columns is not None:
+        df = df[_get_columns(columns, df.columns)]
+
+    mask = _get_dates_mask(df['Date'].to_numpy(), start_date, end_date)
+
+    return df if mask is None else df.loc[mask]
+
+
+def _to_compact(df: _pd.DataFrame,
+                names: _types.List[str] = None) -> _pd.DataFrame:
+    '''
+    Converts a report to compact dtypes: int32 for counters, float32 for ratios,
+    and categorical 'Name' column with names as categories. NaN values of counters are replaced with '0',
+    since integers can't keep them, and ratios keep NaN values, since they mean the ratio isn't computable.
+    '''
+
+    counters = [
+        column for column in df.columns if column in _COMPACT_TYPES
+        and _np.issubdtype(_COMPACT_TYPES[column], _np.integer)
+    ]
+    if df[counters].isna().values.any():
+        df = df.fillna({column: 0 for column in counters})
+
+    df = df.astype(
+        {
+            column: _COMPACT_TYPES[column]
+            for column in df.columns if column in _COMPACT_TYPES
+        },
+        copy=False)
+
+    if 'Name' in df.columns and not isinstance(df['Name'].dtype,
+                                               _pd.CategoricalDtype):
+        df['Name'] = _pd.Categorical(df['Name'], categories=names)
+
+    return df
+
+
+def _write_atomically(filepath: str, mode: str,
+                      write: _types.Callable[[_types.IO], None],
+                      ignore_errors: bool = True):
+    '''
+    Writes a cache file with the write function. The file is written to a unique temporary file first and then moved,
+    so parallel readers never see partially written files. The temporary file is removed if the write fails.
+    OS errors are ignored by default, since caches are optional.
+    '''
+
+    temp_path = None
+    try:
+        folder = _os.path.dirname(filepath)
+        _os.makedirs(folder, exist_ok=True)
+        fd, temp_path = _tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with _os.fdopen(fd, mode) as temp_file:
+            write(temp_file)
+        _os.replace(temp_path, filepath)
+    except BaseException as error:
+        if temp_path is not None and _os.path.exists(temp_path):
+            _os.remove(temp_path)
+        if not (ignore_errors and isinstance(error, OSError)):
+            raise
+
+
+class _NpzReader():
+    ''' Gives arrays of an opened .npz file and remembers which of them have been read. '''
+
+    def __init__(self, data):
+        self.__data = data
+        self.files = data.files
+        self.read = set()
+
+    def __getitem__(self, key: str) -> _np.ndarray:
+        values = self.__data[key]
+        self.read.add(key)
+        return values
+
+
+@_ctxlib.contextmanager
+def _open_npz(filepath: str) -> _types.Iterator[_NpzReader]:
+    '''
+    Opens the .npz cache file for reading. Arrays are read on access, and bytes of the read arrays are recorded on exit,
+    so loads of a few columns aren't counted as reads of the whole file.
+    '''
+
+    with _np.load(filepath, allow_pickle=False) as data:
+        reader = _NpzReader(data)
+        try:
+            yield reader
+        finally:
+            _record_arrays(data, reader.read)
+
+
+def _save_npz(filepath: str, arrays: dict):
+    ''' Saves arrays to the .npz cache file. '''
+
+    _write_atomically(filepath, 'wb',
+                      lambda npz_file: _np.savez(npz_file, **arrays))
+
+
+class _ReportsCache():
+    '''
+    Helper class to keep parsed reports in a binary columnar format (.npz) next to the CSV tree.
+    Every cached file remembers the size and modification time of its source CSV file,
+    and it's updated automatically when the source changes.
+
+    The cache also keeps a checksum of every line of the source file. Reports are extended with new days
+    and only the last days are recalculated, so on update only lines starting from the first changed one
+    are parsed and appended to the cached rows.
+    '''
+
+    VERSION = 2
+
+    def __init__(self, path):
+        self.__paths = path
+
+    @_instrumented
+    def read(self,
+             filepath: str,
+             columns: _types.List[str] = None,
+             start_date: _pd.Timestamp = None,
+             end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+        '''
+        Returns a report with parsed dates as pandas DataFrame. Date is a regular column.
+        When the cache is valid, only requested columns and rows are loaded.
+
+        Args:
+            filepath(str): The path to the report CSV file.
+            columns(list(str)): The columns to load. If not specified, then all are loaded.
+            start_date(Timestamp): The date from which report should be started.
+            end_date(Timestamp): The date on which report should be finished (inclusive).
+
+        Returns:
+            DataFrame: a report, loaded from the cache if it's valid, or parsed from CSV otherwise.
+            Index is a row number in the report file.
+        '''
+
+        stat = _os.stat(filepath)
+        cache_path = self.__paths.get_cache_path(filepath)
+
+        df = _ReportsCache.__load(cache_path, stat, columns, start_date,
+                                  end_date)
+        if df is None:
+            df = _ReportsCache.__update(filepath, cache_path, stat)
+            df = _filter_report(df, columns, start_date, end_date)
+
+        return df
+
+    def clear(self):
+        ''' Removes all cached files. '''
+
+        import shutil
+
+        shutil.rmtree(self.__paths.get_cache_root(), ignore_errors=True)
+
+    @staticmethod
+    def __get_meta(stat: _os.stat_result) -> _np.ndarray:
+        return _np.array([_ReportsCache.VERSION, stat.st_mtime_ns, stat.st_size],
+                         dtype=_np.int64)
+
+    @staticmethod
+    def __load(cache_path: str, stat: _os.stat_result,
+               columns: _types.List[str], start_date: _pd.Timestamp,
+               end_date: _pd.Timestamp) -> _pd.DataFrame:
+        if not _os.path.exists(cache_path):
+            return None
+
+        try:
+            # Arrays in .npz are read on access, so only requested columns are loaded.
+            with _open_npz(cache_path) as data:
+                if not _np.array_equal(data[_META_KEY],
+                                       _ReportsCache.__get_meta(stat)):
+                    return None
+
+                columns = _get_columns(columns, data[_COLUMNS_KEY])
+                dates = data['Date']
+                mask = _get_dates_mask(dates, start_date, end_date)
+
+                if mask is None:
+                    return _pd.DataFrame(
+                        {column: data[column]
+                         for column in columns})
+
+                return _pd.DataFrame(
+                    {column: data[column][mask]
+                     for column in columns},
+                    index=_np.flatnonzero(mask))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def __load_all(cache_path: str) -> dict:
+        try:
+            with _open_npz(cache_path) as data:
+                if data[_META_KEY][0] != _ReportsCache.VERSION:
+                    return None
+
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def __update(filepath: str, cache_path: str,
+                 stat: _os.stat_result) -> _pd.DataFrame:
+        with open(filepath, 'rb') as report_file:
+            content = report_file.read()
+        _record_read(len(content))
+
+        # The first line is the header, blank lines are skipped by the parser as well.
+        lines = [line for line in content.splitlines() if line.strip()]
+        checksums = _np.array([_zlib.crc32(line) for line in lines],
+                              dtype=_np.uint32)
+
+        cached = _ReportsCache.__load_all(cache_path)
+        same_lines = 0
+        if cached is not None:
+            cached_checksums = cached[_LINES_KEY]
+            count = min(len(cached_checksums), len(checksums))
+            changed = _np.flatnonzero(
+                cached_checksums[:count] != checksums[:count])
+            same_lines = changed[0] if len(changed) else count
+
+        if same_lines == 0:
+            df = _read_report_csv(_io.BytesIO(content))
+        else:
+            head_df = _pd.DataFrame({
+                column: cached[column][:same_lines - 1]
+                for column in cached[_COLUMNS_KEY]
+            })
+            df = head_df
+            if same_lines < len(lines):
+                tail_df = _read_report_csv(
+                    _io.BytesIO(b'\n'.join([lines[0]] + lines[same_lines:])))
+                df = _pd.concat([head_df, tail_df], ignore_index=True)
+
+        _ReportsCache.__save(cache_path, stat, df, checksums)
+        return df
+
+    @staticmethod
+    def __save(cache_path: str, stat: _os.stat_result, df: _pd.DataFrame,
+               checksums: _np.ndarray):
+        arrays = {column: df[column].to_numpy() for column in df.columns}
+        arrays[_META_KEY] = _ReportsCache.__get_meta(stat)
+        arrays[_COLUMNS_KEY] = _np.array(df.columns, dtype=str)
+        arrays[_LINES_KEY] = checksums
+
+        _save_npz(cache_path, arrays)
+
+
+class _StatsCache():
+    '''
+    Helper class to keep parsed statistical information files in memory.
+    Keeps up to max_size most recently used files, every file is re-read when its size or modification time changes.
+    '''
+
+    def __init__(self, max_size: int = 64):
+        self.__max_size = max_size
+        self.__entries = _OrderedDict()
+
+    @_instrumented
+    def read(self, filepath: str) -> _types.Tuple[_pd.DataFrame, dict]:
+        '''
+        Returns statistical information for the file.
+
+        Args:
+            filepath(str): The path to the statistical information CSV file.
+
+        Returns:
+            A tuple of DataFrame sorted by the 'Name' index, and dictionary with population for every name.
+            Both objects are shared between calls and shouldn't be modified.
+        '''
+
+        stat = _os.stat(filepath)
+        meta = (stat.st_mtime_ns, stat.st_size)
+        entry = self.__entries.get(filepath)
+
+        if entry is None or entry[0] != meta:
+            _record_file(filepath)
+            stats_df = _pd.read_csv(filepath, index_col=["Name"]).sort_index()
+            population = stats_df['Population'].to_dict(
+            ) if 'Population' in stats_df else dict()
+            entry = (meta, stats_df, population)
+            self.__entries[filepath] = entry
+
+        self.__entries.move_to_end(filepath)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+        return entry[1], entry[2]
+
+    def clear(self):
+        ''' Removes all cached files. '''
+        self.__entries.clear()
+
+
+def _read_report(filepath: str,
+                 cache: _ReportsCache = None,
+                 columns: _types.List[str] = None,
+                 start_date: _pd.Timestamp = None,
+                 end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+    '''
+    Reads a report with parsed dates through the cache, if it's specified. Date is a regular column.
+    Only requested columns and rows within the dates range are returned.
+    It's a module level function, so it could be used with both thread and process pools.
+    '''
+
+    if cache:
+        return cache.read(filepath, columns, start_date, end_date)
+
+    return _read_report_csv(filepath,
+                            columns=columns,
+                            start_date=start_date,
+                            end_date=end_date)
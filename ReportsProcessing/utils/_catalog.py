@@ -0,0 +1,180 @@
+import json as _json
+import os as _os
+import typing as _types
+
+from ._cache import _write_atomically
+from ._instrumentation import _record_file
+
+ReportInfo = _types.Dict[str, _types.Union[int, str]]
+
+
+def _scan_report(filepath: str, stat: _os.stat_result) -> ReportInfo:
+    ''' Returns size, modification time, number of rows, and first and last dates (in ISO format) of a report file. '''
+
+    with open(filepath, 'rb') as report_file:
+        lines = report_file.read().splitlines()
+    _record_file(filepath)
+
+    rows = [line for line in lines[1:] if line.strip()]
+
+    def to_iso_date(line: bytes) -> str:
+        (day, month, year) = line.split(b',', 1)[0].decode().split('-')
+        return f'{year}-{month}-{day}'
+
+    return dict(size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                rows=len(rows),
+                first_date=to_iso_date(rows[0]) if rows else None,
+                last_date=to_iso_date(rows[-1]) if rows else None)
+
+
+class _Catalog():
+    '''
+    Persistent catalog of the reports tree: every country and region report with its file size,
+    modification time, number of rows and first/last dates, and all available daily reports dates.
+
+    The catalog is stored as a JSON file in the cache folder. Lists of countries, regions and dates check only
+    the modification time of the folder they're based on, and the catalog is refreshed when some folder has changed.
+    Refresh reuses information for files whose size and modification time are the same. Reports are rewritten in place,
+    which doesn't change their folder, so information about a report also checks the size and modification time of its file.
+    '''
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.__paths = path
+        self.__data = None
+
+    def get_countries(self) -> _types.List[str]:
+        ''' Returns sorted list of countries with reports. '''
+
+        return list(
+            self.__get_data(self.__paths.get_countries_root())['countries'])
+
+    def get_country_regions(self, country: str) -> _types.List[str]:
+        ''' Returns sorted list of the country regions with reports. Empty if the country has no regions reports. '''
+
+        data = self.__get_data(
+            self.__paths.get_country_regions_root(country))
+        return list(data['countries'][country]['regions'])
+
+    def get_report_info(self,
+                        country: str,
+                        region: str = None) -> ReportInfo:
+        '''
+        Returns information about the country or region report.
+
+        Args:
+            country(str): The name of the country.
+            region(str): The name of the country's region. This is optional argument.
+
+        Returns:
+            Dictionary with 'size', 'mtime_ns', 'rows', 'first_date' and 'last_date' (in ISO format) keys.
+        '''
+
+        if region:
+            data = self.__get_data(
+                self.__paths.get_country_regions_root(country))
+            (reports, key) = (data['countries'][country]['regions'], region)
+            filepath = self.__paths.get_region_report_path(country, region)
+        else:
+            data = self.__get_data(self.__paths.get_countries_root())
+            (reports, key) = (data['countries'][country], 'report')
+            filepath = self.__paths.get_country_report_path(country)
+
+        stat = _os.stat(filepath)
+        info = reports[key]
+        if info['size'] != stat.st_size or info['mtime_ns'] != stat.st_mtime_ns:
+            info = _scan_report(filepath, stat)
+            reports[key] = info
+            self.__save()
+
+        return dict(info)
+
+    def get_daily_dates(self) -> _types.List[str]:
+        ''' Returns sorted list of dates (in ISO format) for which daily reports are available. '''
+
+        return list(self.__get_data(self.__paths.get_daily_root())['daily'])
+
+    def refresh(self):
+        ''' Rescans the reports tree and saves the catalog. '''
+
+        previous = self.__data or self.__load() or dict(countries=dict())
+        folders = dict()
+        countries = dict()
+
+        def scan(filepath: str, previous_info: ReportInfo) -> ReportInfo:
+            stat = _os.stat(filepath)
+            if previous_info and previous_info['size'] == stat.st_size and previous_info[
+                    'mtime_ns'] == stat.st_mtime_ns:
+                return previous_info
+
+            return _scan_report(filepath, stat)
+
+        countries_root = self.__paths.get_countries_root()
+        folders[countries_root] = _Catalog.__get_mtime(countries_root)
+
+        for country in sorted(self.__paths.get_countries_reports_paths()):
+            previous_country = previous['countries'].get(country, dict())
+            regions = dict()
+
+            regions_root = self.__paths.get_country_regions_root(country)
+            folders[regions_root] = _Catalog.__get_mtime(regions_root)
+
+            if folders[regions_root] is not None:
+                for file_name in sorted(
+                        self.__paths.get_country_regions_reports_paths(
+                            country)):
+                    region = _os.path.splitext(file_name)[0]
+                    regions[region] = scan(
+                        _os.path.join(regions_root, file_name),
+                        previous_country.get('regions', dict()).get(region))
+
+            countries[country] = dict(report=scan(
+                self.__paths.get_country_report_path(country),
+                previous_country.get('report')),
+                                      regions=regions)
+
+        daily_root = self.__paths.get_daily_root()
+        folders[daily_root] = _Catalog.__get_mtime(daily_root)
+
+        self.__data = dict(version=_Catalog.VERSION,
+                           folders=folders,
+                           countries=countries,
+                           daily=sorted(
+                               _os.path.splitext(file_name)[0]
+                               for file_name in
+                               self.__paths.get_daily_reports_paths()))
+        self.__save()
+
+    def __save(self):
+        _write_atomically(
+            self.__paths.get_catalog_path(), 'w',
+            lambda catalog_file: _json.dump(self.__data, catalog_file))
+
+    @staticmethod
+    def __get_mtime(folder: str) -> int:
+        try:
+            return _os.stat(folder).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def __load(self) -> dict:
+        try:
+            with open(self.__paths.get_catalog_path(), 'r') as catalog_file:
+                data = _json.load(catalog_file)
+            _record_file(self.__paths.get_catalog_path())
+        except (OSError, ValueError):
+            return None
+
+        return data if data.get('version') == _Catalog.VERSION else None
+
+    def __get_data(self, folder: str) -> dict:
+        if self.__data is None:
+            self.__data = self.__load()
+
+        if self.__data is None or self.__data['folders'].get(
+                folder) != _Catalog.__get_mtime(folder):
+            self.refresh()
+
+        return self.__data
@@ -1,10 +1,23 @@
 import typing as _types
+import numpy as _np
 import pandas as _pd
 
+from ._aggregates import _compute_moving_average
+from ._instrumentation import _instrumented_class
+
 Baseline = _types.Tuple[_types.Union[_pd.Timestamp,
                                      _types.Tuple[str, _pd.Timestamp]], int]
 
+# Numeric columns which are not metrics: IDs of entities (see _Storage.configure_ids) and ranks of rankings.
+_NOT_METRICS = ['Id', 'Rank']
+
+
+def _get_metric_columns(df: _pd.DataFrame) -> _types.List[str]:
+    ''' Returns numeric columns of the DataFrame except IDs and ranks. '''
+    return [column for column in df.select_dtypes('number').columns if column not in _NOT_METRICS]
+
 
+@_instrumented_class
 class _DataHelper:
     def __init__(self, storage):
         self._storage = storage
@@ -37,18 +50,39 @@ class _DataHelper:
             DataFrame or Series with data-per-capita.
         '''
 
-        stats = None
+        population = self._storage.get_population(country, province, county)
+        return values / population
 
-        if province and county:
-            stats = self._storage.get_counties_stats(country,
-                                                     province).loc[county]
-        elif province:
-            stats = self._storage.get_regions_stats(country).loc[province]
-        else:
-            stats = self._storage.get_countries_stats().loc[country]
+    def per_capita_by_name(self,
+                           df: _pd.DataFrame,
+                           country: _types.Optional[str] = None,
+                           province: _types.Optional[str] = None,
+                           columns: _types.Optional[_types.List[str]] = None,
+                           per: int = 1) -> _pd.DataFrame:
+        '''
+        Converts values in a long-form DataFrame to values-per-capita in one operation.
+        Each row is divided by the population of the entity from the 'Name' column.
 
-        population = stats['Population']
-        return values / population
+        Args:
+            df(DataFrame): Data to convert, in long-form with 'Name' column.
+            country(str): The name of the country if names are regions. If not specified, then names are countries.
+            province(str): The name of the province if names are counties. This is optional argument.
+            columns(list(str)): The columns to convert. If not specified, then all numeric columns except 'Id' and 'Rank' are converted.
+            per(int): The value to convert data per. By default values are converted per capita.
+
+        Returns:
+            DataFrame with the same columns and data-per-<particular value> in converted columns.
+        '''
+
+        if columns is None:
+            columns = _get_metric_columns(df)
+
+        population = df['Name'].map(
+            self._storage.get_populations(country, province))
+
+        result = df.copy()
+        result[columns] = df[columns].div(population, axis=0) * per
+        return result
 
     def per_value(self,
                   values: _types.Union[_pd.DataFrame, _pd.Series],
@@ -98,7 +132,9 @@ class _DataHelper:
 
     @staticmethod
     def per_week(
-        values: _types.Union[_pd.DataFrame, _pd.Series]
+        values: _types.Union[_pd.DataFrame, _pd.Series],
+        previous: _types.Union[_pd.DataFrame, _pd.Series, None] = None,
+        since: _types.Optional[_pd.Timestamp] = None
     ) -> _types.Union[_pd.DataFrame, _pd.Series]:
         '''
         Resamples values to per week frequency and makes it in the manner, 
@@ -106,9 +142,194 @@ class _DataHelper:
 
         Args:
             val(DataFrame | Series): Data to resample.
+            previous(DataFrame | Series): Data resampled before values have changed. This is optional argument.
+            since(Timestamp): The earliest changed date (see utils.storage.get_changed_since). Only weeks starting from the week of this date are resampled, and earlier weeks are taken from previous data.
 
         Returns:
             DataFrame or Series resampled per week.
         '''
-    
-        return values.resample('W-MON', label='left', closed='left').sum()
+
+        if previous is None or since is None:
+            return values.resample('W-MON', label='left', closed='left').sum()
+
+        since = _pd.Timestamp(since).normalize()
+        week_start = since - _pd.Timedelta(days=since.weekday())
+
+        return _pd.concat([
+            previous.loc[previous.index < week_start],
+            values.loc[values.index >= week_start].resample(
+                'W-MON', label='left', closed='left').sum()
+        ])
+
+    @staticmethod
+    def sum_by_date(
+            reports: _types.Iterable[_types.Tuple[str, _pd.DataFrame]],
+            columns: _types.Optional[_types.List[str]] = None
+    ) -> _pd.DataFrame:
+        '''
+        Sums reports by date in a streaming fold, so only one report and the running totals are kept in memory.
+        It's equal to 'groupby('Date').sum()' of the reports concatenation.
+
+        Args:
+            reports(iterable((str, DataFrame))): Pairs of entity name and its report with 'Date' column, e.g. utils.storage.iter_countries_report().
+            columns(list(str)): The columns to sum. If not specified, then all numeric columns except 'Id' and 'Rank' are summed.
+
+        Returns:
+            DataFrame with date as index and sums of columns.
+        '''
+
+        total = None
+        dtypes = None
+
+        for _, df in reports:
+            if columns is None:
+                columns = _get_metric_columns(df)
+
+            df_sum = df.groupby('Date')[columns].sum()
+
+            if total is None:
+                total, dtypes = df_sum, df_sum.dtypes
+            else:
+                total = total.add(df_sum, fill_value=0)
+
+        if total is None:
+            return _pd.DataFrame(columns=columns or [],
+                                 index=_pd.DatetimeIndex([], name='Date'))
+
+        return total.astype(dtypes)
+
+    @staticmethod
+    def get_per_value_suffix(per: int) -> str:
+        ''' Returns a suffix for columns with data-per-<particular value>, e.g. 'per_capita', 'per_1k' or 'per_100k'. '''
+
+        if per == 1:
+            return 'per_capita'
+        elif per % 1_000_000 == 0:
+            return f'per_{per // 1_000_000}m'
+        elif per % 1_000 == 0:
+            return f'per_{per // 1_000}k'
+
+        return f'per_{per}'
+
+    def augment(self,
+                df: _pd.DataFrame,
+                columns: _types.List[str],
+                sma_windows: _types.Iterable[int] = (3, 5, 7, 10, 14),
+                per_values: _types.Iterable[int] = (1, 1_000, 100_000),
+                normalize: bool = True,
+                country: _types.Optional[str] = None,
+                previous: _types.Optional[_pd.DataFrame] = None,
+                since: _types.Optional[_pd.Timestamp] = None,
+                aggregated: bool = False) -> _pd.DataFrame:
+        '''
+        Adds derived columns to a long-form DataFrame for all entities in one vectorized pass.
+        For every column it adds '<column>_SMA_<window>' simple moving averages, '<column>_Norm' values
+        normalized per entity, and '<column>_<per suffix>' values-per-<particular value> (see get_per_value_suffix).
+
+        Args:
+            df(DataFrame): Data to augment, in long-form with 'Date' and 'Name' columns.
+            columns(list(str)): The columns to compute derived columns for.
+            sma_windows(list(int)): The windows of simple moving averages. Averages are computed per entity in order of dates.
+            per_values(list(int)): The values to convert data per. Use an empty list to skip conversion.
+            normalize(bool): A flag indicating whether or not normalized columns should be added. Default is True.
+            country(str): The name of the country if names are regions. If not specified, then names are countries.
+            previous(DataFrame): Data augmented before it has changed. This is optional argument.
+            since(Timestamp): The earliest changed date (see utils.storage.get_changed_since). Moving averages are computed only for rows starting from this date and rows missing in previous data, the rest are taken from previous data.
+            aggregated(bool): A flag indicating whether or not moving averages should be read from materialized aggregates (see utils.storage.get_aggregates) instead of computing.
+                Rows are matched by 'Name' and 'Date', so df should contain whole reports. Averages over NaN values of reports are NaN in aggregates. Default is False.
+
+        Returns:
+            A new DataFrame with the same index, rows order and original columns followed by derived columns.
+        '''
+
+        # Sort rows by entity and date, all derived values are computed on contiguous per-entity blocks.
+        codes = _pd.factorize(df['Name'])[0]
+        order = _np.lexsort((df['Date'].to_numpy(), codes))
+        inverse_order = _np.empty_like(order)
+        inverse_order[order] = _np.arange(len(order))
+
+        codes = codes[order]
+        values = df[columns].to_numpy(dtype=float)[order]
+        starts = _np.flatnonzero(_np.r_[True, codes[1:] != codes[:-1]])
+        groups = _np.repeat(_np.arange(len(starts)),
+                            _np.diff(_np.r_[starts, len(codes)]))
+        positions = _np.arange(len(codes)) - starts[groups]
+
+        derived = dict()
+
+        if aggregated:
+            names = list(_pd.unique(df['Name']))
+            keys = _pd.MultiIndex.from_arrays(
+                [df['Name'].to_numpy(dtype=object), df['Date'].to_numpy()])
+
+        if previous is not None and since is not None:
+            previous_rows = _pd.MultiIndex.from_frame(
+                previous[['Name', 'Date']]).get_indexer(
+                    _pd.MultiIndex.from_frame(df[['Name', 'Date']]))[order]
+            recompute = (df['Date'].to_numpy()[order] >= _np.datetime64(
+                _pd.Timestamp(since))) | (previous_rows < 0)
+            recompute_rows = _np.flatnonzero(recompute)
+        else:
+            previous_rows, recompute_rows = None, None
+
+        for window in sma_windows:
+            sma_columns = [f'{column}_SMA_{window}' for column in columns]
+
+            if aggregated:
+                aggregate_df = self._storage.get_aggregates(f'SMA_{window}',
+                                                            country,
+                                                            include=names,
+                                                            columns=columns)
+                aggregate_rows = _pd.MultiIndex.from_arrays([
+                    aggregate_df['Name'].to_numpy(dtype=object),
+                    aggregate_df['Date'].to_numpy()
+                ]).get_indexer(keys)[order]
+                sma = aggregate_df[columns].to_numpy(
+                    dtype=float)[aggregate_rows]
+                sma[aggregate_rows < 0] = _np.nan
+            elif recompute_rows is None:
+                sma = _compute_moving_average(values, positions, window)
+            else:
+                # Only the changed rows are averaged, other rows are copied from previous data.
+                sma = _np.empty_like(values)
+                sma[~recompute] = previous[sma_columns].to_numpy(
+                    dtype=float)[previous_rows[~recompute]]
+                sma[recompute_rows] = _compute_moving_average(
+                    values, positions, window, recompute_rows)
+
+            sma[positions < window - 1] = _np.nan
+            derived.update({
+                sma_column: sma[:, idx]
+                for idx, sma_column in enumerate(sma_columns)
+            })
+
+        if normalize:
+            abs_values = _pd.DataFrame(_np.abs(values)).groupby(groups)
+            min_values = abs_values.transform('min').to_numpy()
+            max_values = abs_values.transform('max').to_numpy()
+            norm = (values - min_values) / (max_values - min_values)
+            derived.update({
+                f'{column}_Norm': norm[:, idx]
+                for idx, column in enumerate(columns)
+            })
+
+        per_values = list(per_values)
+        if per_values:
+            population = df['Name'].map(
+                self._storage.get_populations(country)).to_numpy(
+                    dtype=float)[order]
+            per_capita = values / population[:, _np.newaxis]
+
+            for per in per_values:
+                suffix = _DataHelper.get_per_value_suffix(per)
+                derived.update({
+                    f'{column}_{suffix}': per_capita[:, idx] * per
+                    for idx, column in enumerate(columns)
+                })
+
+        derived_df = _pd.DataFrame(
+            {name: column[inverse_order]
+             for name, column in derived.items()},
+            index=df.index)
+
+        return _pd.concat([df, derived_df], axis=1)
@@ -6,14 +6,14 @@ from datetime import datetime as _datetime
 
 
 class _Dates:
-    def __init__(self, paths):
-        self.__paths = paths
+    def __init__(self, catalog):
+        self.__catalog = catalog
 
     def get_available_dates(self) -> _types.Tuple[_pd.Timestamp, _pd.Timestamp]:
 
-        files = self.__paths.get_daily_reports_paths()
-        start_date = _pd.Timestamp(files[0][:-4]).normalize()
-        finish_date = _pd.Timestamp(files[-1][:-4]).normalize()
+        dates = self.__catalog.get_daily_dates()
+        start_date = _pd.Timestamp(dates[0]).normalize()
+        finish_date = _pd.Timestamp(dates[-1]).normalize()
 
         return (start_date, finish_date)
 
@@ -0,0 +1,275 @@
+import typing as _types
+import zlib as _zlib
+import numpy as _np
+import pandas as _pd
+
+from ._instrumentation import _record_file
+
+_REPORTS = 'reports'
+_JHOPKINS = 'jhopkins'
+_YANDEX = 'yandex'
+_NATURAL_EARTH = 'natural_earth'
+_ISO = 'iso'
+_SCHEMES = (_REPORTS, _JHOPKINS, _YANDEX, _NATURAL_EARTH, _ISO)
+
+# Names of countries in Natural Earth shapes (ADMIN column), which differ from names in reports.
+_NATURAL_EARTH_NAMES = {
+    'North Macedonia': 'Macedonia',
+    'Holy See': 'Vatican',
+    'Cote d\'Ivoire': 'Ivory Coast',
+    'Congo (Kinshasa)': 'Democratic Republic of the Congo',
+    'Congo (Brazzaville)': 'Republic of the Congo',
+    'Bahamas': 'The Bahamas',
+    'Serbia': 'Republic of Serbia',
+    'Sao Tome and Principe': 'São Tomé and Principe',
+    'Tanzania': 'United Republic of Tanzania',
+    'UK': 'United Kingdom',
+    'US': 'United States of America'
+}
+# Natural Earth shapes which belong to other countries.
+_NATURAL_EARTH_ALIASES = {'Baykonur Cosmodrome': 'Kazakhstan'}
+
+# IDs of entities which are not in lookup tables are derived from names, and they don't intersect with JHopkins UIDs.
+_FALLBACK_ID_BASE = 1 << 32
+
+
+def _get_fallback_id(country: str, name: str, attempt: int = 0) -> int:
+    key = f'{country or ""}/{name}' + (f'#{attempt}' if attempt else '')
+    return _FALLBACK_ID_BASE + _zlib.crc32(key.encode())
+
+
+class _EntityRegistry():
+    '''
+    Registry of countries, regions and counties with stable integer IDs and their names in every naming scheme:
+    'reports' (names in reports and stats), 'jhopkins' (JHopkins names), 'yandex' (Russian names of Russia regions),
+    'natural_earth' (names of shapes in Natural Earth maps) and 'iso' (ISO names of countries).
+
+    IDs are JHopkins UIDs from 'Data/ISO_LookUp.csv'. Entities which are not there get IDs derived from their names,
+    so IDs are the same between runs. If the derived ID is taken by another entity, then it's derived again with the attempt number,
+    so different entities never share an ID. Continents and ISO names are linked by ISO codes from 'Data/Continent_Country_Relation.csv',
+    and Russian names of regions are taken from 'Data/Russian_Regions.csv'.
+
+    Lookups are vectorized: names are resolved with one hash index lookup per unique name, and IDs are resolved by array indexing,
+    so reports and shapes can be joined by integer IDs instead of names.
+    '''
+
+    def __init__(self, path):
+        self.__paths = path
+        self.__rows = dict()
+        self.__names = {scheme: dict() for scheme in _SCHEMES}
+        # Aliases of every scheme by the country ('' for countries): name -> ID.
+        self.__aliases = {scheme: dict() for scheme in _SCHEMES}
+
+        self.__load()
+
+        self.entities = _pd.DataFrame.from_dict(
+            self.__rows, orient='index',
+            columns=['Level', 'Country', 'Region', 'County', 'Continent', 'ISO2', 'ISO3'])
+        for scheme in _SCHEMES:
+            self.entities[scheme] = _pd.Series(self.__names[scheme], dtype=object)
+        self.entities.index.name = 'Id'
+
+        self.__lookups = {
+            scheme: {
+                country: (_pd.Index(list(aliases.keys())),
+                          _np.fromiter(aliases.values(), dtype=_np.int64, count=len(aliases)))
+                for country, aliases in scheme_aliases.items()
+            }
+            for scheme, scheme_aliases in self.__aliases.items()
+        }
+        self.__positions = _pd.Index(self.entities.index)
+
+    def __read_csv(self, name: str) -> _types.Optional[_pd.DataFrame]:
+        filepath = self.__paths.get_misc_data_path(name)
+        try:
+            # 'NA' is both the code of Namibia and of North America, so it shouldn't be parsed as NaN.
+            df = _pd.read_csv(filepath, keep_default_na=False, dtype=str)
+        except OSError:
+            return None
+
+        _record_file(filepath)
+        return df
+
+    def __add(self, entity_id: int, level: str, country: str, region: str = '',
+              county: str = '', **info) -> int:
+        row = self.__rows.get(entity_id)
+        if row is not None:
+            if row[:4] != [level, country, region, county]:
+                raise ValueError(f"Entity ID {entity_id} of {(country, region, county)} "
+                                 f"is already used by {tuple(row[1:4])}")
+            return entity_id
+
+        self.__rows[entity_id] = [level, country, region, county,
+                                  info.get('continent'), info.get('iso2'), info.get('iso3')]
+        name = county or region or country
+        self.__add_alias(_REPORTS, entity_id, name, country if region else '', True)
+        self.__add_alias(_JHOPKINS, entity_id, name, country if region else '', True)
+        self.__add_alias(_NATURAL_EARTH, entity_id, name, country if region else '', True)
+
+        return entity_id
+
+    def __get_fallback_id(self, country: str, name: str) -> int:
+        ''' Returns the ID derived from the name, which isn't taken by entities of the registry. '''
+
+        attempt = 0
+        entity_id = _get_fallback_id(country, name)
+        while entity_id in self.__rows:
+            attempt += 1
+            entity_id = _get_fallback_id(country, name, attempt)
+
+        return entity_id
+
+    def __add_alias(self, scheme: str, entity_id: int, name: str,
+                    country: str, primary: bool = False):
+        if not name:
+            return
+
+        if primary or entity_id not in self.__names[scheme]:
+            self.__names[scheme][entity_id] = name
+        self.__aliases[scheme].setdefault(country, dict()).setdefault(name, entity_id)
+
+    def __load(self):
+        relation_df = self.__read_csv('Continent_Country_Relation.csv')
+        continents = dict()
+        iso_names = dict()
+        if relation_df is not None:
+            # Transcontinental countries are listed for every continent, the first one is taken.
+            relation_df = relation_df.drop_duplicates('Two_Letter_Country_Code')
+            continents = dict(zip(relation_df['Two_Letter_Country_Code'], relation_df['Continent_Name']))
+            iso_names = dict(zip(relation_df['Two_Letter_Country_Code'], relation_df['Country_Name']))
+
+        iso_df = self.__read_csv('ISO_LookUp.csv')
+        if iso_df is not None:
+            # Countries go first, so regions and counties are added to known countries.
+            levels = (iso_df['Province_State'] != '').astype(int) + (iso_df['Admin2'] != '')
+            for row in iso_df.assign(level=levels).sort_values('level', kind='stable').itertuples():
+                level = ('country', 'region', 'county')[row.level]
+                entity_id = self.__add(int(row.UID), level, row.Country_Region,
+                                       row.Province_State, row.Admin2,
+                                       continent=continents.get(row.iso2),
+                                       iso2=row.iso2, iso3=row.iso3)
+                if level == 'country':
+                    self.__add_alias(_ISO, entity_id, iso_names.get(row.iso2), '', True)
+
+        regions_df = self.__read_csv('Russian_Regions.csv')
+        if regions_df is not None:
+            for english, russian in zip(regions_df['English_JHopkins'], regions_df['Russian_Yandex']):
+                entity_id = self.__get_or_add('Russia', english)
+                self.__add_alias(_YANDEX, entity_id, russian, 'Russia', True)
+                self.__add_alias(_REPORTS, entity_id, russian, 'Russia', True)
+                self.__add_alias(_NATURAL_EARTH, entity_id, russian, 'Russia', True)
+
+        for name, natural_earth_name in _NATURAL_EARTH_NAMES.items():
+            self.__add_alias(_NATURAL_EARTH, self.__get_or_add(None, name), natural_earth_name, '', True)
+
+        for alias, name in _NATURAL_EARTH_ALIASES.items():
+            self.__add_alias(_NATURAL_EARTH, self.__get_or_add(None, name), alias, '')
+
+    def __get_or_add(self, country: str, name: str) -> int:
+        entity_id = self.__aliases[_JHOPKINS].get(country or '', dict()).get(name)
+        if entity_id is not None:
+            return entity_id
+
+        if country:
+            return self.__add(self.__get_fallback_id(country, name), 'region', country, name)
+
+        return self.__add(self.__get_fallback_id(None, name), 'country', name)
+
+    def get_ids(self,
+                names: _types.Iterable[str],
+                country: str = None,
+                scheme: str = _REPORTS) -> _np.ndarray:
+        '''
+        Returns IDs of entities by their names.
+
+        Args:
+            names(iterable(str)): Names of countries, or of the country regions.
+            country(str): The name of the country (in 'reports' scheme) if names are its regions.
+            scheme(str): The naming scheme of names: 'reports', 'jhopkins', 'yandex', 'natural_earth' or 'iso'.
+
+        Returns:
+            Array of int64 IDs. Names which are not in the registry get IDs derived from names, like in the registry,
+            which are not taken by entities of the registry.
+        '''
+
+        if scheme not in _SCHEMES:
+            raise ValueError(f"Unsupported naming scheme '{scheme}', expected one of {_SCHEMES}")
+
+        # Unique names are resolved once, so long-form reports cost one hash lookup per entity.
+        if isinstance(names, _pd.Series) and isinstance(names.dtype, _pd.CategoricalDtype):
+            (codes, uniques) = (names.cat.codes.to_numpy(), names.cat.categories)
+        else:
+            (codes, uniques) = _pd.factorize(_np.asarray(names, dtype=object))
+
+        ids = _np.full(len(uniques), -1, dtype=_np.int64)
+        lookup = self.__lookups[scheme].get(country or '')
+        if lookup is not None and len(uniques):
+            (index, lookup_ids) = lookup
+            positions = index.get_indexer(uniques)
+            ids[positions >= 0] = lookup_ids[positions[positions >= 0]]
+
+        for pos in _np.flatnonzero(ids < 0):
+            ids[pos] = self.__get_fallback_id(country, uniques[pos])
+
+        return ids[codes]
+
+    def get_names(self, ids: _types.Iterable[int], scheme: str = _REPORTS) -> _np.ndarray:
+        '''
+        Returns names of entities in the naming scheme by their IDs.
+
+        Args:
+            ids(iterable(int)): IDs of entities.
+            scheme(str): The naming scheme, see get_ids.
+
+        Returns:
+            Array of names, it's None for IDs which are not in the registry or don't have a name in the scheme.
+        '''
+
+        positions = self.__positions.get_indexer(_np.asarray(ids, dtype=_np.int64))
+        names = self.entities[scheme].to_numpy()
+        return _np.where(positions >= 0, names[positions], None)
+
+    def translate(self,
+                  names: _types.Iterable[str],
+                  source: str = _REPORTS,
+                  target: str = _NATURAL_EARTH,
+                  country: str = None) -> _np.ndarray:
+        '''
+        Translates names of entities from one naming scheme to another, e.g. names of countries in reports to names of shapes.
+
+        Args:
+            names(iterable(str)): Names of countries, or of the country regions.
+            source(str): The naming scheme of names, see get_ids.
+            target(str): The naming scheme to translate names to.
+            country(str): The name of the country (in 'reports' scheme) if names are its regions.
+
+        Returns:
+            Array of translated names. Names which can't be translated are kept as is.
+        '''
+
+        names = _np.asarray(names, dtype=object)
+        translated = self.get_names(self.get_ids(names, country, source), target)
+        return _np.where(_pd.isna(translated), names, translated)
+
+    def add_ids(self,
+                df: _pd.DataFrame,
+                column: str = 'Name',
+                country: str = None,
+                scheme: str = _REPORTS,
+                id_column: str = 'Id') -> _pd.DataFrame:
+        '''
+        Returns a copy of the DataFrame (e.g. a report or shapes) with IDs of entities from the names column.
+
+        Args:
+            df(DataFrame): The frame with names of entities.
+            column(str): The column with names. Use None to take names from index.
+            country(str): The name of the country (in 'reports' scheme) if names are its regions.
+            scheme(str): The naming scheme of names, see get_ids.
+            id_column(str): The name of the column with IDs.
+
+        Returns:
+            DataFrame with int64 column of IDs.
+        '''
+
+        names = df.index.to_series() if column is None else df[column]
+        return df.assign(**{id_column: self.get_ids(names, country, scheme)})
@@ -0,0 +1,167 @@
+import datetime as _datetime
+import functools as _functools
+import typing as _types
+
+_LOCALES = {
+    'en': dict(
+        months=('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                'August', 'September', 'October', 'November', 'December'),
+        months_genitive=None,
+        months_abbr=('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug',
+                     'Sep', 'Oct', 'Nov', 'Dec'),
+        weekdays=('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+                  'Saturday', 'Sunday'),
+        weekdays_abbr=('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'),
+        date_pattern='%d %B %Y',
+        group_separator=','),
+    'ru': dict(
+        months=('январь', 'февраль', 'март', 'апрель', 'май', 'июнь', 'июль',
+                'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь'),
+        months_genitive=('января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+                         'июля', 'августа', 'сентября', 'октября', 'ноября',
+                         'декабря'),
+        months_abbr=('янв', 'фев', 'мар', 'апр', 'мая', 'июн', 'июл', 'авг',
+                     'сен', 'окт', 'ноя', 'дек'),
+        weekdays=('понедельник', 'вторник', 'среда', 'четверг', 'пятница',
+                  'суббота', 'воскресенье'),
+        weekdays_abbr=('пн', 'вт', 'ср', 'чт', 'пт', 'сб', 'вс'),
+        date_pattern='%d %B %Y',
+        group_separator=' ')
+}
+
+# Directives of date patterns, the same as strftime ones. '%B' is the month name in the genitive case when the locale has it
+# (like glibc ru_RU locale, e.g. '01 апреля 2020'), and '%OB' is always the name in the nominative case.
+_NUMERIC_DIRECTIVES = {
+    'd': lambda date: f'{date.day:02d}',
+    'e': lambda date: f'{date.day:2d}',
+    '-d': lambda date: str(date.day),
+    'm': lambda date: f'{date.month:02d}',
+    '-m': lambda date: str(date.month),
+    'Y': lambda date: f'{date.year:04d}',
+    'y': lambda date: f'{date.year % 100:02d}',
+    'j': lambda date: f'{date.timetuple().tm_yday:03d}',
+    '%': lambda date: '%'
+}
+_NAME_DIRECTIVES = ('B', 'OB', 'b', 'A', 'a')
+
+
+@_functools.lru_cache(maxsize=None)
+def _compile(pattern: str) -> _types.Tuple[_types.Tuple[bool, str], ...]:
+    ''' Splits the date pattern to literal parts and directives, so the pattern is parsed once. '''
+
+    parts = list()
+    literal = list()
+    idx = 0
+    while idx < len(pattern):
+        if pattern[idx] != '%':
+            literal.append(pattern[idx])
+            idx += 1
+            continue
+
+        directive = next((d for d in ('-d', '-m', 'OB') if pattern.startswith(d, idx + 1)),
+                         pattern[idx + 1:idx + 2])
+        if directive not in _NUMERIC_DIRECTIVES and directive not in _NAME_DIRECTIVES:
+            raise ValueError(
+                f"Unsupported directive '%{directive}' in date pattern '{pattern}'")
+
+        if literal:
+            parts.append((False, ''.join(literal)))
+            literal.clear()
+        parts.append((True, directive))
+        idx += 1 + len(directive)
+
+    if literal:
+        parts.append((False, ''.join(literal)))
+
+    return tuple(parts)
+
+
+class _Formatter():
+    '''
+    Formats dates, month names and integers for the locale without the process locale (locale.setlocale),
+    so it can be used from any thread. Names and separators are fixed tables, and date patterns are parsed once.
+    '''
+
+    def __init__(self, locale: str):
+        settings = _LOCALES[locale]
+
+        self.locale = locale
+        self.__months = settings['months']
+        self.__months_genitive = settings['months_genitive'] or settings['months']
+        self.__names = {
+            'B': lambda date: self.__months_genitive[date.month - 1],
+            'OB': lambda date: self.__months[date.month - 1],
+            'b': lambda date: settings['months_abbr'][date.month - 1],
+            'A': lambda date: settings['weekdays'][date.weekday()],
+            'a': lambda date: settings['weekdays_abbr'][date.weekday()]
+        }
+        self.__date_pattern = settings['date_pattern']
+        self.__group_separator = settings['group_separator']
+
+    def format_date(self, date: _datetime.date, pattern: str = None) -> str:
+        '''
+        Converts the date to string.
+
+        Args:
+            date(date): The date, datetime or pandas Timestamp.
+            pattern(str): The pattern with strftime directives: %d, %e, %-d, %m, %-m, %Y, %y, %j, %B (the month name,
+                in the genitive case for Russian), %OB (the month name in the nominative case), %b, %A and %a.
+                If not specified, then the default pattern of the locale is used, e.g. '01 April 2020'.
+
+        Returns:
+            Formatted date.
+        '''
+
+        return ''.join(
+            (_NUMERIC_DIRECTIVES.get(value) or self.__names[value])(date) if is_directive else value
+            for is_directive, value in _compile(pattern or self.__date_pattern))
+
+    def format_month(self, month: _types.Union[int, _datetime.date],
+                     genitive: bool = False) -> str:
+        '''
+        Returns the month name.
+
+        Args:
+            month(int|date): The number of the month (from 1) or a date.
+            genitive(bool): A flag indicating whether or not the name should be in the genitive case. Default is False.
+
+        Returns:
+            The name of the month.
+        '''
+
+        if not isinstance(month, int):
+            month = month.month
+
+        return (self.__months_genitive if genitive else self.__months)[month - 1]
+
+    def format_int(self, number: int, separator: str = None) -> str:
+        '''
+        Converts the integer to string with digits grouped by thousands, e.g. '1,234,567' for English or '1 234 567' for Russian.
+
+        Args:
+            number(int): The number, it's rounded if it isn't integer.
+            separator(str): The separator of groups. If not specified, then the separator of the locale is used.
+
+        Returns:
+            Formatted number.
+        '''
+
+        text = f'{int(round(number)):,}'
+        separator = self.__group_separator if separator is None else separator
+        return text if separator == ',' else text.replace(',', separator)
+
+
+# Formatters are immutable, so they are created once and shared between threads.
+_formatters = {locale: _Formatter(locale) for locale in _LOCALES}
+
+
+def _get_formatter(locale: str = 'en') -> _Formatter:
+    ''' Returns the formatter for the locale: 'en', 'ru', or a locale name like 'ru_RU' or 'ru_RU.UTF-8'. '''
+
+    language = locale.replace('-', '_').split('_')[0].split('.')[0].lower()
+    formatter = _formatters.get(language)
+    if formatter is None:
+        raise ValueError(
+            f"Unsupported locale '{locale}', expected one of {tuple(_formatters)}")
+
+    return formatter
@@ -0,0 +1,243 @@
+import hashlib as _hashlib
+import os as _os
+import typing as _types
+import numpy as _np
+
+from ._cache import _open_npz, _save_npz
+
+# Increase it when the preparation changes, so cached shapes are prepared again.
+_GEOMETRY_VERSION = 1
+_SHAPEFILE_EXTENSIONS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+_MISSING_KEY = '{}.missing'
+_GEOMETRY_KEY = 'geometry'
+_OFFSETS_KEY = 'geometry.offsets'
+
+Extent = _types.Tuple[_types.Tuple[float, float], _types.Tuple[float, float]]
+
+
+def _get_source_paths(filepath: str) -> _types.List[str]:
+    ''' Returns paths to files of the source. All files of a shapefile (.shp, .shx, .dbf, .prj, .cpg) are included. '''
+
+    (stem, extension) = _os.path.splitext(filepath)
+    if extension.lower() != '.shp':
+        return [filepath]
+
+    return [
+        stem + ext for ext in _SHAPEFILE_EXTENSIONS
+        if _os.path.exists(stem + ext)
+    ]
+
+
+def _get_fingerprint(filepath: str) -> str:
+    ''' Returns names, sizes and modification times of the source files. It's checked before the content is hashed. '''
+
+    parts = list()
+    for path in _get_source_paths(filepath):
+        stat = _os.stat(path)
+        parts.append(f'{_os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}')
+
+    return '|'.join(parts)
+
+
+def _hash_source(filepath: str) -> str:
+    ''' Returns the hash of the source files content. '''
+
+    digest = _hashlib.sha256()
+    for path in _get_source_paths(filepath):
+        digest.update(_os.path.basename(path).encode())
+        with open(path, 'rb') as source_file:
+            for chunk in iter(lambda: source_file.read(1 << 20), b''):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _get_tolerance(bounds: _types.Tuple[float, float, float, float],
+                   figsize: _types.Tuple[float, float], dpi: int,
+                   pixel_fraction: float) -> float:
+    ''' Returns the simplification tolerance in CRS units, which is the fraction of a pixel of the figure showing the bounds. '''
+
+    (minx, miny, maxx, maxy) = bounds
+    return pixel_fraction * max((maxx - minx) / (figsize[0] * dpi),
+                                (maxy - miny) / (figsize[1] * dpi))
+
+
+def _simplify(geometries: _np.ndarray, tolerance: float) -> _np.ndarray:
+    import shapely
+
+    # Coverage simplification keeps shared borders of neighbour shapes identical, so there are no gaps and overlaps between them.
+    # It's available since shapely 2.1, and it requires shapes which don't overlap, otherwise every shape is simplified on its own.
+    if hasattr(shapely, 'coverage_simplify'):
+        try:
+            return shapely.coverage_simplify(geometries, tolerance)
+        except shapely.errors.GEOSException:
+            pass
+
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def _prepare(source_path: str, crs: str, extent: _types.Optional[Extent],
+             columns: _types.Optional[_types.List[str]], fix: _types.Optional[_types.Callable],
+             figsize: _types.Tuple[float, float], dpi: int,
+             pixel_fraction: float):
+    import geopandas as gpd
+    import shapely
+
+    shape_df = gpd.read_file(source_path)
+    if fix is not None:
+        shape_df = fix(shape_df)
+
+    if columns is None:
+        columns = [c for c in shape_df.columns if c != shape_df.geometry.name]
+
+    shape_df = shape_df[columns + [shape_df.geometry.name]].to_crs(crs)
+    geometries = _np.asarray(shape_df.geometry.values, dtype=object)
+
+    if extent is not None:
+        # Shapes are clipped to the extent with a margin, so parts which are never shown are not drawn.
+        ((xmin, xmax), (ymin, ymax)) = extent
+        (dx, dy) = ((xmax - xmin) * 0.1, (ymax - ymin) * 0.1)
+        geometries = shapely.clip_by_rect(geometries, xmin - dx, ymin - dy,
+                                          xmax + dx, ymax + dy)
+        bounds = (xmin, ymin, xmax, ymax)
+    else:
+        bounds = tuple(shape_df.total_bounds)
+
+    geometries = _simplify(geometries,
+                           _get_tolerance(bounds, figsize, dpi, pixel_fraction))
+
+    present = ~(shapely.is_missing(geometries) | shapely.is_empty(geometries))
+    return gpd.GeoDataFrame(shape_df[columns][present],
+                            geometry=geometries[present],
+                            crs=shape_df.crs)
+
+
+def _save_shapes(filepath: str, key: str, source_hash: str, fingerprint: str,
+                 shape_df):
+    import shapely
+
+    wkb = shapely.to_wkb(_np.asarray(shape_df.geometry.values, dtype=object))
+    arrays = {
+        'key': _np.array(key),
+        'source_hash': _np.array(source_hash),
+        'fingerprint': _np.array(fingerprint),
+        'crs': _np.array(shape_df.crs.to_wkt()),
+        'index': shape_df.index.to_numpy(),
+        _GEOMETRY_KEY: _np.frombuffer(b''.join(wkb), dtype=_np.uint8),
+        _OFFSETS_KEY: _np.cumsum([0] + [len(item) for item in wkb]),
+        'columns': _np.array(
+            [c for c in shape_df.columns if c != shape_df.geometry.name],
+            dtype=str)
+    }
+
+    for column in arrays['columns']:
+        values = shape_df[column]
+        if values.dtype.kind in 'biuf':
+            arrays[column] = values.to_numpy()
+        else:
+            arrays[column] = values.fillna('').astype(str).to_numpy(dtype=str)
+            arrays[_MISSING_KEY.format(column)] = values.isna().to_numpy()
+
+    _save_npz(filepath, arrays)
+
+
+def _load_keys(filepath: str) -> _types.Optional[_types.Dict[str, str]]:
+    ''' Returns the key of arguments, the hash and the fingerprint of the source of cached shapes, or None if there are no shapes. '''
+
+    try:
+        # Arrays in .npz are read on access, so shapes aren't read.
+        with _np.load(filepath, allow_pickle=False) as data:
+            return {name: str(data[name]) for name in ('key', 'source_hash', 'fingerprint')}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _load_shapes(filepath: str):
+    import geopandas as gpd
+    import pandas as pd
+    import shapely
+
+    try:
+        with _open_npz(filepath) as data:
+            buffer = data[_GEOMETRY_KEY].tobytes()
+            offsets = data[_OFFSETS_KEY]
+            geometries = shapely.from_wkb(
+                _np.array([
+                    buffer[start:end]
+                    for start, end in zip(offsets[:-1], offsets[1:])
+                ], dtype=object))
+
+            columns = dict()
+            for column in data['columns']:
+                values = data[column]
+                missing_key = _MISSING_KEY.format(column)
+                if missing_key in data.files:
+                    values = pd.Series(values.astype(object)).mask(data[missing_key]).to_numpy()
+                columns[column] = values
+
+            return gpd.GeoDataFrame(columns,
+                                    index=pd.Index(data['index']),
+                                    geometry=geometries,
+                                    crs=str(data['crs']))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _prepare_shapes(cache_path: str,
+                    source_path: str,
+                    crs: str,
+                    extent: Extent = None,
+                    columns: _types.List[str] = None,
+                    fix: _types.Callable = None,
+                    version: str = '',
+                    figsize: _types.Tuple[float, float] = (24, 14),
+                    dpi: int = 72,
+                    pixel_fraction: float = 0.5):
+    '''
+    Returns shapes prepared for maps of the given size: read from the source file, fixed, reprojected, clipped to the extent
+    and simplified with the tolerance of a fraction of the frame pixel. Prepared shapes are cached in a binary file
+    (geometry as WKB), which is used while the source files content and preparation arguments are the same.
+    The content is hashed only when sizes or modification times of the source files have changed since the shapes were cached.
+
+    Args:
+        cache_path(str): The path to the cache file.
+        source_path(str): The path to the source file, which can be read by geopandas.read_file.
+        crs(str): The projection of prepared shapes, e.g. 'epsg:4326'.
+        extent(((float, float), (float, float))): Limits of x and y axes of maps, in the projection. If not specified, then shapes bounds are used.
+        columns(list(str)): Columns to keep besides geometry. If not specified, then all are kept.
+        fix(callable(GeoDataFrame)): Function that fixes shapes read from the source (e.g. renames them) and returns them.
+            It's not a part of the cache key, so version should be changed when it's changed.
+        version(str): The version of fix function.
+        figsize((float, float)): The size of maps in inches.
+        dpi(int): The resolution of maps.
+        pixel_fraction(float): The simplification tolerance as a fraction of a pixel.
+
+    Returns:
+        GeoDataFrame with prepared shapes. Source index is kept, shapes which are empty after clipping are removed.
+    '''
+
+    key = '|'.join(
+        str(part) for part in (_GEOMETRY_VERSION, crs, extent, columns, version,
+                               figsize, dpi, pixel_fraction))
+    fingerprint = _get_fingerprint(source_path)
+    source_hash = None
+
+    cached = _load_keys(cache_path)
+    if cached is not None and cached['key'] == key:
+        if cached['fingerprint'] != fingerprint:
+            source_hash = _hash_source(source_path)
+
+        if source_hash is None or cached['source_hash'] == source_hash:
+            shape_df = _load_shapes(cache_path)
+            if shape_df is not None:
+                # The source was touched without changes, so the new fingerprint is saved to skip hashing next time.
+                if source_hash is not None:
+                    _save_shapes(cache_path, key, source_hash, fingerprint, shape_df)
+                return shape_df
+
+    shape_df = _prepare(source_path, crs, extent, columns, fix, figsize, dpi,
+                        pixel_fraction)
+    _save_shapes(cache_path, key,
+                 source_hash or _hash_source(source_path), fingerprint, shape_df)
+
+    return shape_df
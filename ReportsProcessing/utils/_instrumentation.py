@@ -0,0 +1,302 @@
+import atexit as _atexit
+import contextlib as _ctxlib
+import functools as _functools
+import inspect as _inspect
+import json as _json
+import math as _math
+import os as _os
+import sys as _sys
+import threading as _threading
+import time as _time
+import typing as _types
+
+# Set REPORTS_INSTRUMENTATION=1 to print the summary table of the whole run to stderr at exit,
+# or REPORTS_INSTRUMENTATION=<path>.json to write the summary to the JSON file.
+_ENV_VARIABLE = 'REPORTS_INSTRUMENTATION'
+
+
+class _MethodStats():
+    __slots__ = ('calls', 'durations', 'files', 'bytes', 'rows')
+
+    def __init__(self):
+        self.calls = 0
+        self.durations = list()
+        self.files = 0
+        self.bytes = 0
+        self.rows = 0
+
+
+class _Instrumentation():
+    '''
+    Statistics of instrumented methods: the number of calls, latencies, the number of files opened,
+    bytes read and rows produced. Files and bytes are counted for all methods that are running in the thread
+    which reads a file, so methods which call other methods include their reads. Bytes of binary caches are counted
+    by the arrays read from them, so loads of a few columns count only those columns.
+
+    Reads made in threads of a pool (e.g. the storage loader with threads) are counted for methods called in those threads,
+    like _ReportsCache.read, but not for the method which started the pool. Calls made in worker processes
+    (e.g. process pools of the storage loader or of dashboards rendering) aren't recorded.
+    '''
+
+    def __init__(self):
+        self.__stats = dict()
+
+    def _get(self, name: str) -> _MethodStats:
+        stats = self.__stats.get(name)
+        if stats is None:
+            stats = self.__stats.setdefault(name, _MethodStats())
+        return stats
+
+    def reset(self):
+        ''' Removes all recorded statistics. '''
+        self.__stats.clear()
+
+    def to_dict(self) -> _types.Dict[str, dict]:
+        '''
+        Returns statistics as a dictionary of method names and dictionaries with 'calls', 'total_s', 'mean_s', 'p95_s',
+        'max_s', 'files', 'bytes' and 'rows' keys. Methods are sorted by the total time in descending order.
+        '''
+
+        result = dict()
+        with _lock:
+            items = [(name, stats.calls, sorted(stats.durations), stats.files,
+                      stats.bytes, stats.rows)
+                     for name, stats in self.__stats.items()]
+
+        for (name, calls, durations, files, nbytes, rows) in sorted(
+                items, key=lambda item: -sum(item[2])):
+            total = sum(durations)
+            result[name] = dict(
+                calls=calls,
+                total_s=total,
+                mean_s=total / len(durations) if durations else 0.0,
+                p95_s=durations[max(0, _math.ceil(0.95 * len(durations)) - 1)]
+                if durations else 0.0,
+                max_s=durations[-1] if durations else 0.0,
+                files=files,
+                bytes=nbytes,
+                rows=rows)
+
+        return result
+
+    def to_json(self, filepath: str = None) -> str:
+        '''
+        Returns statistics (see to_dict) as a JSON string, and writes it to the file if the path is specified.
+        '''
+
+        text = _json.dumps(self.to_dict(), indent=2)
+        if filepath:
+            with open(filepath, 'w') as json_file:
+                json_file.write(text)
+
+        return text
+
+    def to_frame(self):
+        ''' Returns statistics (see to_dict) as a DataFrame with method names as index. '''
+
+        import pandas as pd
+        return pd.DataFrame.from_dict(
+            self.to_dict(),
+            orient='index',
+            columns=['calls', 'total_s', 'mean_s', 'p95_s', 'max_s', 'files', 'bytes', 'rows'])
+
+    def to_table(self) -> str:
+        ''' Returns statistics (see to_dict) as a text table. '''
+
+        lines = [
+            f"{'method':<48} {'calls':>7} {'total, s':>10} {'p95, ms':>10} {'files':>7} {'MB read':>9} {'rows':>10}"
+        ]
+        for name, stats in self.to_dict().items():
+            lines.append(
+                f"{name:<48} {stats['calls']:>7} {stats['total_s']:>10.3f} {stats['p95_s'] * 1000:>10.2f} "
+                f"{stats['files']:>7} {stats['bytes'] / 2**20:>9.2f} {stats['rows']:>10}")
+
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        return self.to_table()
+
+
+# Instrumentations that are recording now, and statistics of methods that are running now in the current thread.
+_recorders = list()
+_local = _threading.local()
+_lock = _threading.Lock()
+
+
+def _get_running() -> list:
+    running = getattr(_local, 'running', None)
+    if running is None:
+        running = _local.running = list()
+
+    return running
+
+
+def _get_rows(result) -> int:
+    # Rows of a tuple, like (name, df) of iterators or (df, population) of stats, are rows of its first item except names.
+    if isinstance(result, tuple):
+        result = next((item for item in result if not isinstance(item, str)), None)
+
+    shape = getattr(result, 'shape', None)
+    return shape[0] if shape else 0
+
+
+def _start(name: str) -> list:
+    with _lock:
+        stats = [recorder._get(name) for recorder in _recorders]
+        for method_stats in stats:
+            method_stats.calls += 1
+    _get_running().extend(stats)
+
+    return stats
+
+
+def _finish(stats: list, duration: float, rows: int):
+    running = _get_running()
+    with _lock:
+        for method_stats in stats:
+            method_stats.durations.append(duration)
+            method_stats.rows += rows
+            running.remove(method_stats)
+
+
+def _record_read(nbytes: int):
+    '''
+    Records that a file has been read by the methods running in the current thread.
+
+    Args:
+        nbytes(int): The number of bytes read from the file.
+    '''
+
+    if not _recorders:
+        return
+
+    running = _get_running()
+    with _lock:
+        for method_stats in set(running):
+            method_stats.files += 1
+            method_stats.bytes += nbytes
+
+
+def _record_file(filepath: str):
+    ''' Records that the whole file has been read by the running methods. '''
+
+    if _recorders:
+        _record_read(_os.path.getsize(filepath))
+
+
+def _record_arrays(data, keys: _types.Iterable[str]):
+    '''
+    Records that arrays of the .npz file have been read by the running methods. Arrays of .npz files are read on access,
+    so only sizes of the read arrays are counted, and a file of columns is counted by the columns read from it.
+
+    Args:
+        data(NpzFile): The opened .npz file.
+        keys(iterable(str)): Names of the read arrays.
+    '''
+
+    if _recorders:
+        _record_read(sum(data.zip.getinfo(f'{key}.npy').file_size for key in keys))
+
+
+def _instrument_generator(stats: list, duration: float,
+                          generator: _types.Generator) -> _types.Generator:
+    # Time and reads are recorded only while the generator runs, and rows are counted for all produced items.
+    # The generator can be resumed from any thread, so its methods are running in the thread which resumes it.
+    rows = 0
+    try:
+        while True:
+            _get_running().extend(stats)
+            start = _time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                duration += _time.perf_counter() - start
+                running = _get_running()
+                for method_stats in stats:
+                    running.remove(method_stats)
+
+            rows += _get_rows(item)
+            yield item
+    finally:
+        _get_running().extend(stats)
+        _finish(stats, duration, rows)
+
+
+def _instrumented(func: _types.Callable) -> _types.Callable:
+    '''
+    Decorates the function, so its calls are recorded when instrumentation is enabled.
+    When it's disabled, the only overhead is a check of the list of recorders.
+    '''
+
+    name = func.__qualname__
+
+    @_functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _recorders:
+            return func(*args, **kwargs)
+
+        stats = _start(name)
+        start = _time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            _finish(stats, _time.perf_counter() - start, 0)
+            raise
+
+        if _inspect.isgenerator(result):
+            running = _get_running()
+            for method_stats in stats:
+                running.remove(method_stats)
+            return _instrument_generator(stats, _time.perf_counter() - start,
+                                         result)
+
+        _finish(stats, _time.perf_counter() - start, _get_rows(result))
+        return result
+
+    return wrapper
+
+
+def _instrumented_class(cls: type) -> type:
+    ''' Decorates all public methods of the class with _instrumented. '''
+
+    for name, member in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+
+        if isinstance(member, staticmethod):
+            setattr(cls, name, staticmethod(_instrumented(member.__func__)))
+        elif _inspect.isfunction(member):
+            setattr(cls, name, _instrumented(member))
+
+    return cls
+
+
+@_ctxlib.contextmanager
+def _record() -> _types.Iterator[_Instrumentation]:
+    instrumentation = _Instrumentation()
+
+    with _lock:
+        _recorders.append(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        with _lock:
+            _recorders.remove(instrumentation)
+
+
+def _report_at_exit(instrumentation: _Instrumentation, target: str):
+    if target.lower().endswith('.json'):
+        instrumentation.to_json(target)
+    else:
+        print(instrumentation.to_table(), file=_sys.stderr)
+
+
+_global_instrumentation = None
+
+if _os.environ.get(_ENV_VARIABLE, '') not in ('', '0'):
+    _global_instrumentation = _Instrumentation()
+    _recorders.append(_global_instrumentation)
+    _atexit.register(_report_at_exit, _global_instrumentation,
+                     _os.environ[_ENV_VARIABLE])
@@ -0,0 +1,769 @@
+import os as _os
+import queue as _queue
+import threading as _threading
+import typing as _types
+import multiprocessing as _mp
+from concurrent import futures as _futures
+import numpy as _np
+import pandas as _pd
+from matplotlib import cm as _cm, colors as _colors, figure as _figure, path as _path, patches as _patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg as _FigureCanvasAgg
+from matplotlib.collections import PatchCollection as _PatchCollection
+from mpl_toolkits.axes_grid1 import make_axes_locatable as _make_axes_locatable
+
+from ._ranking import _rank_top
+from ._geometry import _prepare_shapes
+from ._shared import _SharedData, _attach_data
+from ._outputs import _OutputsCache, _hash_inputs, _read_image, _write_image
+
+_TABLE_SIZE = 10
+# Increase it when frames are drawn differently, so cached frames are rendered again.
+_RENDERER_VERSION = 1
+
+# Shared data and maps helper of a frames rendering worker process, see _MapsHelper.render_frames.
+_worker_data = None
+_worker_maps = None
+
+
+def _geometry_to_path(geometry) -> _types.Optional[_path.Path]:
+    ''' Converts a shapely Polygon or MultiPolygon to a compound matplotlib Path. Returns None for empty geometries. '''
+
+    if geometry is None or geometry.is_empty:
+        return None
+
+    polygons = geometry.geoms if geometry.geom_type == 'MultiPolygon' else [
+        geometry
+    ]
+
+    return _path.Path.make_compound_path(*[
+        _path.Path(_np.asarray(ring.coords)[:, :2], closed=True)
+        for polygon in polygons
+        for ring in [polygon.exterior, *polygon.interiors]
+    ])
+
+
+def _get_drawn_names(shape_df, shape_index: str) -> _np.ndarray:
+    ''' Returns names of shapes which are drawn, in the order of the renderer. Empty geometries are not drawn. '''
+
+    drawn = [geometry is not None and not geometry.is_empty for geometry in shape_df.geometry]
+    return shape_df[shape_index].to_numpy()[_np.array(drawn, dtype=bool)]
+
+
+def _get_frame_values(report_df: _pd.DataFrame, column_name: str,
+                      report_index: str,
+                      names: _np.ndarray) -> _types.Tuple[_pd.Index, _np.ndarray]:
+    ''' Returns dates and the date × shape matrix of values of the report column joined with shapes names. '''
+
+    values_df = report_df.groupby(['Date', report_index
+                                   ])[column_name].last().unstack()
+
+    return values_df.index, values_df.reindex(columns=names).to_numpy(dtype=float)
+
+
+def _hash_shapes(shape_df) -> str:
+    ''' Returns the hash of shapes: their projection, attributes and geometry. '''
+
+    import hashlib
+    import shapely
+
+    digest = hashlib.sha256()
+    for wkb in shapely.to_wkb(_np.asarray(shape_df.geometry.values, dtype=object)):
+        digest.update(wkb or b'')
+
+    return _hash_inputs(str(shape_df.crs), _pd.DataFrame(shape_df.drop(columns=shape_df.geometry.name)),
+                        digest.hexdigest())
+
+
+class _MapRenderer():
+    '''
+    Renders map frames for a set of shapes.
+
+    The figure, the shapes collections and the colorbar are built once. Geometry is converted to paths once too,
+    so every frame only updates face colors of the shapes from a precomputed date × shape values matrix,
+    and texts of the title, the annotation and the top-10 table.
+    '''
+
+    def __init__(self,
+                 shape_df,
+                 shape_index: str = 'ADMIN',
+                 xlim: _types.Tuple[float, float] = None,
+                 ylim: _types.Tuple[float, float] = None,
+                 figsize: _types.Tuple[float, float] = (24, 14),
+                 dpi: int = 72,
+                 background_color: str = '#CBE8FE',
+                 alpha: float = 0.9):
+        '''
+        Args:
+            shape_df(GeoDataFrame): Shapes to draw. They should be already in the required projection.
+            shape_index(str): The name of the column with shapes names, which are joined with reports names.
+            xlim((float, float)): Limits of x axis. If not specified, then shapes bounds are used.
+            ylim((float, float)): Limits of y axis. If not specified, then shapes bounds are used.
+            figsize((float, float)): The size of the figure in inches.
+            dpi(int): The resolution of frames.
+            background_color(str): The color of the sea and of the top-10 table.
+            alpha(float): The opacity of the shapes colors.
+        '''
+
+        paths = [_geometry_to_path(geometry) for geometry in shape_df.geometry]
+        self.__shapes = _np.array([path is not None for path in paths])
+        self.__names = shape_df[shape_index].to_numpy()[self.__shapes]
+
+        self.__dpi = dpi
+        self.__background_color = background_color
+        self.__alpha = alpha
+
+        self.figure = _figure.Figure(figsize=figsize,
+                                     dpi=dpi,
+                                     facecolor=background_color)
+        self.__canvas = _FigureCanvasAgg(self.figure)
+
+        self.__ax = self.figure.add_subplot(1, 1, 1)
+        self.__cax = _make_axes_locatable(self.__ax).append_axes("bottom",
+                                                                 size="1%",
+                                                                 pad=0.05)
+
+        patches = [_patches.PathPatch(path) for path in paths if path is not None]
+        self.__ax.add_collection(
+            _PatchCollection(patches,
+                             facecolor='white',
+                             edgecolor='black',
+                             linewidth=1))
+        self.__colors = self.__ax.add_collection(
+            _PatchCollection(patches, linewidth=0))
+        self.__ax.autoscale_view()
+
+        if xlim:
+            self.__ax.set_xlim(*xlim)
+
+        if ylim:
+            self.__ax.set_ylim(*ylim)
+
+        self.__ax.set_axis_off()
+
+        self.__title = self.figure.suptitle('', fontsize=36)
+        self.__annotation = self.__ax.annotate('',
+                                               xy=(20, 950),
+                                               xycoords='figure pixels',
+                                               fontsize=24)
+        self.__tables = dict()
+
+        self.__dates = None
+        self.__values = None
+        self.__top = None
+
+    def set_variant(self,
+                    report_df: _pd.DataFrame,
+                    column_name: str,
+                    cmap: _colors.Colormap,
+                    norm: _colors.Normalize,
+                    title: str = None,
+                    table_column_name: str = 'Country',
+                    table_column_data: str = 'Cases',
+                    table_as_int: bool = True,
+                    table_x0: float = 0.01,
+                    table_y0: float = 0.01,
+                    report_index: str = 'Name'):
+        '''
+        Prepares the renderer for frames of the particular report column. Values for all dates are joined with shapes,
+        and top-10 shapes are sorted for all dates at once.
+
+        Args:
+            report_df(DataFrame): Report in long-form with 'Date' column.
+            column_name(str): The name of the column to draw.
+            cmap(Colormap): The colormap of shapes colors.
+            norm(Normalize): The normalization of values before mapping them to colors.
+            title(str): The title of frames. This is optional argument.
+            table_column_name(str): The header of the names column in the top-10 table.
+            table_column_data(str): The header of the values column in the top-10 table.
+            table_as_int(bool): A flag indicating whether or not values in the top-10 table should be formatted as integers.
+            table_x0(float): The left position of the top-10 table in axes coordinates.
+            table_y0(float): The bottom position of the top-10 table in axes coordinates.
+            report_index(str): The name of the column with names in report_df, which are joined with shapes names.
+        '''
+
+        (self.__dates, self.__values) = _get_frame_values(report_df, column_name,
+                                                          report_index, self.__names)
+
+        # Top shapes for every date, missing values go last.
+        self.__top = _rank_top(self.__values, _TABLE_SIZE)
+
+        self.__cmap = cmap
+        self.__norm = norm
+        self.__table_header = [table_column_name, table_column_data]
+        self.__table_format = (lambda x: '{:d}'.format(int(x))) if table_as_int else (
+            lambda x: '{:.2f}'.format(float(x)))
+        self.__table_position = (table_x0, table_y0)
+
+        for table in self.__tables.values():
+            table.remove()
+        self.__tables.clear()
+
+        self.__cax.clear()
+        self.figure.colorbar(_cm.ScalarMappable(norm=norm, cmap=cmap),
+                             cax=self.__cax,
+                             orientation='horizontal')
+        self.__title.set_text(title or '')
+        self.figure.tight_layout(pad=0.1)
+
+        # The layout is computed from the current one, so it's rounded to keep frames the same after other variants set before.
+        subplot_params = self.figure.subplotpars
+        self.figure.subplots_adjust(**{
+            name: round(getattr(subplot_params, name), 6)
+            for name in ('left', 'bottom', 'right', 'top')
+        })
+
+    def render(self, day: _pd.Timestamp, annotation_text: str = None):
+        '''
+        Updates the figure for the date.
+
+        Args:
+            day(Timestamp): The date of the frame.
+            annotation_text(str): The annotation of the frame. This is optional argument.
+        '''
+
+        row = self.__dates.get_indexer([day])[0]
+        values = self.__values[row] if row >= 0 else _np.full(
+            len(self.__names), _np.nan)
+
+        # Missing values and values out of the norm domain are not drawn, like in GeoDataFrame.plot.
+        face_colors = self.__cmap(self.__norm(_np.ma.masked_invalid(values)))
+        face_colors[:, 3] *= self.__alpha
+        self.__colors.set_facecolor(face_colors)
+
+        self.__annotation.set_text(annotation_text or '')
+        self.__update_table(values,
+                            self.__top[row] if row >= 0 else _np.array([], dtype=int))
+
+    def get_image(self) -> _np.ndarray:
+        '''
+        Draws the current frame and returns it as RGB image. It's a view on the canvas buffer without copying,
+        so it's valid only until the next frame is drawn.
+        '''
+
+        self.__canvas.draw()
+        return _np.asarray(self.__canvas.buffer_rgba())[:, :, :3]
+
+    def save(self, filepath: str):
+        ''' Saves the current frame to the file. '''
+
+        self.figure.savefig(filepath,
+                            dpi=self.__dpi,
+                            facecolor=self.__background_color)
+
+    def __update_table(self, values: _np.ndarray, top: _np.ndarray):
+        top = top[~_np.isnan(values[top])]
+        count = len(top)
+
+        for table in self.__tables.values():
+            table.set_visible(False)
+
+        if count == 0:
+            return
+
+        table = self.__tables.get(count)
+        if table is None:
+            table = self.__create_table(count)
+            self.__tables[count] = table
+
+        cells = table.get_celld()
+        for row, idx in enumerate(top, start=1):
+            cells[row, 0].get_text().set_text(self.__names[idx])
+            cells[row, 1].get_text().set_text(self.__table_format(values[idx]))
+
+        table.set_visible(True)
+
+    def __create_table(self, count: int):
+        (x0, y0) = self.__table_position
+        table = self.__ax.table(
+            [['', '']] * count,
+            colLabels=self.__table_header,
+            rowLabels=list(range(1, count + 1)),
+            colWidths=[2, 1],
+            cellColours=_np.reshape(_np.repeat(self.__background_color, 2 * count),
+                                    (count, 2)),
+            rowColours=_np.repeat(self.__background_color, count),
+            colColours=_np.repeat(self.__background_color, 2),
+            bbox=[x0, y0, .2, .027 * (count + 1)])
+
+        table.auto_set_font_size(False)
+        table.set_fontsize(10)
+
+        # Cells of a new table are laid out on its first draw, so it's drawn once to make frames independent of
+        # the frames rendered before them, and cached frames the same as rendered ones.
+        self.__canvas.draw()
+
+        return table
+
+
+class _VideoWriter():
+    '''
+    Streams frames to a video file. Frames are encoded by ffmpeg (imageio) in a background thread,
+    and a bounded queue lets rendering and encoding run in parallel with limited memory.
+    '''
+
+    def __init__(self, filepath: str, fps: int = 6, queue_size: int = 4):
+        import imageio
+
+        self.__writer = imageio.get_writer(filepath, mode='I', fps=fps)
+        self.__queue = _queue.Queue(maxsize=queue_size)
+        self.__error = None
+        self.__thread = _threading.Thread(target=self.__encode, daemon=True)
+        self.__thread.start()
+
+    def append(self, image: _np.ndarray):
+        '''
+        Adds a frame to the video. The image is copied once to the queue, so its buffer can be reused right away.
+        Blocks while the queue is full.
+        '''
+
+        if self.__error:
+            raise self.__error
+
+        self.__queue.put(_np.array(image))
+
+    def close(self):
+        ''' Waits for all frames to be encoded and closes the video file. '''
+
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__writer.close()
+
+        if self.__error:
+            raise self.__error
+
+    def __enter__(self) -> '_VideoWriter':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __encode(self):
+        while True:
+            image = self.__queue.get()
+            if image is None:
+                return
+
+            # After an error frames are only taken from the queue, so producer is never blocked.
+            if not self.__error:
+                try:
+                    self.__writer.append_data(image)
+                except Exception as error:
+                    self.__error = error
+
+
+class _MapVariant(_types.NamedTuple):
+    '''
+    Description of an animation variant: frames of one report column drawn on one shapes set.
+    Shapes and report are names of objects in shared data, so variants are cheap to send to worker processes.
+    '''
+
+    name: str
+    ''' The unique name of the variant. Its video and folder with frames have this name. '''
+    shapes: str
+    ''' The name of shapes set (GeoDataFrame) in shared data. '''
+    report: str
+    ''' The name of long-form report in shared data. '''
+    days: _types.List[_pd.Timestamp]
+    ''' Dates of frames. '''
+    renderer_args: dict
+    ''' Arguments of the renderer for the shapes set, see _MapRenderer. '''
+    variant_args: dict
+    ''' Arguments of the variant, see _MapRenderer.set_variant. '''
+
+
+def _init_worker(data: dict):
+    global _worker_data, _worker_maps
+
+    _worker_data = _attach_data(data)
+    _worker_maps = _MapsHelper()
+
+
+def _render_days(variant: _MapVariant, days: _types.List[_pd.Timestamp],
+                 output_root: str, video_root: str, fps: int, cache_root: str,
+                 cached_days: _types.Set[_pd.Timestamp]) -> _types.List[str]:
+    return _worker_maps.render_days(variant, _worker_data, days, output_root,
+                                    video_root, fps, cache_root, cached_days)
+
+
+class _MapsHelper():
+    '''
+    Keeps map renderers, so the figure and shapes are prepared once per shapes set and projection
+    in every process, and schedules frames rendering of many animation variants over a process pool.
+    '''
+
+    MapVariant = _MapVariant
+
+    def __init__(self, path=None):
+        self.__paths = path
+        self.__renderers = dict()
+        self.__variants = dict()
+
+    def prepare_shapes(self,
+                       name: str,
+                       source_path: str,
+                       crs: str,
+                       xlim: _types.Tuple[float, float] = None,
+                       ylim: _types.Tuple[float, float] = None,
+                       columns: _types.List[str] = None,
+                       fix: _types.Callable = None,
+                       version: str = '',
+                       figsize: _types.Tuple[float, float] = (24, 14),
+                       dpi: int = 72):
+        '''
+        Returns shapes prepared for maps: read from the source file, fixed, reprojected, clipped to the axes limits
+        and simplified with the tolerance of half a pixel of the frame, so shapes keep the look and have much less points.
+        Neighbour shapes keep shared borders where shapely supports coverage simplification.
+        Prepared shapes are cached by the hash of source files and arguments, so the source is read only when it changes.
+        Source files are hashed only when their sizes or modification times have changed.
+
+        Args:
+            name(str): The name of the shapes set, e.g. 'world' or 'europe'. It's the name of the cache file.
+            source_path(str): The path to the source file, e.g. a shapefile.
+            crs(str): The projection of prepared shapes, e.g. 'epsg:4326'.
+            xlim((float, float)): Limits of x axis of maps in the projection. If not specified, then shapes bounds are used.
+            ylim((float, float)): Limits of y axis of maps in the projection. If not specified, then shapes bounds are used.
+            columns(list(str)): Columns to keep besides geometry. If not specified, then all are kept.
+            fix(callable(GeoDataFrame)): Function that fixes shapes read from the source (e.g. renames them) and returns them.
+            version(str): The version of fix function. It should be changed when fix is changed, since functions aren't a part of the cache key.
+            figsize((float, float)): The size of maps in inches, see _MapRenderer.
+            dpi(int): The resolution of maps, see _MapRenderer.
+
+        Returns:
+            GeoDataFrame with prepared shapes.
+        '''
+
+        extent = (tuple(xlim), tuple(ylim)) if xlim and ylim else None
+        return _prepare_shapes(self.__paths.get_shapes_path(name),
+                               source_path, crs, extent, columns, fix, version,
+                               tuple(figsize), dpi)
+
+    def get_renderer(self, name: str, shape_df, **kwargs) -> _MapRenderer:
+        '''
+        Returns a renderer for the shapes set. It's created on the first call for the shapes set name and projection.
+
+        Args:
+            name(str): The name of the shapes set, e.g. 'world' or 'europe'.
+            shape_df(GeoDataFrame): Shapes to draw. They should be already in the required projection.
+            kwargs: Other arguments of the renderer, see _MapRenderer.
+
+        Returns:
+            The renderer for the shapes set.
+        '''
+
+        key = (name, str(shape_df.crs))
+        renderer = self.__renderers.get(key)
+
+        if renderer is None:
+            renderer = _MapRenderer(shape_df, **kwargs)
+            self.__renderers[key] = renderer
+
+        return renderer
+
+    def render_days(self,
+                    variant: _MapVariant,
+                    data: dict,
+                    days: _types.List[_pd.Timestamp] = None,
+                    output_root: str = './temp',
+                    video_root: str = None,
+                    fps: int = 6,
+                    cache_root: str = None,
+                    cached_days: _types.Collection[_pd.Timestamp] = ()) -> _types.List[str]:
+        '''
+        Renders frames of the variant in the current process. Frames are streamed from the canvas buffer
+        to '<video_root>/<variant name>.mp4' video, and/or saved as '<output_root>/<variant name>/<yyyy-mm-dd>.jpg' files.
+
+        Args:
+            variant(MapVariant): The variant to render.
+            data(dict): Shared data with shapes sets and reports used by the variant.
+            days(list(Timestamp)): Dates of frames to render. If not specified, then all variant days are rendered.
+            output_root(str): The folder to save frames to. If it's None, then frames are not saved.
+            video_root(str): The folder to save the video to. If it's None, then the video is not made.
+            fps(int): The number of frames per second in the video.
+            cache_root(str): The folder of cached frames. Rendered frames are saved as '<cache_root>/<variant name>/<yyyy-mm-dd>.png'.
+                If it's None, then frames are not cached.
+            cached_days(collection(Timestamp)): Dates of frames which are current in the cache. They are read from the cache
+                instead of being rendered, and spliced with rendered frames in the video.
+
+        Returns:
+            Paths of saved frames in the order of days.
+        '''
+
+        folder = None
+        if output_root is not None:
+            folder = _os.path.join(output_root, variant.name)
+            _os.makedirs(folder, exist_ok=True)
+
+        cache_folder = None
+        if cache_root is not None:
+            cache_folder = _os.path.join(cache_root, variant.name)
+            _os.makedirs(cache_folder, exist_ok=True)
+
+        writer = None
+        if video_root is not None:
+            _os.makedirs(video_root, exist_ok=True)
+            writer = _VideoWriter(
+                _os.path.join(video_root, f'{variant.name}.mp4'), fps)
+
+        renderer = None
+        paths = list()
+        try:
+            for day in variant.days if days is None else days:
+                day_text = day.date().strftime('%Y-%m-%d')
+                cache_path = _os.path.join(cache_folder, f'{day_text}.png') if cache_folder else None
+
+                if day in cached_days:
+                    image = _read_image(cache_path)
+
+                    if writer:
+                        writer.append(image)
+
+                    if folder:
+                        paths.append(_os.path.join(folder, f'{day_text}.jpg'))
+                        _write_image(paths[-1], image, 'JPEG')
+                    continue
+
+                # The renderer is prepared only when there are frames to render.
+                if renderer is None:
+                    renderer = self.__get_variant_renderer(variant, data)
+
+                renderer.render(day, day_text)
+
+                if writer or cache_path:
+                    image = renderer.get_image()
+
+                    if writer:
+                        writer.append(image)
+
+                    if cache_path:
+                        _write_image(cache_path, image)
+
+                if folder:
+                    paths.append(_os.path.join(folder, f'{day_text}.jpg'))
+                    renderer.save(paths[-1])
+        finally:
+            if writer:
+                writer.close()
+
+        return paths
+
+    def __get_variant_renderer(self, variant: _MapVariant, data: dict) -> _MapRenderer:
+        renderer = self.get_renderer(variant.shapes, data[variant.shapes],
+                                     **variant.renderer_args)
+
+        # The same renderer is used by the same worker for consecutive chunks of the variant.
+        if self.__variants.get(id(renderer)) != variant.name:
+            renderer.set_variant(data[variant.report], **variant.variant_args)
+            self.__variants[id(renderer)] = variant.name
+
+        return renderer
+
+    def get_frame_keys(self, variant: _MapVariant, data: dict,
+                       shapes_key: str = None) -> _types.List[str]:
+        '''
+        Returns hashes of inputs of the variant frames: values of the frame date joined with shapes, the colormap and
+        the normalization, other arguments of the variant and of the renderer, shapes and the renderer version.
+        A frame with the same hash looks the same, so it doesn't need to be rendered again.
+
+        Args:
+            variant(MapVariant): The variant.
+            data(dict): Shared data with shapes sets and reports used by the variant.
+            shapes_key(str): The hash of the variant shapes set. If not specified, then it's computed.
+
+        Returns:
+            Hashes of frames in the order of variant days.
+        '''
+
+        shape_df = data[variant.shapes]
+        names = _get_drawn_names(shape_df, variant.renderer_args.get('shape_index', 'ADMIN'))
+        variant_args = dict(variant.variant_args)
+        (dates, values) = _get_frame_values(data[variant.report], variant_args['column_name'],
+                                            variant_args.get('report_index', 'Name'), names)
+
+        variant_key = _hash_inputs(_RENDERER_VERSION, shapes_key or _hash_shapes(shape_df),
+                                   names, variant.renderer_args, variant_args)
+
+        rows = dates.get_indexer(variant.days)
+        return [
+            _hash_inputs(variant_key, day, values[row] if row >= 0 else None)
+            for day, row in zip(variant.days, rows)
+        ]
+
+    def render_frames(
+        self,
+        variants: _types.List[_MapVariant],
+        data: dict,
+        output_root: str = None,
+        video_root: str = None,
+        fps: int = 6,
+        workers: int = None,
+        chunk_size: int = 16,
+        progress: _types.Callable[[int, int], None] = None,
+        on_variant_done: _types.Callable[[str, _types.List[str]], None] = None,
+        use_cache: bool = False
+    ) -> _types.Dict[str, _types.List[str]]:
+        '''
+        Renders frames of all variants in a process pool. Every worker keeps its renderers between tasks.
+        Reports of shared data are published in shared memory, so workers attach views on them instead of getting copies,
+        and the rest of shared data (shapes) is sent to every worker once when it's started.
+
+        When videos are made, every variant is rendered by one worker, which streams frames to the video encoder.
+        Otherwise every variant is split into chunks of days, and chunks of all variants are rendered in parallel.
+
+        With the cache, frames are rendered only if hashes of their inputs (see get_frame_keys) changed since they were cached,
+        e.g. for new dates, or for all dates of a variant whose color scale moved. Other frames are read from the cache
+        and spliced with rendered ones in videos, and videos whose frames are all the same aren't made again.
+
+        Args:
+            variants(list(MapVariant)): The variants to render. Names of variants should be unique.
+            data(dict): Shared data with shapes sets and reports used by variants.
+            output_root(str): The folder to save frames to, see render_days. Saved frames are useful for debugging.
+            video_root(str): The folder to save videos to, see render_days.
+            fps(int): The number of frames per second in videos.
+            workers(int): The number of worker processes. If not specified, then it's equal to the number of CPUs. Use 1 to render frames in the current process.
+            chunk_size(int): The number of frames rendered by a worker at once, if videos are not made.
+            progress(callable(int, int)): Function that is called with the numbers of rendered and all tasks, when a task is done.
+            on_variant_done(callable(str, list(str))): Function that is called with the variant name and paths of its saved frames when the variant is rendered. It's called for variants in their order.
+            use_cache(bool): A flag indicating whether or not frames should be cached and rendered only when they change. Default is False.
+
+        Returns:
+            Dictionary of variant names and paths of their saved frames in the order of days.
+        '''
+
+        if output_root is None and video_root is None:
+            raise ValueError("Either output_root or video_root should be specified")
+
+        workers = workers if workers else (_os.cpu_count() or 1)
+        if video_root is not None:
+            chunk_size = max([len(variant.days) for variant in variants] + [1])
+
+        cache_root = self.__paths.get_outputs_path('frames') if use_cache else None
+        (cached_days, cache_updates) = self.__check_cache(
+            variants, data, cache_root, output_root, video_root,
+            fps) if use_cache else ([set()] * len(variants), None)
+
+        chunks = [(idx, variant.days[start:start + chunk_size])
+                  for idx, variant in enumerate(variants)
+                  if cached_days[idx] is not None
+                  for start in range(0, len(variant.days), chunk_size)]
+
+        results = [None] * len(chunks)
+        remaining = [0] * len(variants)
+        for idx, _ in chunks:
+            remaining[idx] += 1
+
+        frames = dict()
+
+        def complete_variants():
+            # Variants are completed in order, even if their chunks are rendered out of order.
+            while len(frames) < len(variants) and remaining[len(frames)] == 0:
+                variant_idx = len(frames)
+                variant = variants[variant_idx]
+                frames[variant.name] = [
+                    path for (idx, _), paths in zip(chunks, results)
+                    if idx == variant_idx for path in paths
+                ]
+                if cache_updates:
+                    cache_updates(variant_idx)
+                if on_variant_done:
+                    on_variant_done(variant.name, frames[variant.name])
+
+        def complete_chunk(chunk_idx: int, paths: _types.List[str]):
+            results[chunk_idx] = paths
+            remaining[chunks[chunk_idx][0]] -= 1
+
+            if progress:
+                progress(sum(result is not None for result in results),
+                         len(chunks))
+
+            complete_variants()
+
+        complete_variants()
+
+        if workers <= 1:
+            for chunk_idx, (idx, days) in enumerate(chunks):
+                complete_chunk(
+                    chunk_idx,
+                    self.render_days(variants[idx], data, days, output_root,
+                                     video_root, fps, cache_root, cached_days[idx]))
+
+            return frames
+
+        context = _mp.get_context(
+            'fork') if 'fork' in _mp.get_all_start_methods() else None
+
+        with _SharedData(data) as shared_data, _futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(shared_data.data, )) as executor:
+            futures = {
+                executor.submit(_render_days, variants[idx], days, output_root,
+                                video_root, fps, cache_root,
+                                cached_days[idx].intersection(days)): chunk_idx
+                for chunk_idx, (idx, days) in enumerate(chunks)
+            }
+
+            for future in _futures.as_completed(futures):
+                complete_chunk(futures[future], future.result())
+
+        return frames
+
+    def __check_cache(self, variants: _types.List[_MapVariant], data: dict,
+                      cache_root: str, output_root: str, video_root: str,
+                      fps: int):
+        '''
+        Returns dates of current cached frames of every variant (or None if the variant doesn't need to be rendered at all),
+        and the function which records frames and the video of the variant in the cache, when the variant is rendered.
+        '''
+
+        cache = _OutputsCache(_os.path.join(cache_root, 'frames.json'))
+        shapes_keys = dict()
+        cached_days = list()
+        rendered = list()
+
+        for variant in variants:
+            if variant.shapes not in shapes_keys:
+                shapes_keys[variant.shapes] = _hash_shapes(data[variant.shapes])
+
+            keys = self.get_frame_keys(variant, data, shapes_keys[variant.shapes])
+            paths = [
+                _os.path.join(cache_root, variant.name, f"{day.date().strftime('%Y-%m-%d')}.png")
+                for day in variant.days
+            ]
+            current = [cache.is_current(path, key) for path, key in zip(paths, keys)]
+
+            # The video depends only on its frames, so it's kept when all frames are current.
+            video = None
+            if video_root is not None:
+                video = (_os.path.join(video_root, f'{variant.name}.mp4'), _hash_inputs(keys, fps))
+
+            if all(current) and output_root is None and video and cache.is_current(*video):
+                cached_days.append(None)
+                rendered.append(None)
+                continue
+
+            cached_days.append({day for day, is_current in zip(variant.days, current) if is_current})
+            rendered.append(([(path, key) for path, key, is_current in zip(paths, keys, current)
+                              if not is_current], video))
+
+            # Outputs which are going to be replaced are forgotten, so they aren't taken for current ones after a failure.
+            for path, _ in rendered[-1][0] + ([video] if video else []):
+                cache.update(path, None)
+
+        cache.save()
+
+        def update(variant_idx: int):
+            if rendered[variant_idx] is None:
+                return
+
+            (frames, video) = rendered[variant_idx]
+            for path, key in frames + ([video] if video else []):
+                cache.update(path, key)
+            cache.save()
+
+        return cached_days, update
+
+    def clear(self):
+        ''' Removes all renderers. '''
+        self.__renderers.clear()
+        self.__variants.clear()
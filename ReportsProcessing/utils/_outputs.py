@@ -0,0 +1,147 @@
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import typing as _types
+import numpy as _np
+import pandas as _pd
+from matplotlib import colors as _colors
+
+from ._cache import _write_atomically
+
+
+def _update_digest(digest, value):
+    ''' Feeds the value to the digest. Values of the same content give the same bytes regardless of their identity. '''
+
+    if isinstance(value, _pd.DataFrame):
+        digest.update(repr((list(value.columns), list(map(str, value.dtypes)), value.shape)).encode())
+        digest.update(_pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, _pd.Series):
+        digest.update(repr((value.name, str(value.dtype), value.shape)).encode())
+        digest.update(_pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, _pd.Index):
+        digest.update(_pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, _np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        if value.dtype == object:
+            digest.update(_pd.util.hash_array(value.ravel()).tobytes())
+        else:
+            digest.update(_np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, _colors.Colormap):
+        # Colormaps are compared by their colors, so equal colormaps built in different runs give the same hash.
+        digest.update(repr((type(value).__name__, value.N)).encode())
+        digest.update(_np.ascontiguousarray(value(_np.arange(value.N))).tobytes())
+        digest.update(repr((value.get_bad(), value.get_under(), value.get_over())).encode())
+    elif isinstance(value, _colors.Normalize):
+        digest.update(repr((type(value).__name__, value.vmin, value.vmax, value.clip,
+                            getattr(value, 'vcenter', None),
+                            getattr(value, 'boundaries', None))).encode())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value, key=repr):
+            _update_digest(digest, key)
+            _update_digest(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update_digest(digest, item)
+        digest.update(b']')
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b';')
+
+
+def _hash_inputs(*values) -> str:
+    '''
+    Returns the hash of inputs of an output (e.g. a frame or a chart): DataFrames, Series and arrays are hashed by content,
+    colormaps by their colors, normalizations by their parameters, containers recursively, and other values by repr.
+    '''
+
+    digest = _hashlib.sha256()
+    for value in values:
+        _update_digest(digest, value)
+
+    return digest.hexdigest()
+
+
+class _OutputsCache():
+    '''
+    Keeps hashes of inputs of rendered outputs in a manifest file, so outputs whose inputs didn't change aren't rendered again.
+    Outputs are files, and an output is current if it exists and it was rendered from inputs with the same hash.
+
+    Entries are changed in memory and written by save, which merges them into the manifest on disk,
+    so outputs of the same manifest can be rendered by different helpers.
+    '''
+
+    def __init__(self, manifest_path: str):
+        self.__manifest_path = manifest_path
+        self.__root = _os.path.dirname(manifest_path)
+        self.__hashes = self.__read()
+        self.__changes = dict()
+
+    def __read(self) -> _types.Dict[str, str]:
+        try:
+            with open(self.__manifest_path, 'r', encoding='utf-8') as manifest_file:
+                return _json.load(manifest_file)
+        except (OSError, ValueError):
+            return dict()
+
+    def __get_key(self, filepath: str) -> str:
+        return _os.path.relpath(_os.path.abspath(filepath), self.__root).replace(_os.sep, '/')
+
+    def is_current(self, filepath: str, key: str) -> bool:
+        ''' Returns whether or not the output file exists and it was rendered from inputs with the hash. '''
+
+        return self.__hashes.get(self.__get_key(filepath)) == key and _os.path.exists(filepath)
+
+    def update(self, filepath: str, key: str = None):
+        '''
+        Sets the hash of inputs of the output file. Use None to forget the output, e.g. before it's rendered again,
+        so an output left incomplete by a failure isn't taken for a current one.
+        '''
+
+        name = self.__get_key(filepath)
+        self.__changes[name] = key
+        if key is None:
+            self.__hashes.pop(name, None)
+        else:
+            self.__hashes[name] = key
+
+    def save(self):
+        ''' Writes changed entries to the manifest file. '''
+
+        if not self.__changes:
+            return
+
+        hashes = self.__read()
+        for name, key in self.__changes.items():
+            if key is None:
+                hashes.pop(name, None)
+            else:
+                hashes[name] = key
+        self.__changes.clear()
+
+        _write_atomically(self.__manifest_path, 'w',
+                          lambda manifest_file: _json.dump(hashes, manifest_file, indent=1, sort_keys=True))
+
+
+def _read_image(filepath: str) -> _np.ndarray:
+    ''' Reads an RGB image saved by _write_image. '''
+
+    from PIL import Image
+
+    with Image.open(filepath) as image:
+        return _np.asarray(image.convert('RGB'))
+
+
+def _write_image(filepath: str, image: _np.ndarray, image_format: str = 'PNG'):
+    ''' Saves an RGB image. PNG is lossless, so cached frames are the same as rendered ones. '''
+
+    from PIL import Image
+
+    # Files are replaced at once, so a reader never gets a partially written image.
+    _write_atomically(
+        filepath, 'wb',
+        lambda image_file: Image.fromarray(_np.ascontiguousarray(image)).save(
+            image_file, format=image_format, **(dict(compress_level=1) if image_format == 'PNG' else dict())),
+        ignore_errors=False)
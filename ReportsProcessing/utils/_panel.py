@@ -0,0 +1,313 @@
+import typing as _types
+import numpy as _np
+import pandas as _pd
+
+from ._cache import _COMPACT_TYPES, _get_dates_mask, _open_npz, _save_npz
+from ._instrumentation import _instrumented
+
+_DATE_COLUMN = 'Date'
+
+
+class _ReportsPanel():
+    '''
+    Dense date × entity × metric store for a set of reports (all countries, or all regions of a country).
+
+    Values are kept in one float64 array over a global calendar, with a presence mask that remembers
+    which dates every entity report actually contains. Long-form and wide-form DataFrames
+    are built from slices of this array, so whole-world queries don't need to read and concat
+    a file per entity.
+
+    NaN values are replaced with '0' in DataFrames, like in reports returned by bulk methods.
+    Pass fill_nan=False to keep them, e.g. for moving averages.
+    '''
+
+    VERSION = 1
+
+    def __init__(self, dates: _np.ndarray, entities: _types.List[str],
+                 metrics: _types.List[str], dtypes: _types.List[str],
+                 values: _np.ndarray, present: _np.ndarray,
+                 fill_nan: bool = True):
+        self.dates = dates
+        self.entities = list(entities)
+        self.metrics = list(metrics)
+        self.dtypes = list(dtypes)
+        self.values = values
+        self.present = present
+        self.fill_nan = fill_nan
+        self.entity_index = {
+            entity: idx
+            for idx, entity in enumerate(self.entities)
+        }
+        self.metric_index = {
+            metric: idx
+            for idx, metric in enumerate(self.metrics)
+        }
+
+    @staticmethod
+    @_instrumented
+    def build(
+        reports: _types.Iterable[_types.Tuple[str, _pd.DataFrame]]
+    ) -> '_ReportsPanel':
+        '''
+        Builds a panel from reports.
+
+        Args:
+            reports(iterable((str, DataFrame))): Pairs of entity name and its report. Date should be a regular column.
+
+        Returns:
+            A new panel with entities in the same order as reports.
+        '''
+
+        reports = list(reports)
+        entities = [name for name, _ in reports]
+
+        if reports:
+            first_df = reports[0][1]
+            metrics = [c for c in first_df.columns if c != _DATE_COLUMN]
+            dtypes = [first_df[c].dtype.str for c in metrics]
+            dates = _np.unique(
+                _np.concatenate([
+                    df[_DATE_COLUMN].to_numpy(dtype='datetime64[ns]')
+                    for _, df in reports
+                ]))
+        else:
+            metrics, dtypes = list(), list()
+            dates = _np.array([], dtype='datetime64[ns]')
+
+        values = _np.full((len(dates), len(entities), len(metrics)), _np.nan)
+        present = _np.zeros((len(dates), len(entities)), dtype=bool)
+
+        for idx, (_, df) in enumerate(reports):
+            rows = _np.searchsorted(
+                dates, df[_DATE_COLUMN].to_numpy(dtype='datetime64[ns]'))
+            values[rows, idx, :] = df[metrics].to_numpy(dtype=float)
+            present[rows, idx] = True
+
+        return _ReportsPanel(dates, entities, metrics, dtypes, values, present)
+
+    @staticmethod
+    @_instrumented
+    def load(
+        filepath: str,
+        fill_nan: bool = True
+    ) -> _types.Tuple[_types.Optional['_ReportsPanel'], _types.Optional[_np.ndarray]]:
+        '''
+        Loads a panel from the file.
+
+        Args:
+            filepath(str): The path to the panel file.
+            fill_nan(bool): A flag indicating whether or not NaN values should be replaced with '0' in DataFrames.
+
+        Returns:
+            A tuple of panel and sizes and modification times of the source reports it was built from,
+            or (None, None) if the file doesn't exist or it was saved by another version.
+        '''
+
+        try:
+            with _open_npz(filepath) as data:
+                if data['version'] != _ReportsPanel.VERSION:
+                    return None, None
+
+                return _ReportsPanel(data['dates'], data['entities'],
+                                     data['metrics'], data['dtypes'],
+                                     data['values'], data['present'],
+                                     fill_nan), data['sources']
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    @_instrumented
+    def update(
+        self, reports: _types.Iterable[_types.Tuple[str, _pd.DataFrame]]
+    ) -> _types.Tuple['_ReportsPanel', _types.Optional[_pd.Timestamp]]:
+        '''
+        Replaces reports of some entities. The calendar is extended with new dates of the reports,
+        and the rest of entities are copied as is, so only changed reports need to be read.
+
+        Args:
+            reports(iterable((str, DataFrame))): Pairs of entity name and its new report. Date should be a regular column.
+
+        Returns:
+            A tuple of new panel and the earliest date for which values have changed, or None if nothing has changed.
+        '''
+
+        reports = list(reports)
+        dates = _np.unique(
+            _np.concatenate([self.dates] + [
+                df[_DATE_COLUMN].to_numpy(dtype='datetime64[ns]')
+                for _, df in reports
+            ]))
+
+        values = _np.full((len(dates), ) + self.values.shape[1:], _np.nan)
+        present = _np.zeros((len(dates), ) + self.present.shape[1:],
+                            dtype=bool)
+        rows = _np.searchsorted(dates, self.dates)
+        values[rows] = self.values
+        present[rows] = self.present
+
+        changed = _np.zeros(len(dates), dtype=bool)
+        for name, df in reports:
+            idx = self.entity_index[name]
+            entity_values = _np.full((len(dates), len(self.metrics)), _np.nan)
+            entity_present = _np.zeros(len(dates), dtype=bool)
+
+            rows = _np.searchsorted(
+                dates, df[_DATE_COLUMN].to_numpy(dtype='datetime64[ns]'))
+            entity_values[rows] = df[self.metrics].to_numpy(dtype=float)
+            entity_present[rows] = True
+
+            same_values = (values[:, idx] == entity_values) | (
+                _np.isnan(values[:, idx]) & _np.isnan(entity_values))
+            changed |= (present[:, idx] !=
+                        entity_present) | ~same_values.all(axis=1)
+
+            values[:, idx] = entity_values
+            present[:, idx] = entity_present
+
+        changed_since = _pd.Timestamp(
+            dates[_np.argmax(changed)]) if changed.any() else None
+
+        return _ReportsPanel(dates, self.entities, self.metrics, self.dtypes,
+                             values, present, self.fill_nan), changed_since
+
+    def save(self, filepath: str, sources: _np.ndarray):
+        '''
+        Saves the panel to the file.
+
+        Args:
+            filepath(str): The path to the panel file.
+            sources(ndarray): Sizes and modification times of the source reports the panel was built from.
+        '''
+
+        _save_npz(filepath,
+                  dict(version=_np.array(_ReportsPanel.VERSION),
+                       sources=sources,
+                       dates=self.dates,
+                       entities=_np.array(self.entities, dtype=str),
+                       metrics=_np.array(self.metrics, dtype=str),
+                       dtypes=_np.array(self.dtypes, dtype=str),
+                       values=self.values,
+                       present=self.present))
+
+    def has_entities(self, entities: _types.List[str]) -> bool:
+        ''' Returns True if all entities are stored in the panel. '''
+        return all(entity in self.entity_index for entity in entities)
+
+    def __get_dates_mask(self, start_date: _pd.Timestamp,
+                         end_date: _pd.Timestamp) -> _np.ndarray:
+        mask = _get_dates_mask(self.dates, start_date, end_date)
+        return _np.ones(len(self.dates), dtype=bool) if mask is None else mask
+
+    @_instrumented
+    def to_long_form(self,
+                     entities: _types.List[str],
+                     columns: _types.List[str] = None,
+                     start_date: _pd.Timestamp = None,
+                     end_date: _pd.Timestamp = None,
+                     compact: bool = False) -> _pd.DataFrame:
+        '''
+        Returns a long-form DataFrame for the entities. It's equal to the concatenation of entities reports,
+        where every row is marked with the entity name in the 'Name' column. NaN values replaced with '0'.
+
+        Args:
+            entities(list(str)): The entities to include in dataframe.
+            columns(list(str)): The metrics to include in dataframe. If not specified, then all are included.
+            start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+            compact(bool): A flag indicating whether or not compact dtypes should be used, and 'Name' should be categorical.
+
+        Returns:
+            Dataframe with 'Date', metrics and 'Name' columns. Index is a row number in the entity report.
+        '''
+
+        columns = self.metrics if columns is None else [
+            column for column in columns if column != _DATE_COLUMN
+        ]
+        entities_idx = [self.entity_index[e] for e in entities]
+        metrics_idx = [self.metric_index[c] for c in columns]
+
+        # Entity-major order, the same as the concatenation of reports.
+        present = self.present[:, entities_idx].T
+        row_numbers = _np.cumsum(present, axis=1) - 1
+        mask = present & self.__get_dates_mask(start_date,
+                                               end_date)[_np.newaxis, :]
+
+        entities_pos, dates_pos = _np.nonzero(mask)
+        values = self.values[dates_pos[:, _np.newaxis],
+                             _np.array(entities_idx)[entities_pos][:, _np.newaxis],
+                             _np.array(metrics_idx)[_np.newaxis, :]]
+
+        df = _pd.DataFrame(
+            {_DATE_COLUMN: self.dates[dates_pos]},
+            index=_pd.Index(row_numbers[entities_pos, dates_pos]))
+
+        for pos, column in enumerate(columns):
+            df[column] = self.__to_dtype(values[:, pos],
+                                         self.metric_index[column], compact)
+
+        if compact:
+            df['Name'] = _pd.Categorical.from_codes(entities_pos,
+                                                    categories=entities)
+        else:
+            df['Name'] = _np.array(entities, dtype=object)[entities_pos]
+
+        return df
+
+    @_instrumented
+    def to_wide_form(self,
+                     entities: _types.List[str],
+                     column: str,
+                     start_date: _pd.Timestamp = None,
+                     end_date: _pd.Timestamp = None,
+                     compact: bool = False) -> _pd.DataFrame:
+        '''
+        Returns a wide-form DataFrame for the particular metric(column) of the entities.
+        It's equal to the concatenation of entities reports series along columns. NaN values replaced with '0'.
+
+        Args:
+            entities(list(str)): The entities to include in dataframe.
+            column(str): The metric to include in dataframe.
+            start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+            compact(bool): A flag indicating whether or not compact dtype should be used.
+
+        Returns:
+            Dataframe with date as index and entities as columns.
+        '''
+
+        entities_idx = [self.entity_index[e] for e in entities]
+        metric_idx = self.metric_index[column]
+
+        present = self.present[:, entities_idx]
+        dates_mask = self.__get_dates_mask(start_date,
+                                           end_date) & present.any(axis=1)
+        present = present[dates_mask]
+        values = self.values[dates_mask][:, entities_idx, metric_idx]
+
+        df = _pd.DataFrame(
+            {
+                entity: self.__to_dtype(values[:, pos], metric_idx, compact)
+                if compact or present[:, pos].all() else self.__fill_nan(
+                    values[:, pos])
+                for pos, entity in enumerate(entities)
+            },
+            index=_pd.DatetimeIndex(self.dates[dates_mask], name=_DATE_COLUMN),
+            columns=entities)
+
+        return df
+
+    def __to_dtype(self,
+                   values: _np.ndarray,
+                   metric_idx: int,
+                   compact: bool = False) -> _np.ndarray:
+        dtype = _np.dtype(self.dtypes[metric_idx])
+        if compact:
+            compact_dtype = _np.dtype(
+                _COMPACT_TYPES.get(self.metrics[metric_idx], dtype))
+            # Averages of counters are fractional, so they are kept as floats.
+            dtype = compact_dtype if compact_dtype.kind == dtype.kind else _np.dtype(
+                _np.float32)
+
+        return self.__fill_nan(values).astype(dtype)
+
+    def __fill_nan(self, values: _np.ndarray) -> _np.ndarray:
+        return _np.nan_to_num(values) if self.fill_nan else values
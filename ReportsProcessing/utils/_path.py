@@ -4,11 +4,17 @@ import os as _os
 
 class __PathHelper():
     def __init__(self):
-        root = _os.path.abspath(
+        # The data folder can be replaced, e.g. with a generated reports tree for benchmarks.
+        root = _os.environ.get("REPORTS_DATA_ROOT") or _os.path.abspath(
             _os.path.join(_os.path.dirname(__file__), "..", "data"))
+        self._reports_root = _os.path.join(root, "reports")
         self._countries_root = _os.path.join(root, "reports", "countries")
         self._daily_root = _os.path.join(root, "reports", "dayByDay")
+        self._cache_root = _os.path.join(root, "reports", ".cache")
         self._stats_root = _os.path.join(root, "stats")
+        # Lookup tables are kept in the repository, not in the data folder.
+        self._misc_root = _os.path.abspath(
+            _os.path.join(_os.path.dirname(__file__), "..", "..", "Data"))
 
     def get_country_report_path(self, country: str) -> str:
         return _os.path.join(self._countries_root, country, country + ".csv")
@@ -28,6 +34,15 @@ class __PathHelper():
         return _os.listdir(
             _os.path.join(self._countries_root, country, "regions"))
 
+    def get_countries_root(self) -> str:
+        return self._countries_root
+
+    def get_country_regions_root(self, country: str) -> str:
+        return _os.path.join(self._countries_root, country, "regions")
+
+    def get_daily_root(self) -> str:
+        return self._daily_root
+
     def get_countries_stats_path(self) -> str:
         return _os.path.join(self._stats_root, "countries.csv")
 
@@ -38,3 +53,45 @@ class __PathHelper():
                                         province: str) -> str:
         return _os.path.join(self._stats_root, country, province,
                              "counties.csv")
+
+    def get_misc_data_path(self, name: str) -> str:
+        return _os.path.join(self._misc_root, name)
+
+    def get_cache_root(self) -> str:
+        return self._cache_root
+
+    def get_cache_path(self, report_path: str) -> str:
+        relative_path = _os.path.relpath(report_path, self._reports_root)
+        return _os.path.join(self._cache_root,
+                             _os.path.splitext(relative_path)[0] + ".npz")
+
+    def get_catalog_path(self) -> str:
+        return _os.path.join(self._cache_root, "catalog.json")
+
+    def get_panel_path(self, country: str = None) -> str:
+        if country:
+            return _os.path.join(self._cache_root, "panels", country,
+                                 "regions.npz")
+
+        return _os.path.join(self._cache_root, "panels", "countries.npz")
+
+    def get_aggregate_path(self, transform: str, country: str = None) -> str:
+        if country:
+            return _os.path.join(self._cache_root, "aggregates", country,
+                                 "regions", transform + ".npz")
+
+        return _os.path.join(self._cache_root, "aggregates", "countries",
+                             transform + ".npz")
+
+    def get_outputs_path(self, name: str) -> str:
+        return _os.path.join(self._cache_root, "outputs", name)
+
+    def get_shapes_path(self, name: str) -> str:
+        return _os.path.join(self._cache_root, "shapes", name + ".npz")
+
+    def get_rollup_path(self, country: str = None) -> str:
+        if country:
+            return _os.path.join(self._cache_root, "rollups", country,
+                                 "regions.npz")
+
+        return _os.path.join(self._cache_root, "rollups", "countries.npz")
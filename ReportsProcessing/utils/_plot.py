@@ -1,12 +1,84 @@
+import os as _os
+import time as _time
+import typing as _types
+import multiprocessing as _mp
+from concurrent import futures as _futures
 from matplotlib import figure as _figure, colors as _colors
+from matplotlib.backends.backend_agg import FigureCanvasAgg as _FigureCanvasAgg
 import pandas as _pd
 import numpy as _np
 
+from ._catalog import _Catalog
+from ._dates import _Dates
+from ._instrumentation import _instrumented, _instrumented_class
+from ._outputs import _OutputsCache, _hash_inputs
+
 # TODO: REWORK IT COMPLETELY
 
+_RT_CMAP = _colors.LinearSegmentedColormap.from_list(
+    'test', [(0, 'darkGreen'), (0.2, 'forestgreen'), (0.4, 'yellowgreen'),
+             (0.5, 'gold'), (0.7, 'orange'), (0.9, 'orangered'),
+             (1, 'crimson')])
+_RT_NORM = _colors.TwoSlopeNorm(1, 0.6, 1.4)
+
+_CHANGE_COLUMNS = ['Confirmed_Change', 'Recovered_Change', 'Deaths_Change']
+_SMA7_COLUMNS = ['Confirmed_Change', 'Recovered_Change', 'Active', 'Time_To_Resolve']
+_PANELS = ['daily', 'active', 'weekly', 'monthly', 'rt', 'ttr']
+# Increase it when dashboards are drawn differently, so cached dashboards are drawn again.
+_RENDERER_VERSION = 1
+
+# Plot helper, prepared reports and the figure template of a dashboards rendering worker process, see _PlotHelper.report_all.
+_worker_helper = None
+_worker_reports = None
+_worker_figure = None
+
+
+def _init_worker(path, reports: dict, helper: '_PlotHelper' = None):
+    '''
+    Prepares the process for drawing reports. Worker processes build their own helper from paths,
+    so the storage with its reports isn't sent to them, and the current process passes its helper.
+    '''
+
+    global _worker_helper, _worker_reports, _worker_figure
+
+    if helper is None and path is not None:
+        helper = _PlotHelper(_Dates(_Catalog(path)), path=path)
+
+    _worker_helper = helper
+    _worker_reports = reports
+    _worker_figure = None
+
+
+def _render_reports(names: _types.List[str], output_root: str,
+                    options: dict) -> _types.Dict[str, float]:
+    global _worker_figure
+
+    if _worker_figure is None:
+        _worker_figure = _worker_helper._create_report_figure(
+            options['figsize'])
+
+    timings = dict()
+    for name in names:
+        _worker_helper._draw_report(_worker_figure, _worker_reports[name],
+                                    options['titles'].get(name, name),
+                                    options['start_date'],
+                                    options['draw_key_dates'], timings,
+                                    _worker_figure.axes)
+
+        start = _time.perf_counter()
+        _worker_figure.savefig(_os.path.join(output_root, f'{name}.png'),
+                               dpi=options['dpi'])
+        timings['save'] = timings.get('save', 0) + _time.perf_counter() - start
+
+    return timings
+
+
+@_instrumented_class
 class _PlotHelper():
-    def __init__(self, dates):
+    def __init__(self, dates, storage=None, path=None):
         self.__dates = dates
+        self.__storage = storage
+        self.__paths = path
 
     def key_russian_dates(self, ax: _figure.Axes):
         pass
@@ -61,25 +133,105 @@ class _PlotHelper():
                           sma_window: int = 7,
                           label: str = None,
                           bar_alpha: float = 0.3,
-                          color: str = None):
+                          color: str = None,
+                          sma: _pd.Series = None):
+        if sma is None:
+            sma = values.rolling(window=sma_window).mean()
+
         if label:
-            ax.plot(values.rolling(window=sma_window).mean(),
+            ax.plot(sma,
                     label=label + "-SMA" + str(sma_window),
                     color=color)
         else:
-            ax.plot(values.rolling(window=sma_window).mean(),color=color)
+            ax.plot(sma,color=color)
 
         ax.bar(values.index, values, alpha=bar_alpha,color=color)
 
-    def _draw_daily_stats(self, ax: _figure.Axes, df: _pd.DataFrame,
+    @_instrumented
+    def _prepare_report(self, df: _pd.DataFrame) -> dict:
+        ''' Computes moving averages, weekly and monthly sums and Rt colors of a report with date as index. '''
+
+        return dict(df=df,
+                    sma={
+                        **{
+                            column: df[column].rolling(window=7).mean()
+                            for column in _SMA7_COLUMNS
+                        }, 'Resolved':
+                        (df.Recovered_Change +
+                         df.Deaths_Change).rolling(window=7).mean(),
+                        'Rt':
+                        df.Rt.rolling(window=3).mean()
+                    },
+                    weekly=df[_CHANGE_COLUMNS].resample("1W").sum(),
+                    monthly=df[_CHANGE_COLUMNS].resample("1M").sum(),
+                    rt_colors=_RT_CMAP(_RT_NORM(df.Rt)),
+                    rt_line_color=_np.array(
+                        _RT_CMAP(_RT_NORM(df.Rt[-7:].mean()))))
+
+    @_instrumented
+    def _prepare_reports(self,
+                         long_df: _pd.DataFrame,
+                         country_name: str = None) -> dict:
+        '''
+        Prepares the same data as _prepare_report for all entities of a long-form report.
+        Moving averages, weekly and monthly sums are read from materialized aggregates (see utils.storage.get_aggregates),
+        so names should be regions of the country, or countries if the country isn't specified.
+        Returns a dictionary of entity names and their prepared reports.
+        '''
+
+        names = list(long_df.Name.unique())
+
+        def by_name(transform, columns):
+            df = self.__storage.get_aggregates(transform,
+                                               country_name,
+                                               include=names,
+                                               columns=columns)
+            return {
+                name: group.drop(columns='Name').set_index('Date')
+                for name, group in df.groupby('Name', sort=False, observed=True)
+            }
+
+        sma = by_name('SMA_7', _SMA7_COLUMNS + ['Deaths_Change'])
+        rt_sma = by_name('SMA_3', ['Rt'])
+        weekly = by_name('W-MON', _CHANGE_COLUMNS)
+        monthly = by_name('M', _CHANGE_COLUMNS)
+        # Weeks are labeled by Monday in aggregates, and by Sunday in dashboards.
+        six_days = self.__dates.to_Timedelta(6)
+
+        reports = dict()
+        for name, df in long_df.groupby('Name', sort=False):
+            df = df.drop(columns='Name').set_index('Date')
+            reports[name] = dict(
+                df=df,
+                sma={
+                    **{
+                        column: sma[name][column]
+                        for column in _SMA7_COLUMNS
+                    }, 'Resolved':
+                    sma[name].Recovered_Change + sma[name].Deaths_Change,
+                    'Rt':
+                    rt_sma[name].Rt
+                },
+                weekly=weekly[name].set_axis(weekly[name].index + six_days),
+                monthly=monthly[name],
+                rt_colors=_RT_CMAP(_RT_NORM(df.Rt)),
+                rt_line_color=_np.array(_RT_CMAP(_RT_NORM(
+                    df.Rt[-7:].mean()))))
+
+        return reports
+
+    def _draw_daily_stats(self, ax: _figure.Axes, report: dict,
                           draw_key_dates: bool):
+        df = report['df']
         index = df.index
         confirmed_daily = df.Confirmed_Change
         recovered_daily = df.Recovered_Change
         deaths_daily = df.Deaths_Change
 
-        self.bar_with_sma_line(ax, confirmed_daily, label="Заболевшие")
-        self.bar_with_sma_line(ax, recovered_daily, label="Выздоровевшие")
+        self.bar_with_sma_line(ax, confirmed_daily, label="Заболевшие",
+                               sma=report['sma']['Confirmed_Change'])
+        self.bar_with_sma_line(ax, recovered_daily, label="Выздоровевшие",
+                               sma=report['sma']['Recovered_Change'])
 
         ax.bar(index,
                deaths_daily,
@@ -87,32 +239,33 @@ class _PlotHelper():
                alpha=0.3,
                bottom=recovered_daily)
         ax.plot(index,
-                (recovered_daily + deaths_daily).rolling(window=7).mean(),
+                report['sma']['Resolved'],
                 label='Смерти-SMA7')
 
         self._setup_axes_for_russian_regions_stat(
             ax, "Статистика день ко дню", draw_key_dates=draw_key_dates)
 
-    def _draw_active_stats(self, ax: _figure.Axes, df: _pd.DataFrame,
+    def _draw_active_stats(self, ax: _figure.Axes, report: dict,
                            draw_key_dates: bool):
-        active = df.Active
+        active = report['df'].Active
 
-        self.bar_with_sma_line(ax, active, label="Больные")
+        self.bar_with_sma_line(ax, active, label="Больные",
+                               sma=report['sma']['Active'])
         self._setup_axes_for_russian_regions_stat(
             ax,
             "Количество больных",
             legend=False,
             draw_key_dates=draw_key_dates)
 
-    def _draw_weekly_stats(self, ax: _figure.Axes, df: _pd.DataFrame,
+    def _draw_weekly_stats(self, ax: _figure.Axes, report: dict,
                            draw_key_dates: bool):
-        self._draw_stats_bar(ax, df.resample("1W").sum())
+        self._draw_stats_bar(ax, report['weekly'])
         self._setup_axes_for_russian_regions_stat(
             ax, "Статистика неделя к неделе", draw_key_dates=draw_key_dates)
 
-    def _draw_monthly_stats(self, ax: _figure.Axes, df: _pd.DataFrame,
+    def _draw_monthly_stats(self, ax: _figure.Axes, report: dict,
                             draw_key_dates: bool):
-        self._draw_stats_bar(ax, df.resample("1M").sum())
+        self._draw_stats_bar(ax, report['monthly'])
         self._setup_axes_for_russian_regions_stat(
             ax, "Статистика месяц к месяцу", draw_key_dates=draw_key_dates)
 
@@ -127,19 +280,11 @@ class _PlotHelper():
         ax.bar(index + one_day, recovered, label='Выздоровевшие', width=2)
         ax.bar(index + one_day * 2, deaths, label='Смерти', width=2)
 
-    def _draw_rt(self, ax, df, draw_key_dates):
-        rt = df.Rt
-
-        cmap = _colors.LinearSegmentedColormap.from_list(
-            'test', [(0, 'darkGreen'), (0.2, 'forestgreen'),
-                     (0.4, 'yellowgreen'), (0.5, 'gold'), (0.7, 'orange'),
-                     (0.9, 'orangered'), (1, 'crimson')])
-        norm = _colors.TwoSlopeNorm(1, 0.6, 1.4)
-        colors = cmap(norm(rt))
-        line_color = _np.array(cmap(norm(df.Rt[-7:].mean())))
+    def _draw_rt(self, ax, report, draw_key_dates):
+        rt = report['df'].Rt
 
-        ax.bar(rt.index, rt.values, color=colors, alpha=0.3)
-        ax.plot(rt.index, rt.rolling(window=3).mean(), color=line_color)
+        ax.bar(rt.index, rt.values, color=report['rt_colors'], alpha=0.3)
+        ax.plot(rt.index, report['sma']['Rt'], color=report['rt_line_color'])
 
         ax.set_ylim(top=2)
 
@@ -150,35 +295,180 @@ class _PlotHelper():
         ax.set_ylim(bottom=0.6)
         ax.axhline(1, color='Red', linestyle='dashed', alpha=0.6)
 
-    def _draw_ttr(self, ax: _figure.Axes, df: _pd.DataFrame,
+    def _draw_ttr(self, ax: _figure.Axes, report: dict,
                   draw_key_dates: bool):
-        ttr = df.Time_To_Resolve
-        self.bar_with_sma_line(ax, ttr)
+        ttr = report['df'].Time_To_Resolve
+        self.bar_with_sma_line(ax, ttr, sma=report['sma']['Time_To_Resolve'])
         self._setup_axes_for_russian_regions_stat(
             ax,
             "Дней до исхода заражения",
             legend=False,
             draw_key_dates=draw_key_dates)
 
-    def report(self,
-               fig: _figure.Figure,
-               df: _pd.DataFrame,
-               name: str = None,
-               start_date: _pd.Timestamp = None,
-               draw_key_dates: bool = False):
+    def _create_report_figure(self, figsize: _types.Tuple[float, float]) -> _figure.Figure:
+        ''' Creates a figure with axes for report panels, which is reused for many reports. '''
+
+        fig = _figure.Figure(figsize=figsize)
+        _FigureCanvasAgg(fig)
 
+        for i in range(1, 7):
+            fig.add_subplot(3, 2, i)
+
+        return fig
+
+    @_instrumented
+    def _draw_report(self,
+                     fig: _figure.Figure,
+                     report: dict,
+                     name: str = None,
+                     start_date: _pd.Timestamp = None,
+                     draw_key_dates: bool = False,
+                     timings: dict = None,
+                     axes: _types.List[_figure.Axes] = None):
         report_funcs = [
             self._draw_daily_stats, self._draw_active_stats,
             self._draw_weekly_stats, self._draw_monthly_stats, self._draw_rt,
             self._draw_ttr
         ]
 
+        # Axes of the figure template (see _create_report_figure) are cleared and reused, otherwise new ones are added.
         for i in range(1, 7):
-            ax = fig.add_subplot(3, 2, i)
-            report_funcs[i - 1](ax, df, draw_key_dates)
+            start = _time.perf_counter()
+
+            if axes is None:
+                ax = fig.add_subplot(3, 2, i)
+            else:
+                ax = axes[i - 1]
+                ax.clear()
+
+            report_funcs[i - 1](ax, report, draw_key_dates)
 
             if start_date:
                 ax.set_xlim(start_date)
 
+            if timings is not None:
+                panel = _PANELS[i - 1]
+                timings[panel] = timings.get(panel, 0) + _time.perf_counter() - start
+
         if name:
             fig.suptitle(name)
+
+    def report(self,
+               fig: _figure.Figure,
+               df: _pd.DataFrame,
+               name: str = None,
+               start_date: _pd.Timestamp = None,
+               draw_key_dates: bool = False):
+
+        self._draw_report(fig, self._prepare_report(df), name, start_date,
+                          draw_key_dates)
+
+    def report_all(self,
+                   country_name: str,
+                   output_root: str,
+                   start_date: _pd.Timestamp = None,
+                   draw_key_dates: bool = False,
+                   country_title: str = None,
+                   workers: int = None,
+                   figsize: _types.Tuple[float, float] = (24, 24),
+                   dpi: int = 72,
+                   use_cache: bool = False) -> _types.Dict[str, float]:
+        '''
+        Draws report dashboards for the country and all its regions and saves them as '<output_root>/<name>.png'.
+
+        Moving averages, weekly and monthly sums are read from materialized aggregates of the storage, and Rt colors
+        are computed before drawing. Dashboards are drawn in a process pool, where every worker gets only paths and prepared reports, and reuses one figure for all its reports.
+
+        Args:
+            country_name(str): The name of the country.
+            output_root(str): The folder to save dashboards to.
+            start_date(Timestamp): The date from which dashboards should be started.
+            draw_key_dates(bool): A flag indicating whether or not key Russian dates should be drawn.
+            country_title(str): The title of the country dashboard. If not specified, then the name of the country is used.
+            workers(int): The number of worker processes. If not specified, then it's equal to the number of CPUs. Use 1 to draw dashboards in the current process.
+            figsize((float, float)): The size of dashboards in inches.
+            dpi(int): The resolution of dashboards.
+            use_cache(bool): A flag indicating whether or not dashboards should be drawn only when hashes of their inputs
+                (prepared report, options and the renderer version) changed since they were saved. Default is False.
+
+        Returns:
+            Dictionary with the total time (in seconds) spent on every panel ('daily', 'active', 'weekly', 'monthly', 'rt', 'ttr')
+            and on saving ('save') by all workers.
+        '''
+
+        # Reports are read as is, since NaN values are meaningful for Rt.
+        reports = self._prepare_reports(
+            _pd.concat([
+                self.__storage.get_region_report(
+                    country_name, region,
+                    date_is_index=False).assign(Name=region)
+                for region in self.__storage.get_country_regions(country_name)
+            ]), country_name)
+        reports.update(
+            self._prepare_reports(
+                self.__storage.get_country_report(
+                    country_name, date_is_index=False).assign(Name=country_name)))
+
+        options = dict(titles={country_name: country_title or country_name},
+                       start_date=start_date,
+                       draw_key_dates=draw_key_dates,
+                       figsize=figsize,
+                       dpi=dpi)
+
+        _os.makedirs(output_root, exist_ok=True)
+
+        names = [country_name] + [name for name in reports if name != country_name]
+
+        cache = None
+        if use_cache:
+            cache = _OutputsCache(self.__paths.get_outputs_path('dashboards.json'))
+            key_dates = self.__dates.get_key_russian_dates() if draw_key_dates else None
+            keys = {
+                name: _hash_inputs(_RENDERER_VERSION, reports[name],
+                                   options['titles'].get(name, name),
+                                   {key: value for key, value in options.items() if key != 'titles'},
+                                   key_dates)
+                for name in names
+            }
+            names = [
+                name for name in names
+                if not cache.is_current(_os.path.join(output_root, f'{name}.png'), keys[name])
+            ]
+
+            # Dashboards which are going to be replaced are forgotten, so they aren't taken for current ones after a failure.
+            for name in names:
+                cache.update(_os.path.join(output_root, f'{name}.png'))
+            cache.save()
+
+        workers = min(workers if workers else (_os.cpu_count() or 1), len(names))
+        chunks = [names[idx::workers] for idx in range(workers)]
+
+        if not names:
+            results = list()
+        elif workers <= 1:
+            _init_worker(self.__paths, reports, self)
+            try:
+                results = [_render_reports(names, output_root, options)]
+            finally:
+                _init_worker(None, None)
+        else:
+            context = _mp.get_context(
+                'fork') if 'fork' in _mp.get_all_start_methods() else None
+
+            with _futures.ProcessPoolExecutor(max_workers=workers,
+                                              mp_context=context,
+                                              initializer=_init_worker,
+                                              initargs=(self.__paths, reports)) as executor:
+                results = list(
+                    executor.map(_render_reports, chunks,
+                                 [output_root] * workers, [options] * workers))
+
+        if cache:
+            for name in names:
+                cache.update(_os.path.join(output_root, f'{name}.png'), keys[name])
+            cache.save()
+
+        return {
+            panel: sum(result.get(panel, 0) for result in results)
+            for panel in _PANELS + ['save']
+        }
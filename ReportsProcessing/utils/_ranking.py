@@ -0,0 +1,97 @@
+import typing as _types
+import numpy as _np
+import pandas as _pd
+
+from ._cache import _get_dates_mask
+from ._panel import _ReportsPanel
+
+
+def _rank_top(values: _np.ndarray, k: int) -> _np.ndarray:
+    '''
+    Returns indices of k largest values for every row of the matrix in descending order of values.
+    Missing (NaN) values go last, and equal values are ordered by their indices, like in stable sort.
+
+    Only k-th values are found with partition, and then only k selected values of every row are sorted,
+    so it's O(n + k log(k)) per row instead of O(n log(n)) for the full sort.
+    '''
+
+    (rows, columns) = values.shape
+    k = min(k, columns)
+    if k == 0:
+        return _np.empty((rows, 0), dtype=_np.intp)
+
+    keys = _np.where(_np.isnan(values), _np.inf, -values)
+    kth = _np.partition(keys, k - 1, axis=1)[:, k - 1:k]
+
+    # Keys less than k-th are always taken, and the rest is taken from equal keys in order of indices.
+    less = keys < kth
+    equal = keys == kth
+    selected = less | (equal & (_np.cumsum(equal, axis=1) <=
+                                (k - less.sum(axis=1))[:, _np.newaxis]))
+    top = _np.nonzero(selected)[1].reshape(rows, k)
+
+    order = _np.argsort(_np.take_along_axis(keys, top, axis=1),
+                        axis=1,
+                        kind='stable')
+    return _np.take_along_axis(top, order, axis=1)
+
+
+class _RankingIndex():
+    '''
+    Top entities by values of the particular metric for every date of a panel.
+    Rankings of all dates are computed at once, so the top of any date is a lookup of depth entities at most.
+    '''
+
+    def __init__(self, panel: _ReportsPanel, column: str, depth: int):
+        values = _np.where(panel.present,
+                           panel.values[:, :, panel.metric_index[column]],
+                           _np.nan)
+
+        self.panel = panel
+        self.column = column
+        self.depth = depth
+        self.__dates = panel.dates
+        self.__entities = _np.array(panel.entities, dtype=object)
+        self.__dtype = panel.dtypes[panel.metric_index[column]]
+        self.__top = _rank_top(values, depth)
+        self.__values = _np.take_along_axis(values, self.__top, axis=1)
+
+    def top(self, date: _pd.Timestamp, k: int) -> _pd.Series:
+        '''
+        Returns k entities with the largest values on the date as Series, where name is index.
+        Entities without the value on the date are not included.
+        '''
+
+        row = _np.searchsorted(self.__dates, _np.datetime64(_pd.Timestamp(date)))
+        if row == len(self.__dates) or self.__dates[row] != _np.datetime64(
+                _pd.Timestamp(date)):
+            return _pd.Series([], dtype=float, name=self.column)
+
+        values = self.__values[row, :k]
+        mask = ~_np.isnan(values)
+
+        return _pd.Series(values[mask].astype(self.__dtype),
+                          index=_pd.Index(self.__entities[self.__top[row, :k][mask]],
+                                          name='Name'),
+                          name=self.column)
+
+    def to_frame(self,
+                 k: int,
+                 start_date: _pd.Timestamp = None,
+                 end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+        '''
+        Returns top k entities for all dates as a long-form DataFrame with 'Date', 'Rank' (starting from 1), 'Name' and the metric columns.
+        '''
+
+        mask = _get_dates_mask(self.__dates, start_date, end_date)
+        rows = _np.arange(len(self.__dates)) if mask is None else _np.flatnonzero(mask)
+
+        values = self.__values[rows, :k]
+        (rows_pos, ranks) = _np.nonzero(~_np.isnan(values))
+
+        return _pd.DataFrame({
+            'Date': self.__dates[rows[rows_pos]],
+            'Rank': ranks + 1,
+            'Name': self.__entities[self.__top[rows[rows_pos], ranks]],
+            self.column: values[rows_pos, ranks].astype(self.__dtype)
+        })
@@ -0,0 +1,162 @@
+import typing as _types
+import numpy as _np
+import pandas as _pd
+
+from ._instrumentation import _record_file
+from ._panel import _ReportsPanel
+
+_WORLD = 'World'
+# Metrics which can't be summed over entities, they aren't included in rollups.
+_NON_ADDITIVE_METRICS = ('Rt', 'Time_To_Resolve')
+
+
+def _read_continents_relation(iso_path: str,
+                              relation_path: str) -> _types.Dict[str, str]:
+    '''
+    Returns continents of countries by their names in reports. Names are linked to continents
+    by two-letter ISO codes, transcontinental countries get the first continent they are listed for.
+    Returns an empty dictionary if lookup tables can't be read.
+    '''
+
+    try:
+        # 'NA' is both the code of Namibia and of North America, so it shouldn't be parsed as NaN.
+        iso_df = _pd.read_csv(
+            iso_path,
+            keep_default_na=False,
+            usecols=['iso2', 'Admin2', 'Province_State', 'Country_Region'])
+        relation_df = _pd.read_csv(
+            relation_path,
+            keep_default_na=False,
+            usecols=['Continent_Name', 'Two_Letter_Country_Code'])
+    except (OSError, ValueError):
+        return dict()
+
+    _record_file(iso_path)
+    _record_file(relation_path)
+
+    countries_df = iso_df[(iso_df['Province_State'] == '')
+                          & (iso_df['Admin2'] == '')]
+    continents = relation_df.drop_duplicates(
+        'Two_Letter_Country_Code').set_index(
+            'Two_Letter_Country_Code')['Continent_Name']
+
+    return countries_df.set_index('Country_Region')['iso2'].map(
+        continents).dropna().to_dict()
+
+
+def _compute_rollup(panel: _ReportsPanel,
+                    groups: _types.List[_types.Optional[str]],
+                    total: str = None) -> _ReportsPanel:
+    '''
+    Sums additive metrics of the panel entities by groups in one grouped pass.
+
+    Args:
+        panel(_ReportsPanel): Reports to roll up.
+        groups(list(str)): The group of every entity of the panel, or None if the entity isn't included in any group.
+        total(str): The name of the group of all entities (including ones without group), which is added after groups.
+            If it's not specified, then the total isn't computed.
+
+    Returns:
+        A panel with sorted groups (and the total) as entities. A group is present on the date,
+        if any of its entities is present on it. Sums keep dtypes of the metrics, NaN values are skipped.
+    '''
+
+    names = sorted({group for group in groups if group is not None})
+    group_index = {name: idx for idx, name in enumerate(names)}
+    codes = _np.array([group_index.get(group, -1) for group in groups],
+                      dtype=_np.int64)
+    metrics_idx = [
+        idx for idx, metric in enumerate(panel.metrics)
+        if metric not in _NON_ADDITIVE_METRICS
+    ]
+
+    # Entities are ordered by groups, so every group is a contiguous block, and all groups are summed at once.
+    order = _np.argsort(codes, kind='stable')
+    (labels, starts) = _np.unique(codes[order], return_index=True)
+    present = panel.present[:, order]
+    values = _np.where(present[:, :, _np.newaxis],
+                       _np.nan_to_num(panel.values[:, order][:, :, metrics_idx]),
+                       0)
+
+    if len(labels):
+        sums = _np.add.reduceat(values, starts, axis=1)
+        counts = _np.add.reduceat(present.astype(_np.int64), starts, axis=1)
+    else:
+        sums = values[:, :0]
+        counts = present[:, :0].astype(_np.int64)
+
+    entities = names + ([total] if total else [])
+    rollup_values = _np.zeros((len(panel.dates), len(entities), len(metrics_idx)))
+    rollup_present = _np.zeros((len(panel.dates), len(entities)), dtype=bool)
+
+    grouped = labels >= 0
+    rollup_values[:, labels[grouped]] = sums[:, grouped]
+    rollup_present[:, labels[grouped]] = counts[:, grouped] > 0
+
+    if total:
+        rollup_values[:, -1] = sums.sum(axis=1)
+        rollup_present[:, -1] = counts.sum(axis=1) > 0
+
+    return _ReportsPanel(panel.dates, entities,
+                         [panel.metrics[idx] for idx in metrics_idx],
+                         [panel.dtypes[idx] for idx in metrics_idx],
+                         rollup_values, rollup_present)
+
+
+class _RollupsCache():
+    '''
+    Helper class to keep rollups of reports panels: countries reports summed by continents and for the world,
+    and country regions reports summed for the country. Rollups are saved next to panels and remember sources
+    of the panel and groups of entities they were computed with.
+    '''
+
+    def __init__(self, path):
+        self.__paths = path
+        self.__entries = dict()
+
+    def get(self, country_name: str, panel: _ReportsPanel,
+            sources: _np.ndarray,
+            groups: _types.List[_types.Optional[str]],
+            total: str = None) -> _ReportsPanel:
+        '''
+        Returns the rollup of the panel.
+
+        Args:
+            country_name(str): The name of the country if the panel keeps its regions reports, or None for countries reports.
+            panel(_ReportsPanel): The panel to roll up.
+            sources(ndarray): Sizes and modification times of the source reports of the panel, it's a version of data.
+                If it's None, then the rollup is computed and isn't cached.
+            groups(list(str)): The group of every entity of the panel, see _compute_rollup.
+            total(str): The name of the group of all entities, see _compute_rollup.
+
+        Returns:
+            The rollup as a panel. It's shared between calls and shouldn't be modified.
+        '''
+
+        if sources is None:
+            return _compute_rollup(panel, groups, total)
+
+        # Groups are a part of the version, so rollups are recomputed when entities move between groups.
+        sources = _np.concatenate([
+            sources,
+            _np.array([f'{entity}>{group}' for entity, group in zip(
+                panel.entities, groups)] + [f'>{total}'], dtype=str)
+        ])
+
+        entry = self.__entries.get(country_name)
+        if entry is not None and _np.array_equal(entry[0], sources):
+            return entry[1]
+
+        filepath = self.__paths.get_rollup_path(country_name)
+        (rollup, rollup_sources) = _ReportsPanel.load(filepath)
+
+        if rollup is None or not _np.array_equal(rollup_sources, sources):
+            rollup = _compute_rollup(panel, groups, total)
+            rollup.save(filepath, sources)
+
+        self.__entries[country_name] = (sources, rollup)
+        return rollup
+
+    def clear(self):
+        ''' Removes rollups from memory. Files are removed with the reports cache. '''
+        self.__entries.clear()
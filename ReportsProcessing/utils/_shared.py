@@ -0,0 +1,288 @@
+import typing as _types
+from multiprocessing import shared_memory as _shared_memory
+import numpy as _np
+import pandas as _pd
+from pandas.api.types import CategoricalDtype as _CategoricalDtype
+
+# Segments are aligned, so every column view starts on a cache line.
+_ALIGNMENT = 64
+
+# Shared memory blocks attached by the current process, they should live as long as frames which view them.
+_attached_blocks = dict()
+# Detached blocks which are still viewed by frames. They are closed by later detaches, when frames are released.
+_detached_blocks = list()
+
+
+class _SharedSegment(_types.NamedTuple):
+    '''
+    Columns of the same kind and dtype stored as a (columns × rows) array in a shared memory block.
+    '''
+
+    columns: _types.List[_types.Hashable]
+    kind: str
+    ''' 'values' for numbers, 'datetime' for dates, 'category' for categorical columns, or 'object' for strings. '''
+    dtype: str
+    ''' The dtype of stored values, codes for categorical and string columns. '''
+    offset: int
+    categories: _types.Optional[list] = None
+    ''' Categories of the column, e.g. the entity index of names, or None for numbers and dates. '''
+
+
+class _SharedFrame(_types.NamedTuple):
+    '''
+    Descriptor of a DataFrame published in a shared memory block. It keeps no rows data,
+    so it's cheap to send to worker processes, which attach views on the block (see _attach_frame).
+    '''
+
+    block: str
+    rows: int
+    segments: _types.List[_SharedSegment]
+    index: _types.Optional[_SharedSegment]
+    ''' Integer index, or None for the default range index. '''
+
+
+def _get_codes_dtype(categories_count: int) -> _np.dtype:
+    # The same dtype as pandas uses for codes, so categorical columns are built on codes without copying.
+    for dtype in (_np.int8, _np.int16, _np.int32):
+        if categories_count < _np.iinfo(dtype).max:
+            return _np.dtype(dtype)
+
+    return _np.dtype(_np.int64)
+
+
+def _to_segments(
+    df: _pd.DataFrame
+) -> _types.Optional[_types.List[_types.Tuple[str, list, _np.ndarray, list]]]:
+    ''' Groups columns by kind and dtype. Returns None if the frame has columns which can't be shared. '''
+
+    groups = dict()
+    for column, values in df.items():
+        dtype = values.dtype
+
+        if isinstance(dtype, _CategoricalDtype):
+            categories = list(dtype.categories)
+            codes = values.cat.codes.to_numpy().astype(
+                _get_codes_dtype(len(categories)), copy=False)
+            groups[('category', column)] = ([column], [codes], categories)
+        elif dtype == object:
+            if _pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                return None
+            (codes, categories) = _pd.factorize(values)
+            groups[('object', column)] = ([column], [
+                codes.astype(_get_codes_dtype(len(categories)), copy=False)
+            ], list(categories))
+        elif dtype.kind == 'M' and dtype == _np.dtype('datetime64[ns]'):
+            group = groups.setdefault(('datetime', dtype.str), ([], [], None))
+            group[0].append(column)
+            group[1].append(values.to_numpy().view(_np.int64))
+        elif dtype.kind in 'biuf':
+            group = groups.setdefault(('values', dtype.str), ([], [], None))
+            group[0].append(column)
+            group[1].append(values.to_numpy())
+        else:
+            return None
+
+    return [(kind, columns, _np.stack(arrays), categories)
+            for (kind, _), (columns, arrays, categories) in groups.items()]
+
+
+def _share_frame(
+        df: _pd.DataFrame
+) -> _types.Tuple[_types.Optional[_shared_memory.SharedMemory],
+                  _types.Optional[_SharedFrame]]:
+    '''
+    Publishes numeric, dates, categorical and string columns of the DataFrame in a new shared memory block.
+
+    Numbers and dates are stored as is, so workers get views on them without copying. Categorical and string columns
+    are stored as codes with categories in the descriptor. Strings are restored as object columns, which takes
+    a pointer per row in every worker, but strings themselves aren't serialized.
+
+    Args:
+        df(DataFrame): The frame to publish. Its index should be the default range index or an integer index.
+
+    Returns:
+        A tuple of the shared memory block and the descriptor of the frame, or (None, None) if the frame has
+        columns or index which can't be shared. The block should be closed and unlinked by the caller, when workers are done.
+    '''
+
+    segments = _to_segments(df)
+    index = df.index
+    if segments is None or not (isinstance(index, _pd.RangeIndex) and index.start == 0
+                                and index.step == 1 or index.dtype.kind in 'iu'):
+        return None, None
+
+    arrays = [values for (_, _, values, _) in segments]
+    if not isinstance(index, _pd.RangeIndex):
+        arrays.append(index.to_numpy()[_np.newaxis, :])
+
+    offsets = list()
+    size = 0
+    for values in arrays:
+        offsets.append(size)
+        size += -(-values.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    block = _shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for values, offset in zip(arrays, offsets):
+        _np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf,
+                    offset=offset)[...] = values
+
+    descriptor = _SharedFrame(
+        block.name, len(df), [
+            _SharedSegment(columns, kind, values.dtype.str, offset, categories)
+            for (kind, columns, values, categories), offset in zip(segments, offsets)
+        ],
+        None if isinstance(index, _pd.RangeIndex) else _SharedSegment(
+            [index.name], 'values', arrays[-1].dtype.str, offsets[-1]))
+
+    return block, descriptor
+
+
+def _attach_block(name: str) -> _shared_memory.SharedMemory:
+    block = _attached_blocks.get(name)
+
+    if block is None:
+        try:
+            # Python 3.13+ doesn't track attached blocks, so they are unlinked only by the publisher.
+            block = _shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Otherwise the block is registered in the resource tracker, which unlinks it on exit of the process.
+            # It's safe only for fork and spawn children of the publisher: they share its resource tracker,
+            # so the block is unlinked once by the publisher. Other processes would unlink the block on exit.
+            block = _shared_memory.SharedMemory(name=name)
+        _attached_blocks[name] = block
+
+    return block
+
+
+def _detach_blocks(names: _types.Iterable[str]):
+    '''
+    Closes shared memory blocks attached by the current process. Blocks which are still viewed by frames
+    are closed by later calls, after frames are released.
+    '''
+
+    blocks = _detached_blocks + [_attached_blocks.pop(name) for name in names if name in _attached_blocks]
+    _detached_blocks.clear()
+
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            _detached_blocks.append(block)
+
+
+def _attach_frame(descriptor: _SharedFrame) -> _pd.DataFrame:
+    '''
+    Returns a DataFrame built on views of the shared memory block described by the descriptor.
+    Views are read-only, so the frame can't be modified in place, and columns are grouped by dtypes.
+
+    Args:
+        descriptor(_SharedFrame): The descriptor returned by _share_frame.
+
+    Returns:
+        DataFrame with the same values, dtypes and index as the published one.
+    '''
+
+    block = _attach_block(descriptor.block)
+    # Views keep the buffer of the block exported, so the block isn't closed while frames view it (see _detach_blocks).
+    buffer = _np.frombuffer(block.buf, dtype=_np.uint8)
+
+    def get_view(segment: _SharedSegment) -> _np.ndarray:
+        dtype = _np.dtype(segment.dtype)
+        size = len(segment.columns) * descriptor.rows * dtype.itemsize
+        values = buffer[segment.offset:segment.offset + size].view(dtype).reshape(
+            len(segment.columns), descriptor.rows)
+        values.flags.writeable = False
+        return values
+
+    index = None if descriptor.index is None else _pd.Index(
+        get_view(descriptor.index)[0], name=descriptor.index.columns[0])
+
+    parts = list()
+    for segment in descriptor.segments:
+        values = get_view(segment)
+
+        if segment.kind == 'values':
+            parts.append(_pd.DataFrame(values.T, columns=segment.columns, index=index, copy=False))
+        elif segment.kind == 'datetime':
+            parts.append(
+                _pd.DataFrame(values.T.view('datetime64[ns]'),
+                              columns=segment.columns,
+                              index=index,
+                              copy=False))
+        elif segment.kind == 'category':
+            parts.append(
+                _pd.DataFrame(
+                    {
+                        segment.columns[0]:
+                        _pd.Categorical.from_codes(
+                            values[0], dtype=_CategoricalDtype(segment.categories))
+                    },
+                    index=index))
+        else:
+            categories = _np.array(segment.categories + [_np.nan], dtype=object)
+            parts.append(
+                _pd.DataFrame({segment.columns[0]: categories[values[0]]},
+                              index=index))
+
+    if not parts:
+        return _pd.DataFrame(index=_pd.RangeIndex(descriptor.rows) if index is None else index)
+
+    return _pd.concat(parts, axis=1, copy=False)
+
+
+class _SharedData():
+    '''
+    Publishes DataFrames of a data dictionary in shared memory for worker processes.
+    Plain DataFrames with supported columns are replaced with descriptors, other objects (e.g. shapes) are kept as is.
+    Blocks are removed on exit of the context, so workers should be done by then. Blocks attached by the publishing process
+    itself are detached too, so its attached frames shouldn't be used after it.
+    '''
+
+    def __init__(self, data: dict):
+        self.__blocks = list()
+        self.data = dict()
+
+        try:
+            for key, value in data.items():
+                block = None
+                if type(value) is _pd.DataFrame:
+                    (block, value_descriptor) = _share_frame(value)
+
+                if block is None:
+                    self.data[key] = value
+                else:
+                    self.__blocks.append(block)
+                    self.data[key] = value_descriptor
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        ''' Removes shared memory blocks. '''
+
+        _detach_blocks([block.name for block in self.__blocks])
+        for block in self.__blocks:
+            block.close()
+            block.unlink()
+        self.__blocks.clear()
+
+    def __enter__(self) -> '_SharedData':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _attach_data(data: dict) -> dict:
+    ''' Returns the data dictionary with shared DataFrames descriptors replaced with frames attached to them. '''
+
+    return {
+        key: _attach_frame(value) if isinstance(value, _SharedFrame) else value
+        for key, value in data.items()
+    }
+
+
+def _detach_data(data: dict):
+    ''' Closes shared memory blocks attached by _attach_data for the data dictionary. '''
+
+    _detach_blocks([value.block for value in data.values() if isinstance(value, _SharedFrame)])
@@ -1,31 +1,145 @@
 import os as _os
+import itertools as _itertools
+from collections import deque as _deque
+import numpy as _np
 import pandas as _pd
-from typing import List as _List, Tuple as _Tuple
+from concurrent import futures as _futures
+from typing import Dict as _Dict, Iterator as _Iterator, List as _List, Tuple as _Tuple, Union as _Union
 
+from ._catalog import _Catalog
+from ._cache import _COMPACT_TYPES, _ReportsCache, _StatsCache, _read_report, _read_report_csv, _to_compact
+from ._panel import _ReportsPanel
+from ._aggregates import _AggregatesCache
+from ._ranking import _RankingIndex
+from ._rollups import _WORLD, _RollupsCache, _read_continents_relation
+from ._instrumentation import _instrumented_class
 
+# Reading a report costs about a tenth of loading the panel, so queries for a few entities don't load or build it.
+_NARROW_QUERY_FRACTION = 0.1
+
+
+@_instrumented_class
 class _Storage():
     '''
     Helper class to acess data stored in reports.
+
+    Parsed reports are cached in a binary format next to the CSV tree, so only the first read
+    of every report file pays for CSV and dates parsing. Reports for all countries, and for all regions
+    of a country, are additionally consolidated into a dense date × entity × metric panel,
+    so bulk methods are served as slices of it instead of reading and concatenating a file per entity.
+    Queries for a few entities (up to a tenth of them) are read per report while the panel isn't in memory,
+    and only requested columns and dates are loaded from their cached files. Pass use_cache=False to always read CSV files.
+
+    Bulk methods read report files one after another by default. Use configure_loader to read them
+    in parallel with a thread or a process pool.
+
+    Lists of countries and regions come from the reports catalog, which is shared with dates service.
+
+    Reports use int64 and float64 metrics by default. Use configure_dtypes to switch to compact mode
+    with categorical names, int32 counters and float32 ratios. Long-form reports with all columns
+    take about 3 times less memory in this mode, and wide-form reports take half of it.
+
+    Moving averages, weekly and monthly sums are materialized for all entities and metrics at once (see get_aggregates).
+    They are computed once per version of reports and saved with the cache, so plots and other reports read finished series.
+    Rollups of countries by continents and for the world, and of regions for their country, are cached the same way (see get_rollups).
+
+    Long-form reports, aggregates, rankings and stats can carry integer IDs of entities from the entity registry (see configure_ids),
+    so they are joined with each other and with shapes by IDs instead of names.
     '''
-    def __init__(self, path):
+    def __init__(self,
+                 path,
+                 use_cache: bool = True,
+                 workers: int = 1,
+                 use_processes: bool = False,
+                 catalog: _Catalog = None,
+                 compact: bool = False):
         self.__paths = path
-        pass
+        self.__catalog = catalog if catalog else _Catalog(path)
+        self.__cache = _ReportsCache(path) if use_cache else None
+        self.__panels = dict()
+        self.__changes = dict()
+        self.__aggregates = _AggregatesCache(path)
+        self.__rankings = dict()
+        self.__rollups = _RollupsCache(path)
+        self.__continents_relation = None
+        self.__stats = _StatsCache()
+        self.configure_loader(workers, use_processes)
+        self.configure_dtypes(compact)
+        self.configure_ids()
+
+    def configure_loader(self, workers: int = None, use_processes: bool = False):
+        '''
+        Configures how bulk methods read report files.
+
+        Args:
+            workers(int): The number of files to read in parallel. If not specified, then it's equal to the number of CPUs. Use 1 to read files sequentially.
+            use_processes(bool): A flag indicating whether or not files should be read in a process pool instead of a thread pool. Default is False.
+        '''
+
+        self.__workers = workers if workers else (_os.cpu_count() or 1)
+        self.__use_processes = use_processes
+
+    def configure_dtypes(self, compact: bool = False):
+        '''
+        Configures dtypes of reports returned by all methods.
+
+        Args:
+            compact(bool): A flag indicating whether or not reports should use compact dtypes: categorical 'Name' column, int32 for counters and float32 for 'Rt' and 'Time_To_Resolve'. Default is False.
+        '''
+
+        self.__compact = compact
+
+    def configure_ids(self, registry=None):
+        '''
+        Configures whether or not long-form reports, aggregates, rankings and countries and regions stats carry IDs of entities.
+
+        Args:
+            registry(_EntityRegistry): The entity registry (utils.entities) to take IDs from. Results get int64 'Id' column,
+                which is the same for the entity in all of them. If not specified, then results don't have IDs. Default is None.
+        '''
+
+        self.__registry = registry
+
+    def __with_ids(self, df: _pd.DataFrame, country_name: str = None,
+                   names=None) -> _pd.DataFrame:
+        if self.__registry is not None:
+            df['Id'] = self.__registry.get_ids(
+                df['Name'] if names is None else names, country_name)
+
+        return df
 
     def get_country_regions(self, country_name: str) -> _List[str]:
-        '''Returns list of regions for the specified country. The result is based on available region reports.'''
+        '''Returns sorted list of regions for the specified country. The result is based on available region reports.'''
 
-        return list(
-            map(lambda file_name: _os.path.splitext(file_name)[0],
-                self.__paths.get_country_regions_reports_paths(country_name)))
+        return self.__catalog.get_country_regions(country_name)
 
     def get_countries(self) -> _List[str]:
-        ''' Returns list of all availables countries to process. '''
-        return list(self.__paths.get_countries_reports_paths())
+        ''' Returns sorted list of all availables countries to process. '''
+        return self.__catalog.get_countries()
+
+    def get_report_info(self,
+                        country_name: str,
+                        region_name: str = None) -> dict:
+        '''
+        Returns information about the country or the country's region report from the reports catalog.
+
+        Args:
+            country_name(str): The name of the country.
+            region_name(str): The name of the country's region. This is optional argument.
+
+        Returns:
+            Dictionary with 'size', 'mtime_ns', 'rows', 'first_date' and 'last_date' (in ISO format) keys.
+        '''
+
+        return self.__catalog.get_report_info(country_name, region_name)
 
     def get_country_report(self,
                            country_name: str,
                            parse_dates=True,
-                           date_is_index=True) -> _pd.DataFrame:
+                           date_is_index=True,
+                           columns: _List[str] = None,
+                           start_date: _pd.Timestamp = None,
+                           end_date: _pd.Timestamp = None) -> _pd.DataFrame:
         '''
         Returns a country report as pandas DataFrame.
 
@@ -33,20 +147,26 @@ class _Storage():
             country_name(str): The name of the country for which report should be retrieved.
             parse_dates(bool): A flag indicating whether or not dates in DataFrame should be parsed. Default is True.
             date_is_index(bool): A flag indicating whether or not date column should be used as index. This parameter is ignored when 'parse_dates' is False. Default is True.
+            columns(list(str)): The columns to read. If not specified, then all are read.
+            start_date(Timestamp): The date from which dataframe should be started. Requires 'parse_dates'.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive). Requires 'parse_dates'.
 
         Returns:
             DataFrame: a country report
         '''
 
-        return _Storage.__read_csv_file(
+        return self.__read_csv_file(
             self.__paths.get_country_report_path(country_name), parse_dates,
-            date_is_index)
+            date_is_index, columns, start_date, end_date)
 
     def get_region_report(self,
                           country_name: str,
                           region_name: str,
                           parse_dates=True,
-                          date_is_index=True) -> _pd.DataFrame:
+                          date_is_index=True,
+                          columns: _List[str] = None,
+                          start_date: _pd.Timestamp = None,
+                          end_date: _pd.Timestamp = None) -> _pd.DataFrame:
         '''Returns a country's region report as pandas DataFrame.
 
         Args:
@@ -54,82 +174,244 @@ class _Storage():
             region_name(str): The name of the country's region for which report should be retrieved.
             parse_dates(bool): A flag indicating whether or not dates in DataFrame should be parsed. Default is True.
             date_is_index(bool): A flag indicating whether or not date column should be used as index. This parameter is ignored when 'parse_dates' is False. Default is True.
+            columns(list(str)): The columns to read. If not specified, then all are read.
+            start_date(Timestamp): The date from which dataframe should be started. Requires 'parse_dates'.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive). Requires 'parse_dates'.
 
         Returns:
             DataFrame: a country's region report
         '''
 
-        return _Storage.__read_csv_file(
+        return self.__read_csv_file(
             self.__paths.get_region_report_path(country_name, region_name),
-            parse_dates, date_is_index)
+            parse_dates, date_is_index, columns, start_date, end_date)
+
+    def __read_csv_file(self,
+                        filepath: str,
+                        parse_dates,
+                        date_is_index,
+                        columns: _List[str] = None,
+                        start_date: _pd.Timestamp = None,
+                        end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+        if not parse_dates:
+            df = _read_report_csv(filepath,
+                                  parse_dates=False,
+                                  columns=columns,
+                                  start_date=start_date,
+                                  end_date=end_date)
+            return _to_compact(df) if self.__compact else df
+
+        df = _read_report(filepath, self.__cache, columns, start_date,
+                          end_date)
+
+        if self.__compact:
+            df = _to_compact(df)
+
+        if date_is_index:
+            return df.set_index("Date")
+
+        return df
 
     @staticmethod
-    def __read_csv_file(filepath: str, parse_dates,
-                        date_is_index) -> _pd.DataFrame:
-        columns_types = {
-            'Confirmed': int,
-            'Deaths': int,
-            'Recovered': int,
-            'Confirmed_Change': int,
-            'Deaths_Change': int,
-            'Recovered_Change': int,
-            'Rt': float,
-            'Time_To_Resolve': float
-        }
-
-        if (parse_dates):
-            if (date_is_index):
-                return _pd.read_csv(filepath,
-                                    parse_dates=["Date"],
-                                    index_col="Date",
-                                    dayfirst=True,
-                                    dtype=columns_types)
-            else:
-                return _pd.read_csv(filepath,
-                                    parse_dates=["Date"],
-                                    dayfirst=True,
-                                    dtype=columns_types)
+    def __select_names(names: _List[str], include: _List[str],
+                       exclude: _List[str]) -> _List[str]:
+        if (include is not None and len(include) > 0):
+            names = include
+
+        return [name for name in names if not (exclude and name in exclude)]
+
+    def __get_report_path(self, country_name: str, name: str) -> str:
+        if country_name:
+            return self.__paths.get_region_report_path(country_name, name)
+
+        return self.__paths.get_country_report_path(name)
+
+    def __get_sources(self, country_name: str, names: _List[str]):
+        sources = list()
+        for name in names:
+            stat = _os.stat(self.__get_report_path(country_name, name))
+            sources.append(f'{name}|{stat.st_mtime_ns}|{stat.st_size}')
+
+        return _np.array(sources, dtype=str)
+
+    def __get_panel(self, country_name: str = None) -> _ReportsPanel:
+        if not self.__cache:
+            return None
+
+        names = self.get_country_regions(
+            country_name) if country_name else self.get_countries()
+        sources = self.__get_sources(country_name, names)
+        panel_path = self.__paths.get_panel_path(country_name)
+
+        if country_name in self.__panels:
+            (panel_sources, panel) = self.__panels[country_name]
+            if _np.array_equal(panel_sources, sources):
+                return panel
         else:
-            return _pd.read_csv(filepath, dtype=columns_types)
+            (panel, panel_sources) = _ReportsPanel.load(panel_path)
+            if panel is not None and _np.array_equal(panel_sources, sources):
+                self.__panels[country_name] = (sources, panel)
+                self.__changes[country_name] = None
+                return panel
+
+        if panel is not None and panel.entities == names:
+            # Only reports that have changed are read, the rest of the panel is reused.
+            changed_names = [
+                name for name, panel_source, source in zip(
+                    names, panel_sources, sources) if panel_source != source
+            ]
+            (panel, changed_since) = panel.update(
+                zip(changed_names,
+                    self.__read_reports(country_name, changed_names)))
+        else:
+            panel = _ReportsPanel.build(
+                zip(names, self.__read_reports(country_name, names)))
+            changed_since = _pd.Timestamp(
+                panel.dates[0]) if len(panel.dates) else None
+
+        panel.save(panel_path, sources)
+        self.__panels[country_name] = (sources, panel)
+        self.__changes[country_name] = changed_since
+        return panel
+
+    def get_changed_since(self,
+                          country_name: str = None) -> _pd.Timestamp:
+        '''
+        Returns the earliest date for which reports data has changed, when reports were reloaded last time.
+        Reports are reloaded on this call too, if their files have changed. It's used to recompute only the last part of derived data (see utils.data.augment and utils.data.per_week).
 
-    @staticmethod
-    def __get_series_or_dataframe(df: _pd.DataFrame,
-                                  name: str,
-                                  column_name: str = None,
-                                  start_date: _pd.Timestamp = None,
-                                  wide_form: bool = True):
-
-        column_series = {
-            column_name and start_date and wide_form:
-            lambda x: df.loc[start_date:, column_name],
-            column_name and start_date and not wide_form:
-            lambda x: df.loc[df.Date >= start_date, ['Date', column_name]],
-            column_name and not start_date and wide_form:
-            lambda x: df[column_name],
-            column_name and not start_date and not wide_form:
-            lambda x: df[['Date', column_name]],
-            not column_name and start_date and wide_form:
-            lambda x: df.loc[start_date:],
-            not column_name and start_date and not wide_form:
-            lambda x: df.loc[df.Date >= start_date],
-            not column_name and not start_date and wide_form:
-            lambda x: df,
-            not column_name and not start_date and not wide_form:
-            lambda x: df
-        }[True](None)
+        Args:
+            country_name(str): The name of the country to check its regions reports. If not specified, then countries reports are checked.
+
+        Returns:
+            Timestamp: the earliest changed date, or None if nothing has changed.
+            Without the cache all reports are treated as changed, and the minimal Timestamp is returned.
+        '''
+
+        if self.__get_panel(country_name) is None:
+            return _pd.Timestamp.min
+
+        return self.__changes[country_name]
+
+    def __read_reports(self,
+                       country_name: str,
+                       names: _List[str],
+                       columns: _List[str] = None,
+                       start_date: _pd.Timestamp = None,
+                       end_date: _pd.Timestamp = None) -> _List[_pd.DataFrame]:
+        paths = [self.__get_report_path(country_name, name) for name in names]
+
+        if self.__workers <= 1 or len(paths) <= 1:
+            return [
+                _read_report(path, self.__cache, columns, start_date,
+                             end_date) for path in paths
+            ]
+
+        executor_type = _futures.ProcessPoolExecutor if self.__use_processes else _futures.ThreadPoolExecutor
+
+        with executor_type(max_workers=self.__workers) as executor:
+            return list(
+                executor.map(_read_report, paths,
+                             _itertools.repeat(self.__cache),
+                             _itertools.repeat(columns),
+                             _itertools.repeat(start_date),
+                             _itertools.repeat(end_date)))
+
+    def __iter_reports(
+        self,
+        country_name: str,
+        names: _List[str],
+        columns: _List[str] = None,
+        start_date: _pd.Timestamp = None,
+        end_date: _pd.Timestamp = None
+    ) -> _Iterator[_Tuple[str, _pd.DataFrame]]:
+        paths = [self.__get_report_path(country_name, name) for name in names]
+
+        if self.__workers <= 1 or len(paths) <= 1:
+            for name, path in zip(names, paths):
+                yield name, self.__to_chunk(
+                    country_name, name, names,
+                    _read_report(path, self.__cache, columns, start_date,
+                                 end_date))
+            return
+
+        executor_type = _futures.ProcessPoolExecutor if self.__use_processes else _futures.ThreadPoolExecutor
+
+        # Reads ahead no more than one report per worker, so memory stays bounded.
+        with executor_type(max_workers=self.__workers) as executor:
+            pending = _deque()
+            for name, path in zip(names, paths):
+                pending.append((name,
+                                executor.submit(_read_report, path,
+                                                self.__cache, columns,
+                                                start_date, end_date)))
+                if len(pending) > self.__workers:
+                    (name, future) = pending.popleft()
+                    yield name, self.__to_chunk(country_name, name, names, future.result())
+
+            while pending:
+                (name, future) = pending.popleft()
+                yield name, self.__to_chunk(country_name, name, names, future.result())
+
+    def __to_chunk(self, country_name: str, name: str, names: _List[str],
+                   report_df: _pd.DataFrame) -> _pd.DataFrame:
+        report_df = report_df.assign(Name=name).fillna(0)
+        report_df = _to_compact(report_df, names) if self.__compact else report_df
+        return self.__with_ids(report_df, country_name)
+
+    def __is_narrow_query(self, country_name: str, names: _List[str]) -> bool:
+        if country_name in self.__panels or not names:
+            return False
+
+        all_names = self.get_country_regions(
+            country_name) if country_name else self.get_countries()
+        return len(names) <= len(all_names) * _NARROW_QUERY_FRACTION
+
+    def __get_reports(self,
+                      country_name: str,
+                      names: _List[str],
+                      columns: _List[str] = None,
+                      start_date: _pd.Timestamp = None,
+                      end_date: _pd.Timestamp = None,
+                      wide_form: bool = False) -> _pd.DataFrame:
+        panel = None if self.__is_narrow_query(country_name, names) else self.__get_panel(country_name)
+
+        if panel and panel.has_entities(names):
+            if wide_form:
+                return panel.to_wide_form(names, columns[0], start_date,
+                                          end_date, self.__compact)
+
+            return self.__with_ids(
+                panel.to_long_form(names, columns, start_date, end_date,
+                                   self.__compact), country_name)
+
+        reports_series = list()
+
+        for name, report_df in zip(
+                names,
+                self.__read_reports(country_name, names, columns, start_date,
+                                    end_date)):
+            if wide_form:
+                reports_series.append(
+                    report_df.set_index("Date")[columns[0]].rename(name))
+            else:
+                reports_series.append(report_df.assign(Name=name))
+
+        df = _pd.concat(reports_series, axis=1 if wide_form else 0).fillna(0)
 
         if wide_form:
-            column_series = column_series.rename(name)
-        else:
-            column_series['Name'] = name
+            return df.astype(_COMPACT_TYPES.get(columns[0], df.dtypes)) if self.__compact else df
 
-        return column_series
+        return self.__with_ids(_to_compact(df, names) if self.__compact else df,
+                               country_name)
 
     def get_regions_report(self,
                            country_name: str,
                            include: _List[str] = None,
                            exclude: _List[str] = None,
-                           start_date: _pd.Timestamp = None) -> _pd.DataFrame:
+                           start_date: _pd.Timestamp = None,
+                           end_date: _pd.Timestamp = None,
+                           columns: _List[str] = None) -> _pd.DataFrame:
         '''
         Returns reports for country regions as a long-form DataFrame.
 
@@ -138,32 +420,18 @@ class _Storage():
             include(list(str)): The whitelist of regions to include in dataframe. If not specified, then all are included.
             exlude(list(str)): The blacklist of regions to exlucde from dataframe. If not specified, then None are excluded.
             start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+            columns(list(str)): The columns to include in dataframe. If not specified, then all are included.
 
         Returns:
             Dataframe with regions report in long-form. Index is not specified, NaN values replaced with '0'.
         '''
 
-        regions_series = list()
-        regions = include
+        regions = _Storage.__select_names(
+            self.get_country_regions(country_name), include, exclude)
 
-        if (regions is None or len(regions) == 0):
-            regions = self.get_country_regions(country_name)
-
-        for region in regions:
-            if (exclude and region in exclude):
-                continue
-
-            region_df = self.get_region_report(country_name,
-                                               region,
-                                               date_is_index=False)
-
-            regions_series.append(
-                _Storage.__get_series_or_dataframe(region_df,
-                                                   region,
-                                                   start_date=start_date,
-                                                   wide_form=False))
-
-        return _pd.concat(regions_series, axis=0).fillna(0)
+        return self.__get_reports(country_name, regions, columns, start_date,
+                                  end_date)
 
     def get_regions_report_by_column(self,
                                      country_name: str,
@@ -171,7 +439,8 @@ class _Storage():
                                      include: _List[str] = None,
                                      exclude: _List[str] = None,
                                      start_date: _pd.Timestamp = None,
-                                     wide_form: bool = True) -> _pd.DataFrame:
+                                     wide_form: bool = True,
+                                     end_date: _pd.Timestamp = None) -> _pd.DataFrame:
         '''
         Returns reports for country regions for the particular metrics(column) as a DataFrame.
 
@@ -182,38 +451,26 @@ class _Storage():
             exlude(list(str)): The blacklist of regions to exlucde from dataframe. If not specified, then None are excluded.
             start_date(Timestamp): The date from which dataframe should be started.
             wide_form(bool): A flag indicating whether or not, result should be in the wide-form. By default it's True.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
 
         Returns:
             Dataframe with regions report for the specified column.
             NaN values replaced with '0'. If wide_form is True, then index is date, otherwise index not set.
         '''
 
-        regions_series = list()
-        regions = include
-
-        if (regions is None or len(regions) == 0):
-            regions = self.get_country_regions(country_name)
-
-        for region in regions:
-            if (exclude and region in exclude):
-                continue
+        regions = _Storage.__select_names(
+            self.get_country_regions(country_name), include, exclude)
 
-            region_df = self.get_region_report(country_name,
-                                               region,
-                                               date_is_index=wide_form)
-
-            regions_series.append(
-                _Storage.__get_series_or_dataframe(region_df, region,
-                                                   column_name, start_date,
-                                                   wide_form))
-
-        return _pd.concat(regions_series, axis=1 if wide_form else 0).fillna(0)
+        return self.__get_reports(country_name, regions, [column_name],
+                                  start_date, end_date, wide_form)
 
     def get_countries_report(
             self,
             include: _List[str] = None,
             exclude: _List[str] = None,
-            start_date: _pd.Timestamp = None) -> _pd.DataFrame:
+            start_date: _pd.Timestamp = None,
+            end_date: _pd.Timestamp = None,
+            columns: _List[str] = None) -> _pd.DataFrame:
         '''
         Returns reports for countries as a long-form DataFrame.
 
@@ -221,30 +478,18 @@ class _Storage():
             include(list(str)): The whitelist of countries to include in dataframe. If not specified, then all are included.
             exlude(list(str)): The blacklist of countries to exlucde from dataframe. If not specified, then None are excluded.
             start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+            columns(list(str)): The columns to include in dataframe. If not specified, then all are included.
 
         Returns:
             Dataframe with countries report in long-form. Index is not specified, NaN values replaced with '0'.
         '''
 
-        countries_series = list()
-        countries = include
-
-        if (countries is None or len(countries) == 0):
-            countries = self.get_countries()
-
-        for country in countries:
-            if (exclude and country in exclude):
-                continue
+        countries = _Storage.__select_names(self.get_countries(), include,
+                                            exclude)
 
-            country_df = self.get_country_report(country, date_is_index=False)
-
-            countries_series.append(
-                _Storage.__get_series_or_dataframe(country_df,
-                                                   country,
-                                                   start_date=start_date,
-                                                   wide_form=False))
-
-        return _pd.concat(countries_series).fillna(0)
+        return self.__get_reports(None, countries, columns, start_date,
+                                  end_date)
 
     def get_countries_report_by_column(
             self,
@@ -252,7 +497,8 @@ class _Storage():
             include: _List[str] = None,
             exclude: _List[str] = None,
             start_date: _pd.Timestamp = None,
-            wide_form: bool = True) -> _pd.DataFrame:
+            wide_form: bool = True,
+            end_date: _pd.Timestamp = None) -> _pd.DataFrame:
         '''
         Returns reports for countries for the particular metrics(column) as a DataFrame.
 
@@ -262,32 +508,256 @@ class _Storage():
             exlude(list(str)): The blacklist of countries to exlucde from dataframe. If not specified, then None are excluded.
             start_date(Timestamp): The date from which dataframe should be started.
             wide_form(bool): A flag indicating whether or not, result should be in the wide-form. By default it's True.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
 
         Returns:
             Dataframe with countries report for the specified column.
             NaN values replaced with '0'. If wide_form is True, then index is date, otherwise index not set.
         '''
 
-        countries_series = list()
-        countries = include
+        countries = _Storage.__select_names(self.get_countries(), include,
+                                            exclude)
+
+        return self.__get_reports(None, countries, [column_name], start_date,
+                                  end_date, wide_form)
+
+    def iter_regions_report(
+            self,
+            country_name: str,
+            include: _List[str] = None,
+            exclude: _List[str] = None,
+            start_date: _pd.Timestamp = None,
+            end_date: _pd.Timestamp = None,
+            columns: _List[str] = None
+    ) -> _Iterator[_Tuple[str, _pd.DataFrame]]:
+        '''
+        Returns an iterator over country regions reports. It's a memory-bounded counterpart of get_regions_report:
+        reports are read lazily one by one, and the consolidated reports are not built.
+
+        Args:
+            country_name(str): The name of the country for which reports should be retrieved.
+            include(list(str)): The whitelist of regions to include. If not specified, then all are included.
+            exlude(list(str)): The blacklist of regions to exlucde. If not specified, then None are excluded.
+            start_date(Timestamp): The date from which reports should be started.
+            end_date(Timestamp): The date on which reports should be finished (inclusive).
+            columns(list(str)): The columns to include in reports. If not specified, then all are included.
+
+        Returns:
+            Iterator over pairs of region name and its report with 'Date' and 'Name' columns. NaN values replaced with '0'.
+            The concatenation of reports is equal to the get_regions_report result.
+        '''
+
+        regions = _Storage.__select_names(
+            self.get_country_regions(country_name), include, exclude)
+
+        return self.__iter_reports(country_name, regions, columns, start_date,
+                                   end_date)
+
+    def iter_countries_report(
+            self,
+            include: _List[str] = None,
+            exclude: _List[str] = None,
+            start_date: _pd.Timestamp = None,
+            end_date: _pd.Timestamp = None,
+            columns: _List[str] = None
+    ) -> _Iterator[_Tuple[str, _pd.DataFrame]]:
+        '''
+        Returns an iterator over countries reports. It's a memory-bounded counterpart of get_countries_report:
+        reports are read lazily one by one, and the consolidated reports are not built.
+
+        Args:
+            include(list(str)): The whitelist of countries to include. If not specified, then all are included.
+            exlude(list(str)): The blacklist of countries to exlucde. If not specified, then None are excluded.
+            start_date(Timestamp): The date from which reports should be started.
+            end_date(Timestamp): The date on which reports should be finished (inclusive).
+            columns(list(str)): The columns to include in reports. If not specified, then all are included.
+
+        Returns:
+            Iterator over pairs of country name and its report with 'Date' and 'Name' columns. NaN values replaced with '0'.
+            The concatenation of reports is equal to the get_countries_report result.
+        '''
+
+        countries = _Storage.__select_names(self.get_countries(), include,
+                                            exclude)
+
+        return self.__iter_reports(None, countries, columns, start_date,
+                                   end_date)
+
+    def __get_source_panel(
+            self, country_name: str) -> _Tuple[_ReportsPanel, _np.ndarray]:
+        panel = self.__get_panel(country_name)
+        if panel is not None:
+            return panel, self.__panels[country_name][0]
+
+        # Without the cache the panel is built in memory, and derived data is computed on every call.
+        names = self.get_country_regions(
+            country_name) if country_name else self.get_countries()
+        panel = _ReportsPanel.build(
+            zip(names, self.__read_reports(country_name, names)))
+        return panel, None
+
+    def __get_aggregate(self, country_name: str,
+                        transform: str) -> _ReportsPanel:
+        (panel, sources) = self.__get_source_panel(country_name)
+        return self.__aggregates.get(country_name, transform, panel, sources)
+
+    def __select_entities(self, country_name: str, include: _List[str],
+                          exclude: _List[str]) -> _List[str]:
+        names = self.get_country_regions(
+            country_name) if country_name else self.get_countries()
+        return _Storage.__select_names(names, include, exclude)
+
+    def get_aggregates(self,
+                       transform: str,
+                       country_name: str = None,
+                       include: _List[str] = None,
+                       exclude: _List[str] = None,
+                       start_date: _pd.Timestamp = None,
+                       end_date: _pd.Timestamp = None,
+                       columns: _List[str] = None) -> _pd.DataFrame:
+        '''
+        Returns materialized aggregates of countries or country regions reports as a long-form DataFrame.
+
+        Args:
+            transform(str): 'SMA_<window>' for simple moving averages (e.g. 'SMA_7'), 'W-MON' for weekly sums labeled by Monday
+                (the same as utils.data.per_week), or 'M' for monthly sums labeled by the last day of month.
+            country_name(str): The name of the country for which regions aggregates should be retrieved. If not specified, then countries aggregates are returned.
+            include(list(str)): The whitelist of entities to include in dataframe. If not specified, then all are included.
+            exlude(list(str)): The blacklist of entities to exlucde from dataframe. If not specified, then None are excluded.
+            start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+            columns(list(str)): The columns to include in dataframe. If not specified, then all are included.
+
+        Returns:
+            Dataframe in long-form with 'Date', columns and 'Name' columns. Values of columns are aggregated, column names are the same as in reports.
+            Moving averages are computed over rows of every report and they are NaN for the first rows, like pandas rolling mean.
+            Sums are computed for weeks and months from the first to the last day of every report, NaN values are skipped.
+        '''
+
+        entities = self.__select_entities(country_name, include, exclude)
+
+        return self.__with_ids(
+            self.__get_aggregate(country_name, transform).to_long_form(
+                entities, columns, start_date, end_date, self.__compact),
+            country_name)
+
+    def get_aggregates_by_column(self,
+                                 transform: str,
+                                 column_name: str,
+                                 country_name: str = None,
+                                 include: _List[str] = None,
+                                 exclude: _List[str] = None,
+                                 start_date: _pd.Timestamp = None,
+                                 end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+        '''
+        Returns materialized aggregates of countries or country regions reports for the particular metrics(column) as a wide-form DataFrame.
+
+        Args:
+            transform(str): The transform, see get_aggregates.
+            column_name(str): The name of the column for which aggregates should be retrieved.
+            country_name(str): The name of the country for which regions aggregates should be retrieved. If not specified, then countries aggregates are returned.
+            include(list(str)): The whitelist of entities to include in dataframe. If not specified, then all are included.
+            exlude(list(str)): The blacklist of entities to exlucde from dataframe. If not specified, then None are excluded.
+            start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
+
+        Returns:
+            Dataframe with date (or the label of week or month) as index and entities as columns.
+        '''
+
+        entities = self.__select_entities(country_name, include, exclude)
+
+        return self.__get_aggregate(country_name, transform).to_wide_form(
+            entities, column_name, start_date, end_date, self.__compact)
+
+    def __get_ranking(self, column_name: str, k: int, level: str,
+                      country_name: str, transform: str) -> _RankingIndex:
+        if level not in ('country', 'region'):
+            raise ValueError(
+                f"Unsupported level '{level}', expected 'country' or 'region'")
+        if level == 'region' and not country_name:
+            raise ValueError("Regions ranking requires the name of the country")
 
-        if (countries is None or len(countries) == 0):
-            countries = self.get_countries()
+        if level == 'country':
+            country_name = None
+
+        if transform:
+            panel = self.__get_aggregate(country_name, transform)
+        else:
+            panel = self.__get_source_panel(country_name)[0]
+
+        # Rankings are kept while the panel is the same, and they are deep enough for the default top-10.
+        key = (country_name, column_name, transform)
+        ranking = self.__rankings.get(key)
+        if ranking is None or ranking.panel is not panel or ranking.depth < k:
+            ranking = _RankingIndex(panel, column_name, max(k, 10))
+            self.__rankings[key] = ranking
+
+        return ranking
+
+    def top_k(self,
+              column_name: str,
+              date: _pd.Timestamp,
+              k: int = 10,
+              level: str = 'country',
+              country_name: str = None,
+              transform: str = None) -> _Union[_pd.Series, _pd.DataFrame]:
+        '''
+        Returns countries or country regions with the largest values of the particular metrics(column) on the date.
+        Rankings for all dates are computed once per version of reports, so the call is a lookup of k values.
+
+        Args:
+            column_name(str): The name of the column to rank by.
+            date(Timestamp): The date of values.
+            k(int): The number of entities to return. Default is 10.
+            level(str): 'country' to rank countries, or 'region' to rank regions of the country. Default is 'country'.
+            country_name(str): The name of the country for which regions should be ranked. It's mandatory for 'region' level.
+            transform(str): The transform of materialized aggregates to rank by (see get_aggregates), e.g. 'SMA_7' or 'W-MON'. If not specified, then report values are used.
+
+        Returns:
+            Series with values in descending order, name is index. Entities without value on the date are not included,
+            and entities with equal values are ordered as in the list of countries or regions.
+            If IDs are configured (see configure_ids), then it's Dataframe with the column and 'Id' column, like in top_k_by_date.
+        '''
 
-        for country in countries:
-            if (exclude and country in exclude):
-                continue
+        top = self.__get_ranking(column_name, k, level, country_name,
+                                 transform).top(date, k)
+        if self.__registry is None:
+            return top
+
+        return self.__with_ids(top.to_frame(),
+                               country_name if level == 'region' else None,
+                               top.index)
+
+    def top_k_by_date(self,
+                      column_name: str,
+                      k: int = 10,
+                      level: str = 'country',
+                      country_name: str = None,
+                      transform: str = None,
+                      start_date: _pd.Timestamp = None,
+                      end_date: _pd.Timestamp = None) -> _pd.DataFrame:
+        '''
+        Returns countries or country regions with the largest values of the particular metrics(column) for every date.
+        It's the same as top_k for all dates, e.g. for frames of animations.
 
-            country_df = self.get_country_report(country,
-                                                 date_is_index=wide_form)
+        Args:
+            column_name(str): The name of the column to rank by.
+            k(int): The number of entities for every date. Default is 10.
+            level(str): 'country' to rank countries, or 'region' to rank regions of the country. Default is 'country'.
+            country_name(str): The name of the country for which regions should be ranked. It's mandatory for 'region' level.
+            transform(str): The transform of materialized aggregates to rank by (see get_aggregates). If not specified, then report values are used.
+            start_date(Timestamp): The date from which dataframe should be started.
+            end_date(Timestamp): The date on which dataframe should be finished (inclusive).
 
-            countries_series.append(
-                _Storage.__get_series_or_dataframe(country_df, country,
-                                                   column_name, start_date,
-                                                   wide_form))
+        Returns:
+            Dataframe in long-form with 'Date', 'Rank' (starting from 1), 'Name' and column_name columns.
+        '''
 
-        return _pd.concat(countries_series,
-                          axis=1 if wide_form else 0).fillna(0)
+        ranking_df = self.__get_ranking(column_name, k, level, country_name,
+                                        transform).to_frame(k, start_date, end_date)
+        return self.__with_ids(ranking_df,
+                               country_name if level == 'region' else None)
 
     def get_countries_stats(self) -> _pd.DataFrame:
         '''
@@ -298,8 +768,8 @@ class _Storage():
         '''
 
         report_file = self.__paths.get_countries_stats_path()
-        stats_df = _pd.read_csv(report_file, index_col=["Name"])
-        return stats_df.sort_index()
+        stats_df = self.__stats.read(report_file)[0].copy()
+        return self.__with_ids(stats_df, names=stats_df.index)
 
     def get_regions_stats(self, country_name: str) -> _pd.DataFrame:
         '''
@@ -313,8 +783,8 @@ class _Storage():
         '''
 
         report_file = self.__paths.get_country_regions_stats_path(country_name)
-        stats_df = _pd.read_csv(report_file, index_col=["Name"])
-        return stats_df.sort_index()
+        stats_df = self.__stats.read(report_file)[0].copy()
+        return self.__with_ids(stats_df, country_name, stats_df.index)
 
     def get_counties_stats(self, country_name: str,
                            region_name: str) -> _pd.DataFrame:
@@ -331,5 +801,178 @@ class _Storage():
 
         report_file = self.__paths.get_country_counties_stats_path(
             country_name, region_name)
-        stats_df = _pd.read_csv(report_file, index_col=["Name"])
-        return stats_df.sort_index()
+        return self.__stats.read(report_file)[0].copy()
+
+    def __get_stats_path(self, country_name: str = None,
+                         region_name: str = None) -> str:
+        if country_name and region_name:
+            return self.__paths.get_country_counties_stats_path(
+                country_name, region_name)
+        elif country_name:
+            return self.__paths.get_country_regions_stats_path(country_name)
+
+        return self.__paths.get_countries_stats_path()
+
+    def get_population(self,
+                       country_name: str,
+                       region_name: str = None,
+                       county_name: str = None) -> int:
+        '''
+        Returns population of the country, the country's region or the region's county.
+
+        Args:
+            country_name(str): The name of the country. This is mandatory argument.
+            region_name(str): The name of the region. This is optional argument.
+            county_name(str): The name of the county. This is optional argument, it's ignored when 'region_name' is not specified.
+
+        Returns:
+            Population from statistical information.
+        '''
+
+        if region_name and county_name:
+            path, name = self.__get_stats_path(country_name,
+                                               region_name), county_name
+        elif region_name:
+            path, name = self.__get_stats_path(country_name), region_name
+        else:
+            path, name = self.__get_stats_path(), country_name
+
+        return self.__stats.read(path)[1][name]
+
+    def get_populations(self,
+                        country_name: str = None,
+                        region_name: str = None) -> _pd.Series:
+        '''
+        Returns population of countries, the country regions or the region counties as Series.
+
+        Args:
+            country_name(str): The name of the country for which regions population should be retrieved. If not specified, then population of countries is returned.
+            region_name(str): The name of the region for which counties population should be retrieved.
+
+        Returns:
+            Series with population, name is index.
+        '''
+
+        stats_df = self.__stats.read(
+            self.__get_stats_path(country_name, region_name))[0]
+        return stats_df['Population'].copy()
+
+    def get_continents(self) -> _pd.Series:
+        '''
+        Returns continents of countries as Series.
+
+        Continents are taken from countries statistical information, and for countries which don't have it,
+        from 'Data/Continent_Country_Relation.csv' linked to names of countries by 'Data/ISO_LookUp.csv'.
+
+        Returns:
+            Series with continent, country name is index. Countries with unknown continent are not included.
+        '''
+
+        if self.__continents_relation is None:
+            self.__continents_relation = _read_continents_relation(
+                self.__paths.get_misc_data_path('ISO_LookUp.csv'),
+                self.__paths.get_misc_data_path('Continent_Country_Relation.csv'))
+
+        countries = self.get_countries()
+        stats_df = self.__stats.read(self.__get_stats_path())[0]
+        continents = _pd.Series(self.__continents_relation,
+                                dtype=object).reindex(countries)
+
+        if 'Continent' in stats_df:
+            continents = stats_df['Continent'].reindex(countries).fillna(
+                continents)
+
+        return continents.dropna().rename('Continent').rename_axis('Name')
+
+    def __get_rollup(self, country_name: str = None) -> _ReportsPanel:
+        (panel, sources) = self.__get_source_panel(country_name)
+
+        if country_name:
+            return self.__rollups.get(country_name, panel, sources,
+                                      [country_name] * len(panel.entities))
+
+        continents = self.get_continents().to_dict()
+        return self.__rollups.get(None, panel, sources,
+                                  [continents.get(name) for name in panel.entities],
+                                  _WORLD)
+
+    def get_rollups(self,
+                    country_name: str = None,
+                    start_date: _pd.Timestamp = None,
+                    end_date: _pd.Timestamp = None,
+                    columns: _List[str] = None) -> _Dict[str, _pd.DataFrame]:
+        '''
+        Returns reports summed up the hierarchy: countries by continents and for the world,
+        or regions of the country for the country. All levels are computed at once in one grouped pass
+        over the consolidated reports, and they are cached until reports or continents change.
+
+        Only additive metrics are summed, 'Rt' and 'Time_To_Resolve' are not included.
+        Continents are the same as in get_continents, and the world includes countries with unknown continent too.
+
+        Args:
+            country_name(str): The name of the country for which regions should be summed up. If not specified, then countries are summed up.
+            start_date(Timestamp): The date from which dataframes should be started.
+            end_date(Timestamp): The date on which dataframes should be finished (inclusive).
+            columns(list(str)): The columns to include in dataframes. If not specified, then all additive metrics are included.
+
+        Returns:
+            Dictionary of level ('continent' and 'world' for countries, or 'country' for regions) and DataFrame in long-form
+            with 'Date', columns and 'Name' columns, where 'Name' is a continent, 'World' or the name of the country.
+            Sums of countries for the world are equal to 'groupby('Date').sum()' of get_countries_report.
+        '''
+
+        rollup = self.__get_rollup(country_name)
+
+        if country_name:
+            return dict(country=rollup.to_long_form(rollup.entities, columns,
+                                                    start_date, end_date,
+                                                    self.__compact))
+
+        return dict(continent=rollup.to_long_form(rollup.entities[:-1], columns,
+                                                  start_date, end_date,
+                                                  self.__compact),
+                    world=rollup.to_long_form([_WORLD], columns, start_date,
+                                              end_date, self.__compact))
+
+    def get_rollup_populations(self, country_name: str = None) -> _pd.Series:
+        '''
+        Returns population summed up the hierarchy of statistical information: countries by continents and for the world,
+        or counties of the country regions for regions and the country. Regions without counties information keep their population.
+
+        Args:
+            country_name(str): The name of the country for which counties and regions should be summed up. If not specified, then countries are summed up.
+
+        Returns:
+            Series with population, name of the continent, 'World', the region or the country is index.
+        '''
+
+        if not country_name:
+            population = self.get_populations()
+            continents = self.get_continents()
+            result = population.groupby(continents.reindex(
+                population.index)).sum()
+            result[_WORLD] = population.sum()
+            return result.rename_axis('Name')
+
+        population = self.get_populations(country_name).copy()
+        for region in population.index:
+            counties_path = self.__get_stats_path(country_name, region)
+            if _os.path.exists(counties_path):
+                population[region] = self.__stats.read(
+                    counties_path)[0]['Population'].sum()
+
+        population[country_name] = population.sum()
+        return population
+
+    def clear_cache(self):
+        ''' Removes all cached reports, so the next reads will parse CSV files again. '''
+
+        self.__panels.clear()
+        self.__changes.clear()
+        self.__aggregates.clear()
+        self.__rankings.clear()
+        self.__rollups.clear()
+        self.__continents_relation = None
+        self.__stats.clear()
+        if self.__cache:
+            self.__cache.clear()